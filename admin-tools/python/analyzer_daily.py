@@ -7,6 +7,7 @@ from datetime import datetime
 from dotenv import load_dotenv
 from supabase import create_client, Client
 import requests
+from financials import load_financials_asof, load_profitability_asof, has_financials
 
 # Logging Setup
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -376,7 +377,7 @@ def calculate_objectives_v3(current_price, history_rows):
 def process_watchlist(tickers):
     """
     Analyze user's interested tickers and upload reports.
-    Optimized: Bulk fetch and group in memory.
+    Per-ticker range reads on (code, date) - see query_plan_check.py.
     """
     if not tickers:
         return
@@ -386,40 +387,35 @@ def process_watchlist(tickers):
     
     placeholders = ','.join(['?'] * len(normalized_tickers))
     
-    price_sql = f"""
+    # One index range per ticker: IN (...) + ORDER BY code, date forces a temp B-tree sort
+    price_sql = """
         SELECT code, date, close, open, high, low, volume, market_cap, per, pbr, revenue, net_income
-        FROM daily_price 
-        WHERE code IN ({placeholders})
-        ORDER BY code, date DESC
-    """
+        FROM daily_price
+        WHERE code = ?
+        ORDER BY date DESC
+        """
     
-    supply_sql = f"""
+    supply_sql = """
         SELECT code, date, foreigner, institution, pension
         FROM daily_supply
-        WHERE code IN ({placeholders})
-        ORDER BY code, date DESC
-    """
+        WHERE code = ?
+        ORDER BY date DESC
+        """
     
     try:
-        cur.execute(price_sql, normalized_tickers)
-        price_rows = cur.fetchall()
-        
-        cur.execute(supply_sql, normalized_tickers)
-        supply_rows = cur.fetchall()
-        
         price_map = {}
-        for r in price_rows:
-            if r["code"] not in price_map: price_map[r["code"]] = []
-            price_map[r["code"]].append(dict(r))
-            
         supply_map = {}
-        for r in supply_rows:
-            if r["code"] not in supply_map: supply_map[r["code"]] = []
-            supply_map[r["code"]].append(dict(r))
+        for code in normalized_tickers:
+            cur.execute(price_sql, (code,))
+            price_map[code] = [dict(r) for r in cur.fetchall()]
+
+            cur.execute(supply_sql, (code,))
+            supply_map[code] = [dict(r) for r in cur.fetchall()]
             
         # Need to fetch Stock Name for "Daily Insight" format
         cur.execute(f"SELECT code, name FROM tickers WHERE code IN ({placeholders})", normalized_tickers)
         name_map = {r["code"]: r["name"] for r in cur.fetchall()}
+        fin_map = load_financials_asof(cur, TODAY_DB, normalized_tickers) if has_financials(cur) else {}
 
         reports = []
         for code in normalized_tickers:
@@ -449,7 +445,7 @@ def process_watchlist(tickers):
             
             for s in reversed(s_history[:200]):
                 supply_chart.append({
-                    "date": s["date"],
+                    "date": str(s["date"]),
                     "foreigner": s["foreigner"],
                     "institution": s["institution"],
                     "pension": s.get("pension", 0),
@@ -488,8 +484,8 @@ def process_watchlist(tickers):
                         "market_cap": latest_p.get("market_cap"),
                         "per": latest_p.get("per"),
                         "pbr": latest_p.get("pbr"),
-                        "revenue": latest_p.get("revenue"),
-                        "net_income": latest_p.get("net_income")
+                        "revenue": fin_map[code]["revenue"] if code in fin_map else latest_p.get("revenue"),
+                        "net_income": fin_map[code]["net_income"] if code in fin_map else latest_p.get("net_income")
                     }
                 }
             }
@@ -590,9 +586,19 @@ def run_algo_screening(target_date=None):
         WHERE p.date = ? AND t.is_active = 1
     """, (max_price_date,))
     
+    value_rows = [dict(r) for r in cur.fetchall()]
+    # Point-in-time fundamentals published on or before the screening date: the TTM
+    # window, else the latest quarter annualized (see load_profitability_asof). Only DBs
+    # without any financials rows keep the legacy daily_price columns.
+    profitability = load_profitability_asof(cur, max_price_date)
+    for d in value_rows:
+        fin = profitability.get(d['code'])
+        if fin:
+            d['roe'] = fin['roe']
+            d['operating_margin'] = fin['operating_margin']
+
     val_candidates = []
-    for r in cur.fetchall():
-        d = dict(r)
+    for d in value_rows:
         code = d['code']
         mcap = d['market_cap'] or 0
         # Filters
@@ -678,12 +684,13 @@ def run_algo_screening(target_date=None):
     # Priority: Accumulation Density DESC -> 21d Acc DESC -> Box Range ASC
     mcap_limit_acc = get_mcap_limit("Foreigner_Accumulation")
     # Simplify query: Fetch 21d sum for all active tickers
+    # (upper bound lets the planner use idx_supply_date instead of a full scan)
     cur.execute("""
         SELECT code, SUM(foreigner) as f_sum 
         FROM daily_supply 
-        WHERE date >= strftime('%Y%m%d', 'now', '-21 days')
+        WHERE date >= strftime('%Y%m%d', 'now', '-21 days') AND date <= ?
         GROUP BY code HAVING f_sum > 0
-    """)
+    """, (max_supply_date,))
     acc_stats = {r[0]: r[1] for r in cur.fetchall()}
     
     acc_candidates = []
@@ -6,7 +6,7 @@ import time
 import pandas as pd
 from datetime import datetime, timedelta
 import logging
-from pykrx import stock
+from data_sources.recorder import krx_source
 
 # Logging Setup
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,9 +14,13 @@ logger = logging.getLogger(__name__)
 # Suppress pykrx internal logging clutter
 logging.getLogger("pykrx").setLevel(logging.ERROR)
 
+# pykrx.stock (live, or recorded/replayed per DATA_SOURCE_MODE)
+stock = krx_source()
+
 # Configuration
 DB_PATH = os.path.join(os.path.dirname(__file__), '../../dailyport.db')
 START_DATE_LIMIT = "20230101"
+PANEL_REWRITE_DAYS = 7 # calendar days re-read into the price panel on every run (late revisions)
 today_dt = datetime.now()
 if today_dt.weekday() >= 5: # 5=Sat, 6=Sun
     # Adjust to recent Friday
@@ -80,7 +84,8 @@ def get_last_sync_date(conn):
         )
     """)
     res = cursor.fetchone()[0]
-    return res.replace('-', '') if res else None
+    # str(): the compact layout (migrate_db_compact.py) stores dates as INTEGER YYYYMMDD
+    return str(res).replace('-', '') if res else None
 
 def repair_supply_bulk(conn, start_date, end_date=None):
     if not end_date:
@@ -352,6 +357,7 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     conn = get_db_connection()
+    failures = [] # steps that failed; a non-zero exit lets run_pipeline.py retry the stage
     
     # 1. Update Master
     update_tickers(conn)
@@ -370,8 +376,10 @@ if __name__ == "__main__":
             sync_daily_price(args.start, args.end)
         except ImportError:
             print("❌ batch_price_daily module not found.")
+            failures.append("price")
         except Exception as e:
             print(f"❌ Price Sync Failed: {e}")
+            failures.append("price")
             
         # 2. Financial Sync (OpenDart) - Optional/On-Demand
         # Usually run manually or once per quarter.
@@ -394,6 +402,24 @@ if __name__ == "__main__":
         if not args.test:
              _start = args.start if args.start else datetime.now().strftime("%Y%m%d")
              repair_supply_bulk(conn, _start, args.end)
+
+    # 3. Append new trading days to the memory-mapped price panel, and rewrite the
+    #    days this run may have corrected (repair range, or the last PANEL_REWRITE_DAYS)
+    try:
+        from price_panel import sync_panel
+        if args.repair_supply:
+            panel_since = args.start if args.start else START_DATE_LIMIT
+        else:
+            panel_since = (datetime.now() - timedelta(days=PANEL_REWRITE_DAYS)).strftime("%Y%m%d")
+            if args.start and args.start < panel_since:
+                panel_since = args.start
+        sync_panel(conn, since=panel_since)
+    except Exception as e:
+        print(f"❌ Price Panel Update Failed: {e}")
+        failures.append("panel")
              
     conn.close()
+    if failures:
+        print(f"❌ batch_daily finished with failures: {', '.join(failures)}")
+        sys.exit(1)
 
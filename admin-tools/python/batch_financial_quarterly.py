@@ -1,10 +1,20 @@
-import OpenDartReader
 import sqlite3
 import os
 import logging
+import re
 import time
-from datetime import datetime
+import random
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from data_sources.recorder import dart_source
+from data_sources.dart_api import DartApiError, STATUS_LIMIT
+from data_sources.rate_limit import TokenBucket, DailyQuota, RequestScheduler, QuotaExhausted
+from db_init import init_db
+from dart_corp_codes import load_corp_map
+from dart_accounts import normalize_statements
+from financials import period_key, published_date, upsert_financials, refresh_ttm
 
 # Config
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -22,239 +32,338 @@ load_dotenv(env_path)
 
 DART_API_KEY = os.getenv("DART_API_KEY")
 
+BULK_BATCH_SIZE = 100 # fnlttMultiAcnt accepts up to 100 corp codes per request
+MAX_CONSECUTIVE_FAILURES = 10
+
+# Request scheduling (see data_sources/rate_limit.py)
+DART_RATE_PER_SEC = float(os.getenv("DART_RATE_PER_SEC", "15")) # documented per-second ceiling
+DART_DAILY_QUOTA = int(os.getenv("DART_DAILY_QUOTA", "10000")) # per API key, shared across runs
+DART_WORKERS = int(os.getenv("DART_WORKERS", "4"))
+
+# Report Codes:
+# 1Q: 11013, 2Q: 11012, 3Q: 11014, 4Q: 11011
+REPORT_CODES = {1: '11013', 2: '11012', 3: '11014', 4: '11011'}
+
+# Incremental (disclosure-driven) mode
+WATERMARK_KEY = "dart_incremental_watermark"
+INCREMENTAL_LOOKBACK_DAYS = 7 # first run without a watermark
+LIST_WINDOW_DAYS = 90 # company-less list.json searches may span at most 3 months
+MAX_REFRESH_ATTEMPTS = 5 # per company/period, for filings whose statements are not out yet
+_PERIODIC_REPORT = re.compile(r"(사업보고서|반기보고서|분기보고서)\s*\((\d{4})\.(\d{2})\)")
+
 def get_db_connection():
     return sqlite3.connect(DB_PATH)
 
+def make_scheduler(db_path=DB_PATH):
+    """Bounded pool + token bucket + persistent daily quota for OpenDART."""
+    return RequestScheduler(
+        TokenBucket(DART_RATE_PER_SEC),
+        DailyQuota(db_path, "dart", DART_DAILY_QUOTA),
+        workers=DART_WORKERS,
+    )
+
+def _call_with_retry(fn, scheduler, attempts=3):
+    """Every attempt is a scheduled request (token + quota)."""
+    for attempt in range(attempts):
+        try:
+            return scheduler.call(fn)
+        except QuotaExhausted:
+            raise
+        except DartApiError as e:
+            if e.status == STATUS_LIMIT:
+                scheduler.stop()
+                raise QuotaExhausted(str(e))
+            if attempt == attempts - 1:
+                raise
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+        # Exponential backoff with jitter (server disconnects come in bursts)
+        time.sleep(2 ** (attempt + 1) + random.random())
+
+def _fetch_batch(dart, batch, year, reprt_code, scheduler):
+    """(frames, failed corp codes) for one batch; per-company fallback if the bulk call fails."""
+    try:
+        return [_call_with_retry(lambda: dart.finstate(','.join(batch), year, reprt_code), scheduler)], []
+    except QuotaExhausted:
+        return [], list(batch)
+    except Exception as e:
+        logger.warning(f"Batch of {len(batch)} failed ({e}); falling back to single-company calls")
+
+    frames, failed = [], []
+    for i, code in enumerate(batch):
+        try:
+            frames.append(_call_with_retry(lambda: dart.finstate(code, year, reprt_code), scheduler))
+        except QuotaExhausted:
+            return frames, failed + list(batch[i:])
+        except Exception as e:
+            logger.warning(f"Error {code}: {e}")
+            failed.append(code)
+            if not frames and len(failed) > MAX_CONSECUTIVE_FAILURES:
+                logger.error("🛑 Too many consecutive DART API failures. Suspecting server maintenance. Stopping.")
+                scheduler.stop()
+                return frames, failed + list(batch[i + 1:])
+    return frames, failed
+
+def fetch_statements_bulk(dart, corp_codes, year, reprt_code, batch_size=BULK_BATCH_SIZE, scheduler=None):
+    """
+    Major accounts for many companies in as few requests as possible.
+    corp codes (in priority order) are sent batch_size at a time (fnlttMultiAcnt)
+    on the scheduler's worker pool; a batch that still fails after retries is
+    re-fetched one company at a time. Once the daily quota is used up the
+    remaining batches are reported as failed and picked up by a later run.
+    Returns (concatenated statements DataFrame, [corp codes that failed]).
+    """
+    if scheduler is None:
+        scheduler = RequestScheduler(TokenBucket(DART_RATE_PER_SEC), workers=DART_WORKERS)
+    batches = [corp_codes[i:i + batch_size] for i in range(0, len(corp_codes), batch_size)]
+
+    started = time.time()
+    results = scheduler.map(lambda batch: _fetch_batch(dart, batch, year, reprt_code, scheduler), batches)
+    frames = [f for batch_frames, _ in results for f in batch_frames if f is not None and not f.empty]
+    failed = [code for _, batch_failed in results for code in batch_failed]
+
+    if scheduler.stopped:
+        logger.error(f"🛑 DART requests stopped (quota/limit); {len(failed)} companies deferred to the next run.")
+    logger.info(f"📡 DART: {len(corp_codes) - len(failed)}/{len(corp_codes)} companies in {time.time() - started:.1f}s")
+    return (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()), failed
+
+def held_tickers():
+    """Watchlist + portfolio tickers from Supabase, or an empty set when unavailable."""
+    url, key = os.getenv("NEXT_PUBLIC_SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        return set()
+    try:
+        from supabase import create_client
+        client = create_client(url, key)
+        held = set()
+        for table in ("watchlists", "portfolios"):
+            res = client.table(table).select("ticker").execute()
+            held.update(str(r["ticker"]).split('.')[0] for r in (res.data or []))
+        return held
+    except Exception as e:
+        logger.warning(f"Could not load watchlist/portfolio tickers: {e}")
+        return set()
+
+def prioritize(conn, stock_codes, held=None):
+    """Held (watchlist/portfolio) tickers first, then by latest market cap, largest first."""
+    held = held if held is not None else held_tickers()
+    mcap = dict(conn.execute("""
+        SELECT code, market_cap FROM daily_price
+        WHERE date = (SELECT MAX(date) FROM daily_price)
+    """).fetchall())
+    return sorted(stock_codes, key=lambda c: (c not in held, -(mcap.get(c) or 0), c))
+
+def parse_statements(df, year, quarter, corp_to_stock=None):
+    """
+    Financials rows (see financials.upsert_financials) for every company in the
+    concatenated statements; account matching is done by dart_accounts.
+    """
+    out = normalize_statements(df, corp_to_stock)
+    out = out[out['revenue'] != 0]
+    if out.empty:
+        return []
+    out = out.assign(
+        operating_margin=out['op_income'] / out['revenue'] * 100,
+        roe=np.where(out['equity'] != 0, out['net_income'] / out['equity'].where(out['equity'] != 0, 1) * 100, 0.0),
+    )
+
+    period = period_key(year, quarter)
+    return [
+        {
+            "code": code,
+            "period": period,
+            "published_at": published_date(r.rcept_no, year, quarter),
+            "fs_div": r.fs_div,
+            "revenue": float(r.revenue),
+            "op_income": float(r.op_income),
+            "net_income": float(r.net_income),
+            "equity": float(r.equity),
+            "operating_margin": float(r.operating_margin),
+            "roe": float(r.roe),
+        }
+        for code, r in out.iterrows()
+    ]
+
 def fetch_and_update_financials(year, quarter, corp_code=None):
     """
     Fetch financial statements for a specific year/quarter.
     Calculate Operating Margin.
-    Update 'daily_price' for the relevant period.
+    Store one point-in-time row per company in 'financials'.
     """
     if not DART_API_KEY:
         logger.error("❌ DART_API_KEY is missing.")
         return
 
-    dart = OpenDartReader(DART_API_KEY)
+    dart = dart_source(DART_API_KEY)
     
+    init_db() # Ensures the `financials` table exists on older DBs
     conn = get_db_connection()
     cursor = conn.cursor()
     
     # 1. Target Corporations
     # OpenDart requires 'corp_code' (8 digits) not stock code (6 digits).
-    # We need a mapping. dart.corp_codes gives all.
-    logger.info("📥 Fetching DART Corp Codes...")
-    try:
-        xml_text = dart.corp_codes # Returns XML bytes usually, but the wrapper might handle it
-        # Actually OpenDartReader property `corp_codes` returns a DataFrame if pandas is installed
-        # Columns: 'corp_code', 'corp_name', 'stock_code', 'modify_date'
-        
-        # Optimization: Map stock_code -> corp_code
-        # Filter only listed companies (with stock_code)
-        # Note: stock_code is in the DF.
-        pass
-    except Exception as e:
-        logger.error(f"Failed to get corp codes: {e}")
-        return
-
-    # To avoid fetching huge list every time, assume we have it or do it once.
-    # OpenDartReader caches it?
-    # Let's get the list of active tickers from our DB to filter
+    # The mapping is cached locally (dart_corp_codes.py) and only re-downloaded when stale.
     cursor.execute("SELECT code FROM tickers WHERE is_active=1")
-    active_stocks = {row[0] for row in cursor.fetchall()}
-    
-    # Get Corp Codes DF
-    # Note: `dart.corp_codes` is slow (downloads big zip).
-    # We should cache this mapping in DB if possible, but for now let's query.
-    # Warning: Calling this frequently is bad.
-    
-    # Use `dart.list(corp_code)`? No, `finstate` takes corp_code.
-    # `dart.finstate_all(corp_code, year, reprt_code)`
-    # `dart.finstate` can take multiple codes? No.
-    # But `dart.finstate_all` is for "Whole Corporation"? No, "Single Corp".
-    
-    # Is there a "Bulk Fetch" for all Kospi/Kosdaq?
-    # `dart.finstate` allows fetching for a specific company.
-    # Fetching 2000 companies one by one is SLOW due to API limits.
-    # DART API Limit: 10,000 calls / day. 2000 stocks * 4 quarters = 8000. Tight.
-    # We should only fetch "Latest Quarter" or "Missing Data".
-    
-    # Strategy:
-    # 1. Fetch `corp_codes` (One API call approx, or cached).
-    # 2. Iterate list of stocks.
-    # 3. Call `finstate` (1 call per stock).
+    active_stocks = sorted(row[0] for row in cursor.fetchall())
     
-    # Wait, `finstate_all` is deprecated? `finstate` is standard.
-    # Report Codes:
-    # 1Q: 11013, 2Q: 11012, 3Q: 11014, 4Q: 11011
+    corp_map = load_corp_map(conn, dart, stock_codes=active_stocks)
+    if not corp_map:
+        logger.error("❌ No DART corp codes available (refresh failed and cache is empty).")
+        conn.close()
+        return
     
-    report_code_map = {1: '11013', 2: '11012', 3: '11014', 4: '11011'}
-    reprt_code = report_code_map.get(quarter)
+    # DART API Limit: 10,000 calls / day. Bulk requests cover 100 companies each,
+    # so a full quarter (~2,500 companies) costs ~25 calls.
+    reprt_code = REPORT_CODES.get(quarter)
     
     logger.info(f"🔄 Processing Financials for {year} Q{quarter} (Code: {reprt_code})...")
     
-    # Get mapping
-    # Note: access private attribute or property if needed
-    # user guide: df = dart.corp_codes
-    df_corp = dart.corp_codes
-    
-    print(f"DEBUG: df_corp size: {len(df_corp) if df_corp is not None else 'None'}")
-    if df_corp is not None and not df_corp.empty:
-        print(f"DEBUG: df_corp columns: {df_corp.columns.tolist()}")
-        print(f"DEBUG: df_corp sample: {df_corp.head(1).to_dict('records')}")
-        
-        # Check specific known ticker
-        samsung = df_corp[df_corp['stock_code'] == '005930']
-        print(f"DEBUG: Samsung Search (Exact): {len(samsung)}")
-        if not samsung.empty:
-            print(f"DEBUG: Samsung Row: {samsung.iloc[0].to_dict()}")
-        else:
-            # Try strip
-            samsung_strip = df_corp[df_corp['stock_code'].str.strip() == '005930']
-            print(f"DEBUG: Samsung Search (Stripped): {len(samsung_strip)}")
-            
-    # Filter where stock_code is not null and in our active list
-    # Ensure types match
-    target_corps = df_corp[df_corp['stock_code'].isin(active_stocks)]
-    
-    print(f"DEBUG: Active Stocks Count: {len(active_stocks)}")
-    print(f"DEBUG: First 5 active_stocks: {list(active_stocks)[:5]}")
-    print(f"DEBUG: Target Corps Count: {len(target_corps)}")
-    
-    total = len(target_corps)
-    success = 0
-    consecutive_api_failures = 0
+    # Priority order decides what gets fetched if the daily quota runs short
+    target_corps = [(s_code, corp_map[s_code]) for s_code in prioritize(conn, list(corp_map))]
+    scheduler = make_scheduler()
+    logger.info(f"🎯 Target Corps: {len(target_corps)} of {len(active_stocks)} active tickers "
+                f"(DART quota left today: {scheduler.quota.remaining()})")
     
-    for idx, row in target_corps.iterrows():
-        s_code = row['stock_code']
-        c_code = row['corp_code']
-        
-        try:
-            # Ensure code is string
-            c_code = str(c_code).strip()
-            
-            # Fetch Financial State with Retry Logic
-            df_fs = None
-            for attempt in range(3):
-                try:
-                    df_fs = dart.finstate(c_code, year, reprt_code)
-                    consecutive_api_failures = 0 # Reset on success
-                    break # Success
-                except Exception as api_err:
-                    if attempt == 2: 
-                        consecutive_api_failures += 1
-                        raise api_err # Propagate on last attempt
-                    # Exponential-ish backoff
-                    wait_time = (attempt + 1) * 2
-                    time.sleep(wait_time)
-
-            if consecutive_api_failures > 10:
-                logger.error("🛑 Too many consecutive DART API failures. Suspecting rate limit or server maintenance. Stopping.")
-                break
-
-            if df_fs is None or df_fs.empty:
-                continue
-            
-            # Filter for Consolidated (CFS) first
-            # Column 'fs_div' usually contains 'CFS' or 'OFS'
-            if 'fs_div' in df_fs.columns:
-                df_con = df_fs[df_fs['fs_div'] == 'CFS']
-                if df_con.empty:
-                    # Fallback to Separate (OFS)
-                    df_target = df_fs[df_fs['fs_div'] == 'OFS']
-                else:
-                    df_target = df_con
-            else:
-                # If no fs_div column, assume it's what we got
-                df_target = df_fs
-                
-            if df_target.empty:
-                continue
-
-            # Extract Revenue, Operating Income, Net Income, and Total Equity
-            # Account ID: 'account_nm' or 'account_id'
-            
-            rev = 0
-            op_inc = 0
-            net_inc = 0
-            equity = 0
-            
-            # Helper to find value by name
-            def get_amt(df, names):
-                # Filter rows where account_nm contains any of names
-                for nm in names:
-                    match = df[df['account_nm'].str.contains(nm, na=False)]
-                    if not match.empty:
-                        # Return the first match, replacing commas
-                        try:
-                            # 'thstrm_amount' (This Term), 'thstrm_add_amount' (Accumulated)
-                            # For Q3, strictly we want Q3 discrete? Or Accumulated?
-                            # Operating Margin is usually calculated on Accumulated or TTM for stability, 
-                            # or This Term for responsiveness.
-                            # 'thstrm_amount' is "Current Quarter" (3 months).
-                            val = match.iloc[0]['thstrm_amount']
-                            if val == '-': return 0.0
-                            return float(val.replace(',', ''))
-                        except:
-                            pass
-                return 0.0
-
-            rev = get_amt(df_target, ['매출액', '수익', '영업수익'])
-            op_inc = get_amt(df_target, ['영업이익'])
-            net_inc = get_amt(df_target, ['당기순이익'])
-            equity = get_amt(df_target, ['자본총계'])
-            
-            if rev == 0:
-                continue
-                
-            op_margin = (op_inc / rev) * 100
-            roe = (net_inc / equity * 100) if equity != 0 else 0
-            
-            # Map valid period
-            # Q1: apply to 04-01 ~ 05-15 (Approx publication) -> No, standard usage "Q1 data applies until Q2 comes"
-            # User Policy: "2024 Q2 -> Appears in reports, apply to 2024-04-01 ~ 2024-06-30"
-            # Wait, User said: "2024 Q2 Financials -> Apply to 2024-04-01 ~ 2024-06-30"?
-            # Quote: "해당 분기의 Operating Margin을 그 분기 전체 거래일에 동일하게 적용 ... 2024 Q2 재무 -> 2024-04-01 ~ 2024-06-30"
-            # This is "Filling the past". It's good for "Analysis of that period".
-            # For "Current Daily Scan", we use the "Latest Available".
-            # If we backfill, `daily_price` for that date range gets the value.
-            
-            # Determine Date Range for this Quarter
-            # Q1: 0101-0331, Q2: 0401-0630, Q3: 0701-0930, Q4: 1001-1231
-            q_starts = {1: f"{year}0101", 2: f"{year}0401", 3: f"{year}0701", 4: f"{year}1001"}
-            q_ends = {1: f"{year}0331", 2: f"{year}0630", 3: f"{year}0930", 4: f"{year}1231"}
-            
-            s_date = q_starts[quarter]
-            e_date = q_ends[quarter]
-            
-            # Batch Update SQLite
-            # Forward Fill Strategy: Apply this quarter's margin to all dates >= Quarter Start
-            # This ensures that even if we are in Q4 (Dec), the Q3 data (latest available) is applied.
-            # Future quarter runs will overwrite the later ranges correctly.
-            
-            cursor.execute("""
-                UPDATE daily_price
-                SET operating_margin = ?, roe = ?, revenue = ?, net_income = ?
-                WHERE code = ? AND date >= ?
-            """, (op_margin, roe, rev, net_inc, s_code, s_date))
-            
-            success += 1
-            if success % 10 == 0:
-                conn.commit()
-                print(f"   Updated {s_code} (OM: {op_margin:.2f}%, ROE: {roe:.2f}%) [Forward Fill from {s_date}]")
-            
-            # Be polite to the API (Limit: 15 per second, we go slower: ~5 per second)
-            time.sleep(0.2)
-                
-        except Exception as e:
-            logger.warning(f"Error {s_code}: {e}")
-            if "RemoteDisconnected" in str(e):
-                time.sleep(10) # Long cooling if server is rejecting us
-            continue
+    corp_codes = [c_code for _, c_code in target_corps]
+    df_all, failed = fetch_statements_bulk(dart, corp_codes, year, reprt_code, scheduler=scheduler)
+    rows = parse_statements(df_all, year, quarter, {c_code: s_code for s_code, c_code in target_corps})
 
+    upsert_financials(conn, rows)
+    n_ttm = refresh_ttm(conn, [r['code'] for r in rows])
     conn.commit()
     conn.close()
-    logger.info(f"✅ Finished Financial Sync for {year} Q{quarter}. Updated {success} tickers.")
+    for r in rows[:5]:
+        print(f"   Saved {r['code']} {r['period']} (OM: {r['operating_margin']:.2f}%, ROE: {r['roe']:.2f}%)")
+    if failed:
+        logger.warning(f"⚠️ {len(failed)} companies failed: {', '.join(failed[:20])}{' ...' if len(failed) > 20 else ''}")
+    logger.info(f"✅ Finished Financial Sync for {year} Q{quarter}. Saved {len(rows)} tickers ({n_ttm} TTM rows).")
+
+def parse_report_period(report_nm):
+    """'[기재정정]분기보고서 (2024.09)' -> (2024, 3); None for other filings."""
+    m = _PERIODIC_REPORT.search(str(report_nm))
+    if not m:
+        return None
+    kind, year, month = m.group(1), int(m.group(2)), int(m.group(3))
+    if kind == '사업보고서':
+        return year, 4
+    if kind == '반기보고서':
+        return year, 2
+    return year, (1 if month <= 6 else 3)
+
+def list_periodic_filings(dart, since, until, scheduler):
+    """
+    Periodic reports (kind 'A') received in [since, until], split into 3-month windows.
+    Every list.json page is its own scheduled request (token + quota).
+    """
+    frames = []
+    start = datetime.strptime(since, "%Y%m%d")
+    end = datetime.strptime(until, "%Y%m%d")
+    while start <= end:
+        window_end = min(start + timedelta(days=LIST_WINDOW_DAYS - 1), end)
+        bgn, fin = start.strftime("%Y%m%d"), window_end.strftime("%Y%m%d")
+        page, total_page = 1, 1
+        while page <= total_page:
+            df, total_page = _call_with_retry(lambda: dart.list_page(bgn, fin, kind='A', page_no=page), scheduler)
+            frames.append(df)
+            page += 1
+        start = window_end + timedelta(days=1)
+    frames = [f for f in frames if f is not None and not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def _save_refresh_status(conn, code, period, corp_code, rcept_no, status):
+    conn.execute("""
+        INSERT INTO financial_refresh_status (code, period, corp_code, rcept_no, status, attempts, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(code, period) DO UPDATE SET
+            corp_code = excluded.corp_code,
+            rcept_no = excluded.rcept_no,
+            status = excluded.status,
+            attempts = CASE WHEN excluded.status = 'ok' THEN 0 ELSE financial_refresh_status.attempts + 1 END,
+            updated_at = CURRENT_TIMESTAMP
+    """, (code, period, corp_code, rcept_no, status, 0 if status == 'ok' else 1))
+
+def refresh_incremental(conn, dart, active_stocks, since=None, until=None, scheduler=None, held=None):
+    """
+    Refresh only companies that filed a periodic report since the last run.
+    - watermark (user_config) = last `until` whose filing list was read completely
+    - financial_refresh_status tracks each (code, period): ok / pending / failed.
+      'ok' rows are skipped unless a newer filing (e.g. a correction) shows up;
+      pending (statements not published yet) and failed rows are retried on later
+      runs, up to MAX_REFRESH_ATTEMPTS.
+    Returns the number of financials rows written.
+    """
+    until = until or datetime.now().strftime("%Y%m%d")
+    scheduler = scheduler or make_scheduler()
+    if not since:
+        row = conn.execute("SELECT value FROM user_config WHERE key = ?", (WATERMARK_KEY,)).fetchone()
+        since = row[0] if row else (datetime.now() - timedelta(days=INCREMENTAL_LOOKBACK_DAYS)).strftime("%Y%m%d")
+    logger.info(f"🔎 Periodic filings {since} ~ {until}...")
+
+    filings = list_periodic_filings(dart, since, until, scheduler)
+    active = set(active_stocks)
+    targets = {} # (year, quarter) -> {stock_code: (corp_code, rcept_no)}
+    for r in filings.to_dict('records') if not filings.empty else []:
+        stock = str(r.get('stock_code') or '').strip()
+        period = parse_report_period(r.get('report_nm'))
+        if stock in active and period:
+            current = targets.setdefault(period, {}).get(stock)
+            if current is None or str(r.get('rcept_no')) > str(current[1]):
+                targets[period][stock] = (r.get('corp_code'), r.get('rcept_no'))
+
+    done = {}
+    for code, period, corp_code, rcept_no, status, attempts in conn.execute(
+            "SELECT code, period, corp_code, rcept_no, status, attempts FROM financial_refresh_status"):
+        done[(code, period)] = (rcept_no, status)
+        if status != 'ok' and attempts < MAX_REFRESH_ATTEMPTS:
+            y, q = period.split('Q')
+            targets.setdefault((int(y), int(q)), {}).setdefault(code, (corp_code, rcept_no))
+
+    if targets and held is None:
+        held = held_tickers()
+    saved_total = 0
+    for (year, quarter), corps in sorted(targets.items()):
+        period = period_key(year, quarter)
+        todo = {s: v for s, v in corps.items() if done.get((s, period)) != (v[1], 'ok')}
+        if not todo:
+            continue
+        ordered = prioritize(conn, list(todo), held)
+        corp_to_stock = {todo[s_code][0]: s_code for s_code in ordered}
+        df_all, failed = fetch_statements_bulk(dart, list(corp_to_stock), year, REPORT_CODES[quarter],
+                                               scheduler=scheduler)
+        rows = parse_statements(df_all, year, quarter, corp_to_stock)
+        upsert_financials(conn, rows)
+        refresh_ttm(conn, [r['code'] for r in rows])
+
+        saved = {r['code'] for r in rows}
+        failed_stocks = {corp_to_stock[c] for c in failed}
+        for s_code, (c_code, rcept_no) in todo.items():
+            status = 'ok' if s_code in saved else 'failed' if s_code in failed_stocks else 'pending'
+            _save_refresh_status(conn, s_code, period, c_code, rcept_no, status)
+        conn.commit()
+        saved_total += len(rows)
+        logger.info(f"   {period}: {len(todo)} filed, {len(rows)} saved, {len(failed_stocks)} failed")
+
+    # Deferred companies keep a 'failed' status and are retried, so the watermark can move on
+    conn.execute("INSERT OR REPLACE INTO user_config (key, value) VALUES (?, ?)", (WATERMARK_KEY, until))
+    conn.commit()
+    return saved_total
+
+def fetch_incremental_financials(since=None):
+    """Disclosure-driven refresh, cheap enough to run daily during earnings season."""
+    if not DART_API_KEY:
+        logger.error("❌ DART_API_KEY is missing.")
+        return
+
+    dart = dart_source(DART_API_KEY)
+    init_db()
+    conn = get_db_connection()
+    try:
+        active_stocks = [row[0] for row in conn.execute("SELECT code FROM tickers WHERE is_active=1")]
+        saved = refresh_incremental(conn, dart, active_stocks, since=since)
+        logger.info(f"✅ Incremental Financial Sync finished. Saved {saved} rows.")
+    finally:
+        conn.close()
 
 def get_default_quarter():
     """
@@ -280,10 +389,25 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--year", type=int, help="Year")
     parser.add_argument("--quarter", type=int, help="Quarter (1-4)")
+    parser.add_argument("--incremental", action="store_true", help="Only companies that filed since the last run")
+    parser.add_argument("--since", type=str, help="Incremental: override watermark (YYYYMMDD)")
+    parser.add_argument("--rebuild-ttm", action="store_true", help="Recompute financials_ttm from stored quarters only")
     args = parser.parse_args()
     
-    def_q, def_y = get_default_quarter()
-    target_year = args.year if args.year else def_y
-    target_quarter = args.quarter if args.quarter else def_q
-    
-    fetch_and_update_financials(target_year, target_quarter)
+    if args.rebuild_ttm:
+        init_db()
+        conn = get_db_connection()
+        try:
+            n = refresh_ttm(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"✅ financials_ttm rebuilt: {n} rows (no DART calls).")
+    elif args.incremental:
+        fetch_incremental_financials(args.since)
+    else:
+        def_q, def_y = get_default_quarter()
+        target_year = args.year if args.year else def_y
+        target_quarter = args.quarter if args.quarter else def_q
+        
+        fetch_and_update_financials(target_year, target_quarter)
@@ -0,0 +1,208 @@
+import sqlite3
+import os
+import sys
+from collections import namedtuple
+from datetime import datetime
+from migrate_db_compact import is_compact
+
+# Change-data capture for daily_price / daily_supply.
+# Optional triggers append (tbl, code, date, op) to `changelog` for every row written:
+# INSERT (including INSERT OR REPLACE, which SQLite runs as delete + insert) logs 'I',
+# UPDATE logs 'U'. seq is AUTOINCREMENT, so it only grows and is never reused after
+# compaction; a consumer's checkpoint stays valid.
+# The triggers sit on the physical tables: daily_price itself, or daily_price_compact
+# once migrate_db_compact.py has turned daily_price into a view (it moves them).
+#
+# Consumers keep a checkpoint (last seq processed) in changelog_checkpoints:
+#   register(conn, "supabase:daily_price")      # starts at the current end of the log
+#   end = last_seq(conn)
+#   for change in read_changes(conn, "supabase:daily_price", ("daily_price",), until=end): ...
+#   advance(conn, "supabase:daily_price", end)
+#   compact(conn)                                # drop what every consumer has passed
+#
+#   python changelog.py --enable      # install the triggers (run db_init.py first)
+#   python changelog.py               # log size and consumer lag
+#   python changelog.py --compact
+#   python changelog.py --disable
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '../../dailyport.db')
+CAPTURED_TABLES = ("daily_price", "daily_supply")
+READ_PAGE = 5000
+
+Change = namedtuple("Change", "seq table code date op")
+
+
+def _trigger(table, event):
+    return f"changelog_{table}_{event}"
+
+
+def _physical(conn, table):
+    return f"{table}_compact" if is_compact(conn) else table
+
+
+def enabled_tables(conn):
+    """Captured tables whose insert trigger is installed."""
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    return [t for t in CAPTURED_TABLES if _trigger(t, "insert") in names]
+
+
+def is_enabled(conn, table):
+    return table in enabled_tables(conn)
+
+
+def enable(conn, tables=CAPTURED_TABLES):
+    """
+    Installs the capture triggers for the current layout. Does not commit, so
+    migrate_db_compact can move them inside its swap transaction.
+    """
+    if not tables:
+        return
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'changelog'").fetchone():
+        raise RuntimeError("changelog table missing; run db_init.py first")
+    compact = is_compact(conn)
+    for table in tables:
+        physical = _physical(conn, table)
+        for event, op in (("insert", "I"), ("update", "U")):
+            if compact:
+                body = f"""
+                    INSERT INTO changelog (tbl, code, date, op)
+                    SELECT '{table}', code, NEW.day, '{op}' FROM ticker_ids WHERE id = NEW.code_id;"""
+            else:
+                body = f"""
+                    INSERT INTO changelog (tbl, code, date, op)
+                    VALUES ('{table}', NEW.code, CAST(replace(NEW.date, '-', '') AS INTEGER), '{op}');"""
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {_trigger(table, event)}
+                AFTER {event.upper()} ON {physical}
+                BEGIN{body}
+                END
+            """)
+
+
+def disable(conn, tables=CAPTURED_TABLES):
+    """Drops the capture triggers (the log and checkpoints stay)."""
+    for table in tables:
+        for event in ("insert", "update"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {_trigger(table, event)}")
+
+
+def last_seq(conn):
+    """Highest seq ever assigned (still known when compaction emptied the log)."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changelog'").fetchone()
+    return row[0] if row else 0
+
+
+def checkpoint(conn, consumer):
+    """Last seq the consumer has processed, None when it is not registered."""
+    row = conn.execute("SELECT seq FROM changelog_checkpoints WHERE consumer = ?", (consumer,)).fetchone()
+    return row[0] if row else None
+
+
+def advance(conn, consumer, seq):
+    conn.execute("""
+        INSERT OR REPLACE INTO changelog_checkpoints (consumer, seq, updated_at)
+        VALUES (?, ?, ?)
+    """, (consumer, seq, datetime.now().isoformat(timespec="seconds")))
+    conn.commit()
+
+
+def register(conn, consumer, from_start=False):
+    """Registers a consumer at the end of the log (or before its first entry)."""
+    if checkpoint(conn, consumer) is None:
+        advance(conn, consumer, 0 if from_start else last_seq(conn))
+    return checkpoint(conn, consumer)
+
+
+def unregister(conn, consumer):
+    conn.execute("DELETE FROM changelog_checkpoints WHERE consumer = ?", (consumer,))
+    conn.commit()
+
+
+def read_changes(conn, consumer, tables=CAPTURED_TABLES, after=None, until=None, page=READ_PAGE):
+    """
+    Yields Change rows with after < seq <= until in seq order, `page` rows per query.
+    after defaults to the consumer's checkpoint; until to the end of the log.
+    """
+    if after is None:
+        after = checkpoint(conn, consumer)
+        if after is None:
+            raise ValueError(f"Unknown changelog consumer: {consumer}")
+    if until is None:
+        until = last_seq(conn)
+    placeholders = ','.join('?' * len(tables))
+    while after < until:
+        rows = conn.execute(f"""
+            SELECT seq, tbl, code, date, op FROM changelog
+            WHERE seq > ? AND seq <= ? AND tbl IN ({placeholders})
+            ORDER BY seq LIMIT ?
+        """, (after, until, *tables, page)).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield Change(*row)
+        after = rows[-1][0]
+
+
+def compact(conn):
+    """
+    Deletes entries every registered consumer has processed, then keeps only the
+    newest entry per (tbl, code, date) among the rest: a consumer behind the older
+    one still sees the newer one. Without consumers nothing is consumed, so nothing
+    is deleted. Returns the number of entries removed.
+    """
+    floor = conn.execute("SELECT MIN(seq) FROM changelog_checkpoints").fetchone()[0]
+    if floor is None:
+        return 0
+    before = conn.total_changes
+    conn.execute("DELETE FROM changelog WHERE seq <= ?", (floor,))
+    conn.execute("""
+        DELETE FROM changelog
+        WHERE seq NOT IN (SELECT MAX(seq) FROM changelog GROUP BY tbl, code, date)
+    """)
+    conn.commit()
+    return conn.total_changes - before
+
+
+def status(conn):
+    end = last_seq(conn)
+    return {
+        "enabled": enabled_tables(conn),
+        "entries": conn.execute("SELECT COUNT(*) FROM changelog").fetchone()[0],
+        "last_seq": end,
+        "consumers": {consumer: end - seq for consumer, seq in
+                      conn.execute("SELECT consumer, seq FROM changelog_checkpoints ORDER BY consumer")},
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--enable", action="store_true", help="Install the capture triggers")
+    group.add_argument("--disable", action="store_true", help="Drop the capture triggers")
+    group.add_argument("--compact", action="store_true", help="Drop entries all consumers have processed")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if args.enable:
+            try:
+                enable(conn)
+            except RuntimeError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            conn.commit()
+            print(f"✅ Change capture enabled on {', '.join(CAPTURED_TABLES)}")
+        elif args.disable:
+            disable(conn)
+            conn.commit()
+            print("✅ Change capture disabled (log and checkpoints kept)")
+        elif args.compact:
+            print(f"🧹 Removed {compact(conn)} changelog entries")
+        info = status(conn)
+        print(f"📋 changelog: {info['entries']} entries, last seq {info['last_seq']}, "
+              f"capturing {', '.join(info['enabled']) or 'nothing'}")
+        for consumer, lag in info["consumers"].items():
+            print(f"   {consumer}: {lag} behind")
+    finally:
+        conn.close()
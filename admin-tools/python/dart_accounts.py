@@ -0,0 +1,130 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Account normalization for OpenDART statements.
+# Maps account_id / account_nm to canonical fields through a lookup table built
+# once at import, then selects CFS/OFS and parses amounts for all companies in a
+# single vectorized pass over the concatenated statements.
+#
+# Lower rank wins when several rows of one company map to the same field
+# (an IFRS account_id beats an exact name, which beats a substring match).
+
+FIELDS = ["revenue", "op_income", "net_income", "equity"]
+
+ACCOUNT_IDS = {
+    "ifrs-full_Revenue": ("revenue", 0),
+    "ifrs_Revenue": ("revenue", 0),
+    "dart_OperatingIncomeLoss": ("op_income", 0),
+    "ifrs-full_ProfitLoss": ("net_income", 0),
+    "ifrs_ProfitLoss": ("net_income", 0),
+    "ifrs-full_Equity": ("equity", 0),
+    "ifrs_Equity": ("equity", 0),
+}
+
+# Exact names (whitespace removed)
+ACCOUNT_NAMES = {
+    "매출액": ("revenue", 1),
+    "수익(매출액)": ("revenue", 2),
+    "영업수익": ("revenue", 3),
+    "영업이익": ("op_income", 1),
+    "영업이익(손실)": ("op_income", 2),
+    "당기순이익": ("net_income", 1),
+    "당기순이익(손실)": ("net_income", 2),
+    "자본총계": ("equity", 1),
+}
+
+# Non-operating income lines; never a revenue fallback even though they end in 수익
+NON_REVENUE_INCOME = ["이자수익", "금융수익", "기타수익", "영업외수익"]
+
+# Substring fallbacks for names not in the table, in priority order
+# (first match wins, so the specific 영업수익 comes before the generic 수익)
+ACCOUNT_PATTERNS = [
+    (re.compile("매출액"), "revenue", 10),
+    (re.compile("영업수익"), "revenue", 11),
+    (re.compile("".join(f"(?<!{p[:-len('수익')]})" for p in NON_REVENUE_INCOME) + "수익"), "revenue", 12),
+    (re.compile("영업이익"), "op_income", 10),
+    (re.compile("당기순이익"), "net_income", 10),
+    (re.compile("자본총계"), "equity", 10),
+]
+
+_name_cache = {}
+
+
+def _resolve_name(name):
+    """(field, rank) for one normalized account name, or (None, None)."""
+    if name not in _name_cache:
+        hit = ACCOUNT_NAMES.get(name)
+        if hit is None:
+            hit = next(((field, rank) for pattern, field, rank in ACCOUNT_PATTERNS if pattern.search(name)), (None, None))
+        _name_cache[name] = hit
+    return _name_cache[name]
+
+
+def _statement_codes(df, corp_to_stock=None):
+    """6-digit stock code per row (stock_code column, else mapped corp_code)."""
+    if 'stock_code' in df.columns:
+        code = df['stock_code'].fillna('').astype(str).str.strip()
+    else:
+        code = pd.Series('', index=df.index)
+    if corp_to_stock and 'corp_code' in df.columns:
+        code = code.where(code != '', df['corp_code'].map(corp_to_stock))
+    return code
+
+
+def select_fs_div(df):
+    """Keep consolidated (CFS) rows for companies that report them, separate (OFS) otherwise."""
+    if 'fs_div' not in df.columns:
+        return df
+    cfs_codes = df.loc[df['fs_div'] == 'CFS', 'code'].unique()
+    return df[np.where(df['code'].isin(cfs_codes), df['fs_div'] == 'CFS', df['fs_div'] == 'OFS')]
+
+
+def parse_amounts(values):
+    """'1,234' -> 1234.0, '-' -> 0.0, unparseable -> NaN."""
+    text = values.astype(str).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(text.replace('-', '0'), errors='coerce')
+
+
+def normalize_statements(df, corp_to_stock=None):
+    """
+    Tidy table indexed by stock code: revenue, op_income, net_income, equity
+    (0.0 when missing) plus fs_div and rcept_no of the selected statement.
+    """
+    columns = FIELDS + ["fs_div", "rcept_no"]
+    if df.empty or 'account_nm' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    df = df.assign(code=_statement_codes(df, corp_to_stock))
+    df = df[df['code'].notna() & (df['code'] != '')]
+    df = select_fs_div(df)
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    names = df['account_nm'].fillna('').astype(str).str.replace(r'\s+', '', regex=True)
+    resolved = {name: _resolve_name(name) for name in names.unique()}
+    field = names.map(lambda n: resolved[n][0]).to_numpy(dtype=object)
+    rank = names.map(lambda n: resolved[n][1]).to_numpy(dtype=float)
+    if 'account_id' in df.columns:
+        ids = df['account_id'].map(lambda a: ACCOUNT_IDS.get(a, (None, np.nan)))
+        has_id = ids.str[0].notna().to_numpy()
+        field = np.where(has_id, ids.str[0].to_numpy(dtype=object), field)
+        rank = np.where(has_id, ids.str[1].to_numpy(dtype=float), rank)
+
+    tidy = pd.DataFrame({
+        "code": df['code'],
+        "field": field,
+        "rank": rank,
+        "order": np.arange(len(df)),
+        "amount": parse_amounts(df['thstrm_amount']),
+    }).dropna(subset=["field", "amount"])
+    # Best-ranked, then first-listed row per (company, field)
+    best = tidy.sort_values(["code", "field", "rank", "order"]).drop_duplicates(["code", "field"])
+    out = best.pivot(index="code", columns="field", values="amount").reindex(columns=FIELDS)
+
+    grouped = df.groupby('code', sort=True)
+    out = out.reindex(grouped.size().index).fillna(0.0)
+    out["fs_div"] = grouped['fs_div'].first() if 'fs_div' in df.columns else None
+    out["rcept_no"] = grouped['rcept_no'].first() if 'rcept_no' in df.columns else None
+    out.columns.name = None
+    return out[columns]
@@ -0,0 +1,120 @@
+import sqlite3
+import os
+import logging
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from data_sources.recorder import dart_source
+
+# Local cache of DART's stock_code -> corp_code mapping.
+# The upstream corpCode.zip is ~100k companies and takes seconds to download and
+# parse; the listed subset lives in `dart_corp_codes` and loads in milliseconds.
+# Refresh policy:
+#   - table empty, or last refresh older than MAX_AGE_DAYS
+#   - an active ticker has no mapping (new listing) and we have not refreshed today
+# On refresh only rows whose modify_date changed are rewritten, and companies no longer
+# listed (delisted, or a stock code handed to a new corp after a merger) are removed.
+# Should two corp codes still claim one stock code, the latest modify_date wins.
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '../../dailyport.db')
+
+env_path = os.path.join(os.path.dirname(__file__), '.env')
+if not os.path.exists(env_path):
+    env_path = os.path.join(os.path.dirname(__file__), '../.env.local')
+if not os.path.exists(env_path):
+    env_path = os.path.join(os.path.dirname(__file__), '../../.env.local')
+load_dotenv(env_path)
+
+DART_API_KEY = os.getenv("DART_API_KEY")
+
+MAX_AGE_DAYS = 7
+REFRESHED_KEY = "dart_corp_codes_refreshed_at"
+
+
+def _last_refresh(conn):
+    row = conn.execute("SELECT value FROM user_config WHERE key = ?", (REFRESHED_KEY,)).fetchone()
+    return datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S") if row else None
+
+
+def needs_refresh(conn, stock_codes=None, now=None):
+    now = now or datetime.now()
+    last = _last_refresh(conn)
+    if last is None or now - last > timedelta(days=MAX_AGE_DAYS):
+        return True
+    if stock_codes and last.date() < now.date():
+        known = {r[0] for r in conn.execute("SELECT stock_code FROM dart_corp_codes")}
+        return any(code not in known for code in stock_codes)
+    return False
+
+
+def refresh_corp_codes(conn, dart, now=None):
+    """
+    Download the corp code list, upsert listed companies whose modify_date changed
+    and delete the ones no longer listed. Returns the number of rows written.
+    """
+    now = now or datetime.now()
+    df = dart.corp_codes()
+    df = df[df['stock_code'].fillna('').str.strip() != ''].copy()
+    df['stock_code'] = df['stock_code'].str.strip()
+    df['corp_code'] = df['corp_code'].str.strip()
+
+    current = dict(conn.execute("SELECT corp_code, modify_date FROM dart_corp_codes").fetchall())
+    changed = [
+        (r.corp_code, r.corp_name, r.stock_code, r.modify_date)
+        for r in df.itertuples(index=False)
+        if current.get(r.corp_code) != r.modify_date
+    ]
+    if df.empty:
+        # A truncated download must not wipe the cached mapping
+        raise ValueError("DART corp code list has no listed companies")
+    gone = [(code,) for code in current if code not in set(df['corp_code'])]
+    conn.executemany("DELETE FROM dart_corp_codes WHERE corp_code = ?", gone)
+    conn.executemany("""
+        INSERT OR REPLACE INTO dart_corp_codes (corp_code, corp_name, stock_code, modify_date, updated_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+    """, changed)
+    conn.execute("INSERT OR REPLACE INTO user_config (key, value) VALUES (?, ?)",
+                 (REFRESHED_KEY, now.strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+    logger.info(f"📇 DART corp codes refreshed: {len(df)} listed, {len(changed)} new/changed, {len(gone)} removed")
+    return len(changed)
+
+
+def load_corp_map(conn, dart=None, stock_codes=None, force=False):
+    """
+    {stock_code: corp_code}, refreshed from DART only when the policy says so.
+    stock_codes: tickers the caller needs (limits the result, triggers refresh on misses).
+    """
+    if force or needs_refresh(conn, stock_codes):
+        if dart is None:
+            dart = dart_source(DART_API_KEY)
+        try:
+            refresh_corp_codes(conn, dart)
+        except Exception as e:
+            # A stale mapping is still usable; only an empty one is fatal for callers
+            logger.warning(f"DART corp code refresh failed, using cached mapping: {e}")
+
+    # Later rows win: the most recently modified corp code for each stock code
+    rows = conn.execute("SELECT stock_code, corp_code FROM dart_corp_codes ORDER BY modify_date, corp_code").fetchall()
+    mapping = {stock: corp for stock, corp in rows}
+    if stock_codes is not None:
+        mapping = {code: mapping[code] for code in stock_codes if code in mapping}
+    return mapping
+
+
+if __name__ == "__main__":
+    import argparse
+    from db_init import init_db
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--force", action="store_true", help="Refresh from DART regardless of age")
+    args = parser.parse_args()
+
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        mapping = load_corp_map(conn, force=args.force)
+        print(f"✅ {len(mapping)} stock codes mapped to DART corp codes.")
+    finally:
+        conn.close()
@@ -0,0 +1,109 @@
+"""
+Thin OpenDART client.
+
+OpenDartReader downloads and parses the full corpCode.zip in its constructor
+(once per process/day), even when the caller already knows the 8-digit corp
+codes. This client talks to the same JSON endpoints directly, takes corp codes
+only, and leaves the stock_code -> corp_code mapping to dart_corp_codes.py.
+
+Method names mirror OpenDartReader (`finstate`, `corp_codes`, `list`) so the record/
+replay proxy and existing call sites keep working.
+"""
+import io
+import zipfile
+import xml.etree.ElementTree as ET
+import requests
+import pandas as pd
+
+BASE_URL = "https://opendart.fss.or.kr/api/"
+
+STATUS_OK = "000"
+STATUS_NO_DATA = "013"
+STATUS_LIMIT = "020" # daily request limit exceeded
+
+
+class DartApiError(Exception):
+    """Non-OK status from OpenDART (e.g. 020 = request limit exceeded)."""
+
+    def __init__(self, status, message):
+        # args stay (status, message) so recorded fixtures unpickle cleanly
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+    def __str__(self):
+        return f"[{self.status}] {self.message}"
+
+
+class DartApi:
+    def __init__(self, api_key, timeout=30):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _get(self, endpoint, params):
+        params = dict(params, crtfc_key=self.api_key)
+        res = self.session.get(BASE_URL + endpoint, params=params, timeout=self.timeout)
+        res.raise_for_status()
+        return res
+
+    def _get_json(self, endpoint, params):
+        jo = self._get(endpoint, params).json()
+        status = jo.get("status", STATUS_OK)
+        if status == STATUS_NO_DATA:
+            return {"list": []}
+        if status != STATUS_OK:
+            raise DartApiError(status, jo.get("message", ""))
+        return jo
+
+    def corp_codes(self):
+        """Full corp code list (corp_code, corp_name, stock_code, modify_date)."""
+        content = self._get("corpCode.xml", {}).content
+        try:
+            zf = zipfile.ZipFile(io.BytesIO(content))
+        except zipfile.BadZipFile:
+            # Errors come back as a small XML document instead of the zip
+            tree = ET.XML(content)
+            raise DartApiError(tree.findtext("status"), tree.findtext("message"))
+        tree = ET.XML(zf.read("CORPCODE.xml"))
+        records = [{child.tag: (child.text or '').strip() for child in item} for item in tree.iter("list")]
+        return pd.DataFrame(records, columns=["corp_code", "corp_name", "stock_code", "modify_date"])
+
+    def finstate(self, corp_code, bsns_year, reprt_code='11011'):
+        """Major accounts for one corp code (or several, comma-joined)."""
+        endpoint = "fnlttMultiAcnt.json" if ',' in str(corp_code) else "fnlttSinglAcnt.json"
+        jo = self._get_json(endpoint, {
+            "corp_code": corp_code,
+            "bsns_year": str(bsns_year),
+            "reprt_code": reprt_code,
+        })
+        return pd.DataFrame(jo.get("list", []))
+
+    def list_page(self, start, end, kind='A', final=True, page_no=1, page_count=100):
+        """
+        One page of filings received between start and end (YYYYMMDD), all companies.
+        Returns (DataFrame, total_page). One call = one request, so callers can
+        schedule / count each page.
+        """
+        jo = self._get_json("list.json", {
+            "bgn_de": start,
+            "end_de": end,
+            "pblntf_ty": kind,
+            "last_reprt_at": "Y" if final else "N",
+            "page_no": page_no,
+            "page_count": page_count,
+        })
+        return pd.DataFrame(jo.get("list", [])), int(jo.get("total_page", 1) or 1)
+
+    def list(self, start, end, kind='A', final=True, page_count=100):
+        """
+        Filings received between start and end (YYYYMMDD), all companies, every page.
+        kind 'A' = periodic reports. OpenDART limits company-less searches to 3 months.
+        """
+        frames, page, total_page = [], 1, 1
+        while page <= total_page:
+            df, total_page = self.list_page(start, end, kind, final, page, page_count)
+            frames.append(df)
+            page += 1
+        frames = [f for f in frames if not f.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -0,0 +1,144 @@
+"""
+Read-through pykrx provider backed by the local SQLite DB (daily_price / daily_supply,
+filled by batch_daily.py).
+
+- get_market_ohlcv(start, end, code) and get_market_trading_value_by_date(start, end, code)
+  keep pykrx's signatures and column names, so the provider drops in for `stock`
+- a weekday counts as covered when the ticker has a row for it, or when it is an
+  earlier day the DB has no market-wide rows for (a holiday the batch skipped);
+  only the uncovered days go to pykrx, in one range call
+- read-only: fetched rows are not written back. KRX's per-ticker calls carry only
+  OHLCV / three investor groups, and a partial daily_price row (no market_cap, PER,
+  PBR, ...) would look like a real one to the analyzer and the Supabase sync, and
+  batch_daily's INSERT OR IGNORE could never complete it
+- every other attribute (market-wide calls, tickers, ...) falls through to pykrx
+"""
+import os
+import sqlite3
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Same threshold batch_daily uses for "market-wide data exists for this date"
+MARKET_DAY_MIN_ROWS = 100
+
+Kind = namedtuple("Kind", "method table columns names")
+OHLCV = Kind("get_market_ohlcv", "daily_price",
+             ("open", "high", "low", "close", "volume"), ("시가", "고가", "저가", "종가", "거래량"))
+INVESTOR = Kind("get_market_trading_value_by_date", "daily_supply",
+                ("individual", "foreigner", "institution"), ("개인", "외국인합계", "기관합계"))
+
+
+def _weekdays(start, end):
+    days = []
+    current = datetime.strptime(start, "%Y%m%d")
+    last = datetime.strptime(end, "%Y%m%d")
+    while current <= last:
+        if current.weekday() < 5:
+            days.append(current.strftime("%Y%m%d"))
+        current += timedelta(days=1)
+    return days
+
+
+def _day(value):
+    # str(): the compact layout (migrate_db_compact.py) stores dates as INTEGER YYYYMMDD
+    return str(value).replace('-', '')
+
+
+class ReadThroughKrx:
+    """
+    stock = ReadThroughKrx(DB_PATH, krx_source())
+    stock.get_market_ohlcv("20250102", "20250108", "005930")   # SQLite first, pykrx for the gaps
+    """
+
+    def __init__(self, db_path, krx, min_market_rows=MARKET_DAY_MIN_ROWS):
+        self.db_path = db_path
+        self._krx = krx
+        self.min_market_rows = min_market_rows
+        self._calendars = {}  # (table, start, end) -> (market days, last market day)
+        self.local_days = 0
+        self.remote_calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self._krx, name)
+
+    def get_market_ohlcv(self, *args, **kwargs):
+        if len(args) != 3 or kwargs:
+            return self._krx.get_market_ohlcv(*args, **kwargs)
+        return self._read_through(OHLCV, *args)
+
+    def get_market_trading_value_by_date(self, *args, **kwargs):
+        if len(args) != 3 or kwargs:
+            return self._krx.get_market_trading_value_by_date(*args, **kwargs)
+        return self._read_through(INVESTOR, *args)
+
+    def stats(self):
+        return {"local_days": self.local_days, "remote_calls": self.remote_calls}
+
+    def _calendar(self, conn, kind, start, end):
+        key = (kind.table, start, end)
+        if key not in self._calendars:
+            cursor = conn.execute(f"SELECT date, COUNT(*) FROM {kind.table} WHERE date BETWEEN ? AND ? GROUP BY date",
+                                  (start, end))
+            market = {_day(d) for d, n in cursor.fetchall() if n >= self.min_market_rows}
+            last = conn.execute(f"SELECT MAX(date) FROM {kind.table}").fetchone()[0]
+            self._calendars[key] = (market, _day(last) if last is not None else None)
+        return self._calendars[key]
+
+    def _local_rows(self, conn, kind, code, start, end):
+        cursor = conn.execute(f"""
+            SELECT date, {', '.join(kind.columns)} FROM {kind.table}
+            WHERE code = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+        """, (code, start, end))
+        return {_day(row[0]): row[1:] for row in cursor.fetchall()}
+
+    def _previous_close(self, conn, code, start):
+        row = conn.execute(
+            "SELECT close FROM daily_price WHERE code = ? AND date < ? ORDER BY date DESC LIMIT 1",
+            (code, start)).fetchone()
+        return row[0] if row else None
+
+    def _read_through(self, kind, start, end, code):
+        fetch = getattr(self._krx, kind.method)
+        if not os.path.exists(self.db_path):
+            return fetch(start, end, code)
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            market, last = self._calendar(conn, kind, start, end)
+            local = self._local_rows(conn, kind, code, start, end)
+            missing = [d for d in _weekdays(start, end)
+                       if d not in local and (d in market or last is None or d > last)]
+            self.local_days += len(local)
+
+            remote = None
+            if missing:
+                self.remote_calls += 1
+                remote = fetch(missing[0], missing[-1], code)
+            prev_close = self._previous_close(conn, code, start) if kind is OHLCV else None
+        finally:
+            conn.close()
+
+        frame = pd.DataFrame([row for row in local.values()], columns=list(kind.names),
+                             index=pd.to_datetime(list(local), format="%Y%m%d"))
+        if kind is OHLCV:
+            frame["등락률"] = float('nan')
+        if remote is not None and not remote.empty:
+            # Local rows win for the days both have
+            remote = remote[~remote.index.strftime("%Y%m%d").isin(list(local))]
+            frame = pd.concat([frame, remote[list(frame.columns.intersection(remote.columns))]]) if len(frame) else remote
+        frame = frame.sort_index()
+        frame.index.name = "날짜"
+
+        if kind is OHLCV and len(frame):
+            if "등락률" not in frame:
+                frame["등락률"] = float('nan')
+            # 등락률 is not stored locally: change against the previous close (KRX rows keep theirs)
+            previous = frame["종가"].shift(1)
+            if prev_close:
+                previous.iloc[0] = prev_close
+            pct = ((frame["종가"] / previous - 1) * 100).round(2)
+            frame["등락률"] = frame["등락률"].fillna(pct).fillna(0.0)
+        return frame
@@ -6,61 +6,109 @@
 - ETF 괴리율
 
 Features:
-- 1분 TTL 캐싱으로 중복 요청 방지
-- Rate limiting (0.3초 간격)
+- 캐싱 (data_sources/quote_cache.py): 크기 제한 LRU + 단조 시계 TTL,
+  주식/ETF 네임스페이스 분리, 장중 1분 / 장 마감 후에는 다음 장 시작까지 유지
+- 요청 합치기: 같은 종목을 동시에 조회하면 HTTP 요청은 한 번만 나감 (single-flight)
+- stale-while-revalidate: 만료 후 NAVER_STALE_SECONDS 동안은 만료된 값을 바로 반환하고
+  백그라운드에서 한 번만 새로 고침
+- Rate limiting (전역 토큰 버킷, 초당 NAVER_RATE_PER_SEC건)
+- 파싱 (data_sources/naver_parse.py): 필요한 블록만 lxml로 파싱 (없으면 BeautifulSoup)
+- 일괄 조회: keep-alive 세션 + 동시 요청 수 제한, 완료되는 순서대로 반환 (동기/asyncio)
+- 실시간 폴링 API (get_realtime_quotes): 요청 하나에 여러 종목의 현재가/등락/거래량.
+  JSON에 없는 PER/PBR/52주/시가총액만 종목 페이지에서 받아 길게(NAVER_FUNDAMENTALS_TTL) 캐시.
+  NAVER_QUOTE_BACKEND=realtime이면 get_multiple_quotes가 이 경로를 사용
 """
 import requests
-from bs4 import BeautifulSoup
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, AsyncIterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 from datetime import datetime
-import time
-import re
+import asyncio
+import json
+import os
+
+try:
+    from data_sources.recorder import http_source
+    from data_sources.rate_limit import TokenBucket
+    from data_sources.quote_cache import QuoteCache, SingleFlight, session_ttl
+    from data_sources.naver_parse import parse_stock_page, parse_etf_page
+except ImportError:  # executed directly as data_sources/naver_finance.py
+    from recorder import http_source
+    from rate_limit import TokenBucket
+    from quote_cache import QuoteCache, SingleFlight, session_ttl
+    from naver_parse import parse_stock_page, parse_etf_page
 
 # === 캐싱 설정 ===
-CACHE_TTL_SECONDS = 60  # 1분 TTL
-_request_cache: Dict[str, Dict] = {}
+CACHE_TTL_SECONDS = 60  # 장중 TTL (장 마감 후에는 다음 장 시작까지)
+CACHE_MAX_ENTRIES = int(os.getenv("NAVER_CACHE_MAX_ENTRIES", "4096"))
+NS_STOCK = "stock"
+NS_ETF = "etf"
+NS_REALTIME = "realtime"
+NS_FUNDAMENTALS = "fundamentals"
+# 종목 페이지에서만 얻는 지표는 천천히 변하므로 길게 보관
+FUNDAMENTALS_TTL_SECONDS = int(os.getenv("NAVER_FUNDAMENTALS_TTL", str(6 * 3600)))
+FUNDAMENTAL_FIELDS = ("per", "pbr", "eps", "marketCap", "high52Week", "low52Week")
+# 만료 후에도 이 시간 동안은 만료된 값을 반환하고 백그라운드에서 갱신 (0이면 끔)
+STALE_SECONDS = float(os.getenv("NAVER_STALE_SECONDS", "300"))
+_cache = QuoteCache(max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL_SECONDS, stale_ttl=STALE_SECONDS)
+# 종목별 진행 중인 요청 (같은 종목 동시 조회는 요청 하나를 공유)
+_flights = SingleFlight()
 
+# === 동시성 / 요청 속도 ===
+MAX_CONCURRENCY = int(os.getenv("NAVER_MAX_CONCURRENCY", "8"))  # 동시 요청 수 (= 커넥션 풀 크기)
+RATE_PER_SEC = float(os.getenv("NAVER_RATE_PER_SEC", "20"))  # 프로세스 전체 초당 요청 수
 
-def _is_cache_valid(ticker: str) -> bool:
-    """캐시가 유효한지 확인 (1분 이내)"""
-    cache = _request_cache.get(ticker)
-    if not cache:
-        return False
-    
-    cached_time = datetime.fromisoformat(cache['fetchedAt'])
-    elapsed = (datetime.now() - cached_time).total_seconds()
-    return elapsed < CACHE_TTL_SECONDS
+# === 엔드포인트 ===
+ITEM_URL = os.getenv("NAVER_ITEM_URL", "https://finance.naver.com/item/main.naver")
+REALTIME_URL = os.getenv("NAVER_REALTIME_URL", "https://polling.finance.naver.com/api/realtime")
+REALTIME_BATCH = int(os.getenv("NAVER_REALTIME_BATCH", "100"))  # 요청당 종목 수
+BACKEND_HTML = "html"
+BACKEND_REALTIME = "realtime"
+QUOTE_BACKEND = os.getenv("NAVER_QUOTE_BACKEND", BACKEND_HTML)
 
+# HTTP 클라이언트 (DATA_SOURCE_MODE에 따라 live/record/replay)
+_http = http_source("naver", pool_size=MAX_CONCURRENCY)
+# 모든 스레드/코루틴이 공유하는 전역 rate limiter
+_limiter = TokenBucket(RATE_PER_SEC)
 
-def _get_cache(ticker: str) -> Optional[Dict]:
-    """캐시에서 데이터 가져오기"""
-    return _request_cache.get(ticker)
 
+def _set_cache(namespace: str, ticker: str, data: Dict) -> None:
+    """캐시에 데이터 저장 (TTL은 장 운영 시간에 따라)"""
+    _cache.set(namespace, ticker, data, ttl=session_ttl(trading_ttl=CACHE_TTL_SECONDS))
 
-def _set_cache(ticker: str, data: Dict) -> None:
-    """캐시에 데이터 저장"""
-    _request_cache[ticker] = data
 
+_refresher = None
+_refresher_lock = threading.Lock()
 
-def _parse_number(text: str) -> int:
-    """숫자 파싱 (쉼표, 공백 제거)"""
-    if not text:
-        return 0
-    # 숫자만 추출
-    numbers = re.sub(r'[^\d]', '', text)
-    return int(numbers) if numbers else 0
 
+def _refresh_pool() -> ThreadPoolExecutor:
+    """백그라운드 갱신용 워커 (처음 쓸 때 생성)"""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="naver-refresh")
+        return _refresher
 
-def _parse_float(text: str) -> Optional[float]:
-    """소수점 숫자 파싱"""
-    if not text or text.strip() in ('N/A', '-', ''):
-        return None
-    try:
-        # 쉼표 제거 후 float 변환
-        cleaned = text.replace(',', '').strip()
-        return float(cleaned)
-    except ValueError:
-        return None
+
+def _cached_quote(namespace: str, ticker: str, fetch) -> Optional[Dict]:
+    """
+    캐시 조회. 유효하면 그대로, 만료됐지만 stale 구간이면 그 값을 반환하면서
+    백그라운드 갱신을 (종목당 하나만) 시작. 없으면 None.
+    """
+    cached, fresh = _cache.lookup(namespace, ticker)
+    if cached and not fresh:
+        _flights.do_background((namespace, ticker), _refresh_pool(), fetch, ticker)
+    return cached
+
+
+def _load_quote(namespace: str, ticker: str, fetch) -> Optional[Dict]:
+    """HTTP 조회 (같은 종목을 조회 중인 호출이 있으면 그 결과를 기다려 공유)"""
+    return _flights.do((namespace, ticker), fetch, ticker)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """캐시 적중/미스/축출 카운터와 합쳐진 요청/백그라운드 갱신 수 (모니터링용)"""
+    return dict(_cache.stats(), coalesced=_flights.coalesced, background_refreshes=_flights.background)
 
 
 def get_stock_quote(ticker: str, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
@@ -74,127 +122,54 @@ def get_stock_quote(ticker: str, force_refresh: bool = False) -> Optional[Dict[s
     Returns:
         시세 데이터 딕셔너리 또는 None
     """
-    # 캐시 확인 (1분 이내 요청은 캐시 사용)
-    if not force_refresh and _is_cache_valid(ticker):
-        print(f"[CACHE HIT] {ticker} - 캐시 데이터 사용 (1분 이내)")
-        return _get_cache(ticker)
-    
-    url = f"https://finance.naver.com/item/main.naver?code={ticker}"
+    # 캐시 확인
+    if not force_refresh:
+        cached = _cached_quote(NS_STOCK, ticker, _fetch_stock_quote)
+        if cached:
+            print(f"[CACHE HIT] {ticker} - 캐시 데이터 사용")
+            return cached
+    return _load_quote(NS_STOCK, ticker, _fetch_stock_quote)
+
+
+def _fetch_stock_quote(ticker: str) -> Optional[Dict[str, Any]]:
+    """네이버 금융 종목 페이지를 받아 파싱하고 캐시에 저장 (캐시 확인 없음)"""
+    url = f"{ITEM_URL}?code={ticker}"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        _limiter.acquire()
+        response = _http.get(url, headers=headers, timeout=10)
         if response.status_code != 200:
             print(f"[ERROR] {ticker}: HTTP {response.status_code}")
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 종목명
-        name_elem = soup.select_one('.wrap_company h2 a')
-        name = name_elem.text.strip() if name_elem else ticker
-        
-        # 현재가
-        current_price_elem = soup.select_one('.no_today .blind')
-        current_price = _parse_number(current_price_elem.text) if current_price_elem else 0
-        
-        # 등락가 및 등락률
-        change_elem = soup.select_one('.no_exday')
-        change_price = 0
-        change_percent = 0.0
-        
-        if change_elem:
-            # 상승/하락 방향 판단
-            is_down = 'nv_down' in str(change_elem) or 'ico_down' in str(change_elem)
-            
-            # 등락가 파싱
-            change_spans = change_elem.select('span.blind')
-            if len(change_spans) >= 1:
-                change_price = _parse_number(change_spans[0].text)
-                if is_down:
-                    change_price = -change_price
-            
-            # 등락률 파싱
-            if len(change_spans) >= 2:
-                pct_text = change_spans[1].text.replace('%', '').strip()
-                change_percent = _parse_float(pct_text) or 0.0
-                if is_down:
-                    change_percent = -change_percent
-        
-        # PER, PBR (투자정보 테이블에서)
-        per = None
-        pbr = None
-        
-        # 투자정보 테이블 찾기
-        per_elem = soup.select_one('#_per')
-        pbr_elem = soup.select_one('#_pbr')
-        
-        if per_elem:
-            per = _parse_float(per_elem.text)
-        if pbr_elem:
-            pbr = _parse_float(pbr_elem.text)
-        
-        # 시가총액 (억원 단위)
-        market_cap = None
-        market_sum_elem = soup.select_one('#_market_sum')
-        if market_sum_elem:
-            # "1,234" 형태 → 1234억원 → 원 단위로 변환
-            market_cap_억 = _parse_number(market_sum_elem.text)
-            market_cap = market_cap_억 * 100000000  # 억원 → 원
-        
-        # 52주 최고/최저
-        high_52week = None
-        low_52week = None
-        week52_elem = soup.select('.tab_con1 table tr')
-        for tr in week52_elem:
-            th = tr.select_one('th')
-            td = tr.select_one('td')
-            if th and td:
-                if '52주' in th.text and '최고' in th.text:
-                    high_52week = _parse_number(td.text)
-                elif '52주' in th.text and '최저' in th.text:
-                    low_52week = _parse_number(td.text)
-        
-        # EPS, BPS
-        eps = None
-        bps = None
-        # 투자지표 테이블에서 EPS, BPS 파싱
-        invest_table = soup.select('.aside_invest_info table tr')
-        for tr in invest_table:
-            th = tr.select_one('th, em')
-            td = tr.select_one('td')
-            if th and td:
-                if 'EPS' in th.text:
-                    eps = _parse_float(td.text)
-                elif 'BPS' in th.text:
-                    bps = _parse_float(td.text)
+        fields = parse_stock_page(response.text, ticker)
+        name = fields["name"]
+        current_price = fields["currentPrice"]
         
         data = {
             "ticker": ticker,
             "name": name,
             "currentPrice": current_price,
-            "changePrice": change_price,
-            "changePercent": change_percent,
-            "per": per,
-            "pbr": pbr,
-            "eps": eps,
-            "marketCap": market_cap,
-            "high52Week": high_52week,
-            "low52Week": low_52week,
+            "changePrice": fields["changePrice"],
+            "changePercent": fields["changePercent"],
+            "per": fields["per"],
+            "pbr": fields["pbr"],
+            "eps": fields["eps"],
+            "marketCap": fields["marketCap"],
+            "high52Week": fields["high52Week"],
+            "low52Week": fields["low52Week"],
             "currency": "KRW",
             "source": "NAVER",
             "fetchedAt": datetime.now().isoformat()
         }
         
-        # 캐시에 저장
-        _set_cache(ticker, data)
+        # 캐시에 저장 (지표는 실시간 폴링 경로에서 재사용하도록 따로 길게)
+        _set_cache(NS_STOCK, ticker, data)
+        _cache.set(NS_FUNDAMENTALS, ticker, {k: data[k] for k in FUNDAMENTAL_FIELDS}, ttl=FUNDAMENTALS_TTL_SECONDS)
         print(f"[FETCH] {ticker} ({name}) - 네이버 금융에서 가져옴: {current_price:,}원")
-        
-        # Rate limiting: 연속 요청 시 0.3초 대기
-        time.sleep(0.3)
-        
         return data
         
     except requests.exceptions.Timeout:
@@ -217,45 +192,33 @@ def get_etf_quote(ticker: str, force_refresh: bool = False) -> Optional[Dict[str
         ETF 시세 데이터 (괴리율 포함)
     """
     # 캐시 확인
-    if not force_refresh and _is_cache_valid(ticker):
-        print(f"[CACHE HIT] ETF {ticker}")
-        return _get_cache(ticker)
-    
+    if not force_refresh:
+        cached = _cached_quote(NS_ETF, ticker, _fetch_etf_quote)
+        if cached:
+            print(f"[CACHE HIT] ETF {ticker}")
+            return cached
+    return _load_quote(NS_ETF, ticker, _fetch_etf_quote)
+
+
+def _fetch_etf_quote(ticker: str) -> Optional[Dict[str, Any]]:
+    """ETF 페이지를 받아 파싱하고 캐시에 저장 (캐시 확인 없음)"""
     # ETF 전용 페이지
-    url = f"https://finance.naver.com/item/main.naver?code={ticker}"
+    url = f"{ITEM_URL}?code={ticker}"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        _limiter.acquire()
+        response = _http.get(url, headers=headers, timeout=10)
         if response.status_code != 200:
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 기본 정보 (주식과 동일하게 파싱)
-        name_elem = soup.select_one('.wrap_company h2 a')
-        name = name_elem.text.strip() if name_elem else ticker
-        
-        current_price_elem = soup.select_one('.no_today .blind')
-        current_price = _parse_number(current_price_elem.text) if current_price_elem else 0
-        
-        # NAV (순자산가치) - ETF 상세 정보에서 파싱
-        nav = None
-        premium_discount = None
-        
-        # ETF 상세 테이블에서 NAV, 괴리율 찾기
-        etf_info = soup.select('.tab_con1 table tr')
-        for tr in etf_info:
-            th = tr.select_one('th')
-            td = tr.select_one('td')
-            if th and td:
-                th_text = th.text.strip()
-                if 'NAV' in th_text or '순자산' in th_text:
-                    nav = _parse_number(td.text)
-                elif '괴리율' in th_text or '괴리' in th_text:
-                    premium_discount = _parse_float(td.text.replace('%', ''))
+        fields = parse_etf_page(response.text, ticker)
+        name = fields["name"]
+        current_price = fields["currentPrice"]
+        nav = fields["nav"]
+        premium_discount = fields["premiumDiscount"]
         
         # NAV가 있고 괴리율이 없으면 직접 계산
         if nav and nav > 0 and premium_discount is None and current_price > 0:
@@ -272,10 +235,8 @@ def get_etf_quote(ticker: str, force_refresh: bool = False) -> Optional[Dict[str
             "fetchedAt": datetime.now().isoformat()
         }
         
-        _set_cache(ticker, data)
+        _set_cache(NS_ETF, ticker, data)
         print(f"[FETCH] ETF {ticker} ({name}) - 현재가: {current_price:,}, NAV: {nav}, 괴리율: {premium_discount}%")
-        
-        time.sleep(0.3)
         return data
         
     except Exception as e:
@@ -283,23 +244,198 @@ def get_etf_quote(ticker: str, force_refresh: bool = False) -> Optional[Dict[str
         return None
 
 
+def iter_quotes(tickers: list, force_refresh: bool = False,
+                max_workers: int = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """
+    여러 종목 시세를 동시에 조회해 완료되는 순서대로 (ticker, quote) 반환
+
+    Args:
+        tickers: 종목코드 리스트 (중복은 한 번만 조회)
+        force_refresh: 캐시 무시 여부
+        max_workers: 동시 요청 수 (기본 MAX_CONCURRENCY)
+
+    Yields:
+        (ticker, 시세 딕셔너리 또는 None)
+    """
+    pending = []
+    # 캐시 적중분은 스레드 없이 바로 반환
+    for ticker in dict.fromkeys(tickers):
+        cached = None if force_refresh else _cached_quote(NS_STOCK, ticker, _fetch_stock_quote)
+        if cached:
+            yield ticker, cached
+        else:
+            pending.append(ticker)
+    if not pending:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers or MAX_CONCURRENCY, len(pending))) as pool:
+        futures = {pool.submit(_load_quote, NS_STOCK, ticker, _fetch_stock_quote): ticker for ticker in pending}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+async def aiter_quotes(tickers: list, force_refresh: bool = False,
+                       max_concurrency: int = None) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+    """
+    iter_quotes의 asyncio 버전 (이벤트 루프를 막지 않음)
+    HTTP 호출은 같은 세션/rate limiter를 쓰는 워커 스레드에서 실행되고,
+    동시 요청 수는 세마포어로 제한됩니다.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or MAX_CONCURRENCY)
+
+    async def fetch(ticker):
+        async with semaphore:
+            return ticker, await asyncio.to_thread(get_stock_quote, ticker, force_refresh)
+
+    tasks = [asyncio.ensure_future(fetch(t)) for t in dict.fromkeys(tickers)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# === 실시간 폴링 API ===
+
+# rf (등락 구분): 1 상한, 2 상승, 3 보합, 4 하한, 5 하락
+REALTIME_DOWN = ("4", "5")
+
+
+def _parse_realtime(payload: Dict) -> Dict[str, Dict[str, Any]]:
+    """polling.finance.naver.com 응답 → {ticker: 시세}"""
+    quotes = {}
+    fetched_at = datetime.now().isoformat()
+    for area in (payload.get("result") or {}).get("areas", []):
+        for item in area.get("datas", []):
+            sign = -1 if str(item.get("rf")) in REALTIME_DOWN else 1
+            quotes[item["cd"]] = {
+                "ticker": item["cd"],
+                "name": item.get("nm") or item["cd"],
+                "currentPrice": int(item.get("nv") or 0),
+                "changePrice": sign * abs(int(item.get("cv") or 0)),
+                "changePercent": sign * abs(float(item.get("cr") or 0.0)),
+                "prevClose": item.get("sv"),
+                "open": item.get("ov"),
+                "high": item.get("hv"),
+                "low": item.get("lv"),
+                "volume": item.get("aq"),
+                "eps": item.get("eps"),
+                "currency": "KRW",
+                "source": "NAVER_REALTIME",
+                "fetchedAt": fetched_at,
+            }
+    return quotes
+
+
+def fetch_realtime_quotes(tickers: list) -> Dict[str, Dict[str, Any]]:
+    """
+    실시간 폴링 API로 현재가/등락/거래량 조회 (요청 하나에 REALTIME_BATCH 종목, 캐시 확인 없음)
+
+    Returns:
+        {ticker: 시세} (응답에 없거나 실패한 배치의 종목 제외)
+    """
+    codes = list(dict.fromkeys(tickers))
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+    quotes = {}
+    for i in range(0, len(codes), REALTIME_BATCH):
+        batch = codes[i:i + REALTIME_BATCH]
+        url = f"{REALTIME_URL}?query=SERVICE_ITEM:{','.join(batch)}"
+        try:
+            _limiter.acquire()
+            response = _http.get(url, headers=headers, timeout=10)
+            if response.status_code != 200:
+                print(f"[ERROR] realtime {len(batch)} tickers: HTTP {response.status_code}")
+                continue
+            payload = json.loads(response.text)
+            if payload.get("resultCode") != "success":
+                print(f"[ERROR] realtime {len(batch)} tickers: {payload.get('resultCode')}")
+                continue
+        except Exception as e:
+            print(f"[ERROR] realtime {len(batch)} tickers: {e}")
+            continue
+        for ticker, quote in _parse_realtime(payload).items():
+            _set_cache(NS_REALTIME, ticker, quote)
+            quotes[ticker] = quote
+    print(f"[FETCH] realtime {len(quotes)}/{len(codes)} tickers in {-(-len(codes) // REALTIME_BATCH)} requests")
+    return quotes
+
+
+def get_realtime_quotes(tickers: list, force_refresh: bool = False,
+                        fundamentals: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 종목 시세를 실시간 폴링 API로 일괄 조회 (결과는 입력 순서)
+
+    Args:
+        tickers: 종목코드 리스트
+        force_refresh: 캐시 무시 여부 (지표 캐시는 유지)
+        fundamentals: True면 PER/PBR/52주/시가총액을 종목 페이지에서 채움
+            (지표 캐시가 없는 종목만 페이지를 받음. JSON에 없는 종목도 페이지 시세로 대체)
+
+    Returns:
+        {ticker: quote_data} 딕셔너리 (실패한 종목 제외)
+    """
+    codes = list(dict.fromkeys(tickers))
+    prices = {}
+    for ticker in codes:
+        cached = None if force_refresh else _cache.get(NS_REALTIME, ticker)
+        if cached:
+            prices[ticker] = cached
+    missing = [t for t in codes if t not in prices]
+    if missing:
+        prices.update(fetch_realtime_quotes(missing))
+    if not fundamentals:
+        return {t: dict(prices[t]) for t in codes if t in prices}
+
+    snapshots, pages = {}, {}
+    for ticker in codes:
+        cached = _cache.lookup(NS_FUNDAMENTALS, ticker)[0]
+        if cached:
+            snapshots[ticker] = cached
+    need_page = [t for t in codes if t not in snapshots]
+    for ticker, quote in iter_quotes(need_page):
+        if quote:
+            pages[ticker] = quote
+            snapshots[ticker] = {k: quote[k] for k in FUNDAMENTAL_FIELDS}
+
+    quotes = {}
+    for ticker in codes:
+        if ticker not in prices:
+            if ticker in pages:
+                quotes[ticker] = pages[ticker]
+            continue
+        quote = dict(prices[ticker])
+        for field, value in snapshots.get(ticker, {}).items():
+            if quote.get(field) is None:
+                quote[field] = value
+        quotes[ticker] = quote
+    return quotes
+
+
 def get_multiple_quotes(tickers: list, force_refresh: bool = False) -> Dict[str, Dict]:
     """
-    여러 종목 시세 일괄 조회
+    여러 종목 시세 일괄 조회 (동시 요청, 결과는 입력 순서)
+    NAVER_QUOTE_BACKEND=realtime이면 실시간 폴링 API 사용 (get_realtime_quotes)
     
     Args:
         tickers: 종목코드 리스트
         force_refresh: 캐시 무시 여부
     
     Returns:
-        {ticker: quote_data} 딕셔너리
+        {ticker: quote_data} 딕셔너리 (실패한 종목 제외)
     """
-    results = {}
-    for ticker in tickers:
-        quote = get_stock_quote(ticker, force_refresh)
-        if quote:
-            results[ticker] = quote
-    return results
+    if QUOTE_BACKEND == BACKEND_REALTIME:
+        return get_realtime_quotes(tickers, force_refresh)
+    done = dict(iter_quotes(tickers, force_refresh))
+    return {t: done[t] for t in dict.fromkeys(tickers) if done.get(t)}
+
+
+async def get_multiple_quotes_async(tickers: list, force_refresh: bool = False) -> Dict[str, Dict]:
+    """get_multiple_quotes의 asyncio 버전 (realtime 백엔드는 스레드에서 get_realtime_quotes 실행)"""
+    if QUOTE_BACKEND == BACKEND_REALTIME:
+        return await asyncio.to_thread(get_realtime_quotes, tickers, force_refresh)
+    done = {ticker: quote async for ticker, quote in aiter_quotes(tickers, force_refresh)}
+    return {t: done[t] for t in dict.fromkeys(tickers) if done.get(t)}
 
 
 # === CLI 테스트 ===
@@ -307,12 +443,18 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python naver_finance.py <ticker> [--etf]")
+        print("Usage: python naver_finance.py <ticker> [--etf | --realtime]")
         print("Example: python naver_finance.py 005930")
         print("Example: python naver_finance.py 069500 --etf")
+        print("Example: python naver_finance.py 005930,000660 --realtime")
         sys.exit(1)
     
     ticker = sys.argv[1]
+    if '--realtime' in sys.argv:
+        for code, quote in get_realtime_quotes(ticker.split(',')).items():
+            print(f"  {code} {quote['name']}: {quote['currentPrice']:,} ({quote['changePercent']:+.2f}%) "
+                  f"vol {quote.get('volume')} PER {quote.get('per')}")
+        sys.exit(0)
     is_etf = '--etf' in sys.argv
     
     print(f"\n{'='*50}")
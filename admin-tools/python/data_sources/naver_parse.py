@@ -0,0 +1,327 @@
+"""
+네이버 금융 종목 페이지(item/main.naver) 파서
+
+- lxml 엔진 (기본): 페이지 전체 대신 필요한 블록(wrap_company, rate_info,
+  aside_invest_info)만 잘라 lxml로 파싱하고 XPath로 값을 읽습니다.
+  블록을 못 찾으면 페이지 전체를 lxml로 파싱합니다.
+- bs4 엔진: 기존 BeautifulSoup(html.parser) 구현. lxml이 없을 때와
+  동등성 테스트/벤치마크의 기준으로 사용합니다.
+
+두 엔진은 같은 추출 로직(_extract_stock / _extract_etf)을 공유하고
+노드 접근만 다릅니다.
+
+    python data_sources/naver_parse.py tests/fixtures/naver_item_005930.html   # 벤치마크
+"""
+import re
+import time
+from typing import Optional, Dict, Any
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # bs4 엔진만 사용
+    lxml_html = None
+
+ENGINE_LXML = "lxml"
+ENGINE_BS4 = "bs4"
+DEFAULT_ENGINE = ENGINE_LXML if lxml_html is not None else ENGINE_BS4
+
+# 값이 들어 있는 블록 (class 토큰). 이 블록들만 파싱하면 모든 셀렉터가 같은 결과를 냅니다.
+FRAGMENT_CLASSES = ("wrap_company", "rate_info", "aside_invest_info")
+
+
+def parse_number(text: str) -> int:
+    """숫자 파싱 (쉼표, 공백 제거)"""
+    if not text:
+        return 0
+    # 숫자만 추출
+    numbers = re.sub(r'[^\d]', '', text)
+    return int(numbers) if numbers else 0
+
+
+def parse_float(text: str) -> Optional[float]:
+    """소수점 숫자 파싱"""
+    if not text or text.strip() in ('N/A', '-', ''):
+        return None
+    try:
+        # 쉼표 제거 후 float 변환
+        cleaned = text.replace(',', '').strip()
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+# === 셀렉터 (CSS for bs4, XPath for lxml) ===
+
+def _cls(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+QUERIES = {
+    "name": ('.wrap_company h2 a', f"//*[{_cls('wrap_company')}]//h2//a"),
+    "price": ('.no_today .blind', f"//*[{_cls('no_today')}]//*[{_cls('blind')}]"),
+    "change": ('.no_exday', f"//*[{_cls('no_exday')}]"),
+    "change_spans": ('span.blind', f".//span[{_cls('blind')}]"),
+    "per": ('#_per', "//*[@id='_per']"),
+    "pbr": ('#_pbr', "//*[@id='_pbr']"),
+    "market_sum": ('#_market_sum', "//*[@id='_market_sum']"),
+    "tab_rows": ('.tab_con1 table tr', f"//*[{_cls('tab_con1')}]//table//tr"),
+    "invest_rows": ('.aside_invest_info table tr', f"//*[{_cls('aside_invest_info')}]//table//tr"),
+    "th": ('th', ".//th"),
+    "td": ('td', ".//td"),
+    "th_or_em": ('th, em', ".//*[self::th or self::em]"),
+}
+
+
+class _Bs4Node:
+    __slots__ = ("el",)
+
+    def __init__(self, el):
+        self.el = el
+
+    def one(self, query):
+        found = self.el.select_one(QUERIES[query][0])
+        return _Bs4Node(found) if found is not None else None
+
+    def all(self, query):
+        return [_Bs4Node(e) for e in self.el.select(QUERIES[query][0])]
+
+    @property
+    def text(self):
+        return self.el.text
+
+    @property
+    def markup(self):
+        return str(self.el)
+
+
+class _LxmlNode:
+    __slots__ = ("el",)
+    _compiled = {}
+
+    def __init__(self, el):
+        self.el = el
+
+    def _xpath(self, query):
+        xp = self._compiled.get(query)
+        if xp is None:
+            xp = self._compiled[query] = etree.XPath(QUERIES[query][1])
+        return xp(self.el)
+
+    def one(self, query):
+        found = self._xpath(query)
+        return _LxmlNode(found[0]) if found else None
+
+    def all(self, query):
+        return [_LxmlNode(e) for e in self._xpath(query)]
+
+    @property
+    def text(self):
+        return self.el.text_content()
+
+    @property
+    def markup(self):
+        return etree.tostring(self.el, encoding=str, with_tail=False)
+
+
+# === 블록 잘라내기 ===
+
+_TAG_AT = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)')
+
+
+def _element_slices(html: str, class_name: str):
+    """class 토큰이 class_name인 요소들의 원문 (여는 태그 ~ 짝이 맞는 닫는 태그)"""
+    slices = []
+    pattern = re.compile(r'class="[^"]*(?<![\w-])' + re.escape(class_name) + r'(?![\w-])')
+    pos = 0
+    while True:
+        m = pattern.search(html, pos)
+        if not m:
+            return slices
+        start = html.rfind('<', 0, m.start())
+        tag = _TAG_AT.match(html, start)
+        if start < 0 or not tag:
+            return None
+        name = tag.group(1).lower()
+        # 같은 태그의 열림/닫힘 수를 세어 짝이 맞는 닫는 태그를 찾음
+        depth = 0
+        for t in re.finditer(rf'<(/?){name}\b[^>]*>', html[start:], re.IGNORECASE):
+            depth += -1 if t.group(1) else 1
+            if depth == 0:
+                end = start + t.end()
+                break
+        else:
+            return None  # 닫히지 않은 블록: 전체 파싱으로
+        slices.append(html[start:end])
+        pos = end
+
+
+def _fragments(html: str) -> Optional[str]:
+    parts = []
+    for class_name in FRAGMENT_CLASSES:
+        found = _element_slices(html, class_name)
+        if not found:
+            return None
+        parts.extend(found)
+    return ''.join(parts)
+
+
+def _root(html: str, engine: str):
+    if engine == ENGINE_BS4:
+        from bs4 import BeautifulSoup
+        return _Bs4Node(BeautifulSoup(html, 'html.parser'))
+    if lxml_html is None:
+        raise ImportError("lxml is required for the lxml engine (pip install lxml)")
+    fragment = _fragments(html)
+    if fragment is not None:
+        html = f"<html><body>{fragment}</body></html>"
+    return _LxmlNode(lxml_html.document_fromstring(html))
+
+
+# === 추출 로직 (엔진 공통) ===
+
+def _name_and_price(root, ticker):
+    # 종목명
+    name_elem = root.one("name")
+    name = name_elem.text.strip() if name_elem else ticker
+    # 현재가
+    current_price_elem = root.one("price")
+    current_price = parse_number(current_price_elem.text) if current_price_elem else 0
+    return name, current_price
+
+
+def _extract_stock(root, ticker):
+    name, current_price = _name_and_price(root, ticker)
+
+    # 등락가 및 등락률
+    change_elem = root.one("change")
+    change_price = 0
+    change_percent = 0.0
+
+    if change_elem:
+        # 상승/하락 방향 판단
+        markup = change_elem.markup
+        is_down = 'nv_down' in markup or 'ico_down' in markup
+
+        # 등락가 파싱
+        change_spans = change_elem.all("change_spans")
+        if len(change_spans) >= 1:
+            change_price = parse_number(change_spans[0].text)
+            if is_down:
+                change_price = -change_price
+
+        # 등락률 파싱
+        if len(change_spans) >= 2:
+            pct_text = change_spans[1].text.replace('%', '').strip()
+            change_percent = parse_float(pct_text) or 0.0
+            if is_down:
+                change_percent = -change_percent
+
+    # PER, PBR (투자정보 테이블에서)
+    per_elem = root.one("per")
+    pbr_elem = root.one("pbr")
+    per = parse_float(per_elem.text) if per_elem else None
+    pbr = parse_float(pbr_elem.text) if pbr_elem else None
+
+    # 시가총액 (억원 단위) "1,234" 형태 → 1234억원 → 원 단위로 변환
+    market_cap = None
+    market_sum_elem = root.one("market_sum")
+    if market_sum_elem:
+        market_cap = parse_number(market_sum_elem.text) * 100000000
+
+    # 52주 최고/최저
+    high_52week = None
+    low_52week = None
+    for tr in root.all("tab_rows"):
+        th = tr.one("th")
+        td = tr.one("td")
+        if th and td:
+            if '52주' in th.text and '최고' in th.text:
+                high_52week = parse_number(td.text)
+            elif '52주' in th.text and '최저' in th.text:
+                low_52week = parse_number(td.text)
+
+    # EPS, BPS (투자지표 테이블)
+    eps = None
+    bps = None
+    for tr in root.all("invest_rows"):
+        th = tr.one("th_or_em")
+        td = tr.one("td")
+        if th and td:
+            if 'EPS' in th.text:
+                eps = parse_float(td.text)
+            elif 'BPS' in th.text:
+                bps = parse_float(td.text)
+
+    return {
+        "name": name,
+        "currentPrice": current_price,
+        "changePrice": change_price,
+        "changePercent": change_percent,
+        "per": per,
+        "pbr": pbr,
+        "eps": eps,
+        "bps": bps,
+        "marketCap": market_cap,
+        "high52Week": high_52week,
+        "low52Week": low_52week,
+    }
+
+
+def _extract_etf(root, ticker):
+    name, current_price = _name_and_price(root, ticker)
+
+    # ETF 상세 테이블에서 NAV (순자산가치), 괴리율 찾기
+    nav = None
+    premium_discount = None
+    for tr in root.all("tab_rows"):
+        th = tr.one("th")
+        td = tr.one("td")
+        if th and td:
+            th_text = th.text.strip()
+            if 'NAV' in th_text or '순자산' in th_text:
+                nav = parse_number(td.text)
+            elif '괴리율' in th_text or '괴리' in th_text:
+                premium_discount = parse_float(td.text.replace('%', ''))
+
+    return {"name": name, "currentPrice": current_price, "nav": nav, "premiumDiscount": premium_discount}
+
+
+def parse_stock_page(html: str, ticker: str, engine: str = None) -> Dict[str, Any]:
+    """종목 페이지 → 시세/지표 필드 (name, currentPrice, changePrice, ..., high52Week, low52Week)"""
+    return _extract_stock(_root(html, engine or DEFAULT_ENGINE), ticker)
+
+
+def parse_etf_page(html: str, ticker: str, engine: str = None) -> Dict[str, Any]:
+    """ETF 페이지 → name, currentPrice, nav, premiumDiscount (괴리율 원값, 계산 전)"""
+    return _extract_etf(_root(html, engine or DEFAULT_ENGINE), ticker)
+
+
+def benchmark(html: str, ticker: str = "000000", repeat: int = 50) -> Dict[str, float]:
+    """엔진별 페이지당 파싱 시간 (ms, 중앙값)"""
+    results = {}
+    for engine in (ENGINE_BS4, ENGINE_LXML):
+        if engine == ENGINE_LXML and lxml_html is None:
+            continue
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse_stock_page(html, ticker, engine)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        results[engine] = samples[len(samples) // 2]
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python naver_parse.py <saved item page.html> [repeat]")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        page = f.read()
+    timings = benchmark(page, repeat=int(sys.argv[2]) if len(sys.argv) > 2 else 50)
+    for engine, ms in timings.items():
+        print(f"{engine:>5}: {ms:.2f} ms/page")
+    if ENGINE_LXML in timings:
+        print(f"speedup: {timings[ENGINE_BS4] / timings[ENGINE_LXML]:.1f}x")
@@ -0,0 +1,193 @@
+"""
+Bounded in-process cache for quote lookups.
+
+- LRU eviction once max_entries is reached (long-running processes stay flat)
+- expiry on a monotonic clock (wall-clock jumps and NTP corrections do not matter)
+- namespaces keep stock and ETF quotes for the same code apart
+- session_ttl(): short TTL while KRX is trading, until the next session otherwise
+- stale window: expired entries stay readable through lookup() for stale_ttl
+  seconds so callers can serve them while a refresh runs (stale-while-revalidate)
+- SingleFlight: concurrent loads of the same key share one upstream call
+- hit / miss / eviction / expiration counters for monitoring (stats())
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9), "KST")  # no DST in Korea
+
+# KRX regular session incl. opening/closing auctions (08:30 ~ 15:40 KST, weekdays)
+SESSION_OPEN = (8, 30)
+SESSION_CLOSE = (15, 40)
+TRADING_TTL_SECONDS = 60
+CLOSED_TTL_MAX_SECONDS = 12 * 3600  # holidays are not known here; re-check at least twice a day
+
+
+def _next_open(now):
+    candidate = now.replace(hour=SESSION_OPEN[0], minute=SESSION_OPEN[1], second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def is_trading(now=None):
+    now = (now or datetime.now(KST)).astimezone(KST)
+    if now.weekday() >= 5:
+        return False
+    return SESSION_OPEN <= (now.hour, now.minute) < SESSION_CLOSE
+
+
+def session_ttl(now=None, trading_ttl=TRADING_TTL_SECONDS, closed_max=CLOSED_TTL_MAX_SECONDS):
+    """Seconds a quote fetched at `now` stays fresh: trading_ttl in session, else until the next open."""
+    now = (now or datetime.now(KST)).astimezone(KST)
+    if is_trading(now):
+        return trading_ttl
+    return max(trading_ttl, min(closed_max, (_next_open(now) - now).total_seconds()))
+
+
+class QuoteCache:
+    """
+    cache = QuoteCache(max_entries=2048)
+    cache.set("stock", "005930", quote, ttl=session_ttl())
+    cache.get("stock", "005930")   # None when missing or expired
+    cache.lookup("stock", "005930")  # (value, fresh); expired values within stale_ttl come back with fresh=False
+    """
+
+    def __init__(self, max_entries=2048, default_ttl=TRADING_TTL_SECONDS, clock=time.monotonic, stale_ttl=0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # (namespace, key) -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, namespace, key):
+        return self.lookup(namespace, key, allow_stale=False)[0]
+
+    def lookup(self, namespace, key, allow_stale=True):
+        """(value, fresh). Expired entries inside the stale window return (value, False)."""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                self.misses += 1
+                return None, False
+            now = self._clock()
+            if entry[0] <= now:
+                if entry[0] + self.stale_ttl <= now:
+                    del self._entries[(namespace, key)]
+                    self.expirations += 1
+                elif allow_stale:
+                    self._entries.move_to_end((namespace, key))
+                    self.stale_hits += 1
+                    return entry[1], False
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return entry[1], True
+
+    def set(self, namespace, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[(namespace, key)] = (self._clock() + ttl, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace, key):
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Request coalescing: while fn is running for a key, other callers of the same
+    key wait for that call and get its result (or exception) instead of starting
+    their own.
+
+    flights = SingleFlight()
+    flights.do(("stock", "005930"), fetch, "005930")
+    flights.do_background(("stock", "005930"), executor, fetch, "005930")
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        self.background = 0
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def do_background(self, key, executor, fn, *args):
+        """Start do() on the executor unless a call for key is already running; True if started."""
+        with self._lock:
+            if key in self._calls:
+                return False
+            self.background += 1
+        executor.submit(self.do, key, fn, *args)
+        return True
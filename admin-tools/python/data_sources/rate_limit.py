@@ -0,0 +1,115 @@
+"""
+Request pacing for upstream APIs.
+
+- TokenBucket: thread-safe per-second limiter (burst up to `capacity`)
+- DailyQuota: per-source request counter persisted in SQLite (table api_quota in
+  schema_sqlite.sql), shared by every process that uses the same DB, reset per day
+- RequestScheduler: bounded worker pool; every upstream call goes through
+  `call()`, which reserves quota and waits for a token first
+"""
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class QuotaExhausted(Exception):
+    """The daily request budget is used up (or the scheduler was stopped)."""
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                # Tolerance: float refills can stop a hair short of a whole token,
+                # and a sub-ulp wait would never advance the clock
+                if self._tokens >= tokens - 1e-9:
+                    self._tokens = max(0.0, self._tokens - tokens)
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class DailyQuota:
+    """
+    Persistent daily budget. reserve() is atomic across threads and processes
+    (single UPDATE guarded by the limit), so concurrent jobs never overshoot.
+    """
+
+    def __init__(self, db_path, source, limit, today=None):
+        self.db_path = db_path
+        self.source = source
+        self.limit = limit
+        self._today = today or (lambda: datetime.now().strftime("%Y%m%d"))
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def used(self):
+        with self._connect() as conn:
+            row = conn.execute("SELECT used FROM api_quota WHERE source = ? AND day = ?",
+                               (self.source, self._today())).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self):
+        return max(0, self.limit - self.used())
+
+    def reserve(self, n=1):
+        """Take n requests from today's budget; False if that would exceed the limit."""
+        day = self._today()
+        conn = self._connect()
+        try:
+            conn.execute("INSERT OR IGNORE INTO api_quota (source, day, used) VALUES (?, ?, 0)", (self.source, day))
+            cur = conn.execute("""
+                UPDATE api_quota SET used = used + ?
+                WHERE source = ? AND day = ? AND used + ? <= ?
+            """, (n, self.source, day, n, self.limit))
+            conn.commit()
+            return cur.rowcount == 1
+        finally:
+            conn.close()
+
+
+class RequestScheduler:
+    def __init__(self, bucket, quota=None, workers=4):
+        self.bucket = bucket
+        self.quota = quota
+        self.workers = workers
+        self._stopped = threading.Event()
+
+    def stop(self):
+        """Refuse further calls (e.g. upstream reported its own limit)."""
+        self._stopped.set()
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def call(self, fn):
+        """Run one upstream request within quota and rate."""
+        if self._stopped.is_set():
+            raise QuotaExhausted("scheduler stopped")
+        if self.quota is not None and not self.quota.reserve():
+            self.stop()
+            raise QuotaExhausted(f"daily quota of {self.quota.limit} for {self.quota.source} used up")
+        self.bucket.acquire()
+        return fn()
+
+    def map(self, fn, items):
+        """fn(item) for every item on the worker pool; results in input order."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(fn, items))
@@ -0,0 +1,202 @@
+"""
+Record/replay data-source layer for the ingest scripts.
+
+Every upstream we talk to (pykrx.stock, OpenDART, Naver over HTTP) is
+wrapped in a proxy so the batch code stays unchanged (`stock.get_...`,
+`dart.finstate(...)`, `http.get(...)`) while the mode decides where the data
+comes from:
+
+- live:   pass-through to the real library (default)
+- record: pass-through, and every result/exception is pickled to a fixture
+- replay: served from fixtures only, with optional artificial latency
+
+Mode is chosen by environment so the scripts need no new flags:
+    DATA_SOURCE_MODE=live|record|replay
+    DATA_SOURCE_FIXTURES=<dir>        (default: ./fixtures next to this file)
+    DATA_SOURCE_LATENCY_MS=<float>    (replay only, per call)
+"""
+import os
+import time
+import pickle
+import hashlib
+import threading
+from collections import namedtuple
+
+MODE_LIVE = "live"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+HttpResponse = namedtuple("HttpResponse", ["status_code", "text"])
+
+
+class FixtureNotFound(LookupError):
+    """Replay was asked for a call that was never recorded."""
+
+
+class RecordedError(Exception):
+    """Stand-in for a recorded exception that could not be pickled."""
+
+
+def fixture_key(method, args=(), kwargs=None):
+    """Stable file name for one call: method name + hash of its arguments."""
+    payload = repr((tuple(args), sorted((kwargs or {}).items())))
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+    return f"{method}-{digest}"
+
+
+class LiveSource:
+    """Pass-through proxy. The base class the other modes build on."""
+
+    mode = MODE_LIVE
+
+    def __init__(self, name, target):
+        self.name = name
+        self._target = target
+
+    def __getattr__(self, attr):
+        return getattr(self._target, attr)
+
+
+class RecordingSource(LiveSource):
+    """Calls the real target and pickles each outcome under fixture_dir/name/."""
+
+    mode = MODE_RECORD
+
+    def __init__(self, name, target, fixture_dir=DEFAULT_FIXTURE_DIR):
+        super().__init__(name, target)
+        self._dir = os.path.join(fixture_dir, name)
+        os.makedirs(self._dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _save(self, key, record):
+        path = os.path.join(self._dir, key + '.pkl')
+        try:
+            blob = pickle.dumps(record)
+        except Exception:
+            # Some library exceptions carry sockets/sessions; keep the message only.
+            blob = pickle.dumps({"ok": False, "error": RecordedError(repr(record.get("error")))})
+        with self._lock:
+            with open(path, 'wb') as f:
+                f.write(blob)
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if not callable(value):
+            # Properties such as OpenDartReader.corp_codes
+            self._save(f"{attr}.attr", {"ok": True, "value": value})
+            return value
+
+        def recorded_call(*args, **kwargs):
+            key = fixture_key(attr, args, kwargs)
+            try:
+                result = value(*args, **kwargs)
+            except Exception as e:
+                self._save(key, {"ok": False, "error": e})
+                raise
+            self._save(key, {"ok": True, "value": result})
+            return result
+
+        return recorded_call
+
+
+class ReplaySource:
+    """Serves recorded fixtures. No network, no upstream import."""
+
+    mode = MODE_REPLAY
+
+    def __init__(self, name, fixture_dir=DEFAULT_FIXTURE_DIR, latency=0.0):
+        self.name = name
+        self.latency = latency
+        self._dir = os.path.join(fixture_dir, name)
+
+    def _load(self, key):
+        path = os.path.join(self._dir, key + '.pkl')
+        if not os.path.exists(path):
+            raise FixtureNotFound(f"[{self.name}] no fixture for {key}")
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _unwrap(self, record):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if record["ok"]:
+            return record["value"]
+        raise record["error"]
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        attr_path = os.path.join(self._dir, f"{attr}.attr.pkl")
+        if os.path.exists(attr_path):
+            return self._unwrap(self._load(f"{attr}.attr"))
+
+        def replayed_call(*args, **kwargs):
+            return self._unwrap(self._load(fixture_key(attr, args, kwargs)))
+
+        return replayed_call
+
+
+def open_source(name, factory, mode=None, fixture_dir=None, latency=None):
+    """
+    Build the proxy for one upstream.
+    factory: zero-arg callable returning the live target. Never called in replay
+    mode, so replay works without the upstream package or credentials.
+    """
+    mode = mode or os.getenv("DATA_SOURCE_MODE", MODE_LIVE)
+    fixture_dir = fixture_dir or os.getenv("DATA_SOURCE_FIXTURES", DEFAULT_FIXTURE_DIR)
+
+    if mode == MODE_REPLAY:
+        if latency is None:
+            latency = float(os.getenv("DATA_SOURCE_LATENCY_MS", "0")) / 1000.0
+        return ReplaySource(name, fixture_dir, latency)
+    if mode == MODE_RECORD:
+        return RecordingSource(name, factory(), fixture_dir)
+    if mode == MODE_LIVE:
+        return LiveSource(name, factory())
+    raise ValueError(f"Unknown DATA_SOURCE_MODE: {mode}")
+
+
+# --- Upstream factories ---
+
+class HttpClient:
+    """
+    Minimal GET client so HTTP scrapers can be recorded like library calls.
+    One keep-alive session; pool_size connections per host for concurrent callers.
+    """
+
+    def __init__(self, pool_size=10):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def get(self, url, headers=None, timeout=10):
+        response = self._session.get(url, headers=headers, timeout=timeout)
+        return HttpResponse(response.status_code, response.text)
+
+
+def _load_pykrx():
+    from pykrx import stock
+    return stock
+
+
+def krx_source(**kwargs):
+    """pykrx.stock behind the record/replay proxy."""
+    return open_source("krx", _load_pykrx, **kwargs)
+
+
+def dart_source(api_key, **kwargs):
+    """OpenDART client (data_sources.dart_api.DartApi) behind the record/replay proxy."""
+    def factory():
+        from data_sources.dart_api import DartApi
+        return DartApi(api_key)
+    return open_source("dart", factory, **kwargs)
+
+
+def http_source(name="naver", pool_size=10, **kwargs):
+    """HttpClient behind the record/replay proxy."""
+    return open_source(name, lambda: HttpClient(pool_size), **kwargs)
@@ -1,9 +1,18 @@
 import sqlite3
 import os
+import re
+from migrate_db_compact import is_compact
 
 DB_PATH = os.path.join(os.path.dirname(__file__), '../../dailyport.db')
 SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'schema_sqlite.sql')
 
+def strip_view_indexes(schema_sql):
+    """
+    After migrate_db_compact.py, daily_price / daily_supply are views (their indexes
+    live on the *_compact tables), so the legacy index statements must be skipped.
+    """
+    return re.sub(r"(?m)^CREATE INDEX[^;]*\bON daily_(price|supply)\b[^;]*;\s*$", "", schema_sql)
+
 def init_db():
     print(f"🚀 Initializing Local Database at: {DB_PATH}")
     
@@ -19,6 +28,9 @@ def init_db():
         print(f"❌ Schema file not found at {SCHEMA_PATH}")
         return
 
+    if is_compact(conn):
+        schema_sql = strip_view_indexes(schema_sql)
+
     # Execute Schema
     try:
         cursor.executescript(schema_sql)
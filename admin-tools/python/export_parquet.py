@@ -0,0 +1,203 @@
+import sqlite3
+import os
+import logging
+import pandas as pd
+
+# Columnar copy of the SQLite data lake for research-style reads.
+# Layout (hive partitioning, one directory per trading day):
+#   <PARQUET_DIR>/daily_price/date=YYYYMMDD/part-0.parquet
+#   <PARQUET_DIR>/daily_supply/date=YYYYMMDD/part-0.parquet
+#   <PARQUET_DIR>/tickers.parquet
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '../../dailyport.db')
+PARQUET_DIR = os.path.join(os.path.dirname(__file__), '../../parquet')
+PARTITIONED_TABLES = ("daily_price", "daily_supply")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+    except ImportError:
+        raise ImportError("pyarrow is required for the Parquet export (pip install pyarrow)")
+
+
+def arrow_type(decl):
+    """Arrow type for a declared SQLite column type (SQLite affinity rules)."""
+    import pyarrow as pa
+    decl = (decl or '').upper()
+    if 'INT' in decl:
+        return pa.int64()
+    if any(t in decl for t in ('CHAR', 'CLOB', 'TEXT', 'DATE', 'TIME')):
+        return pa.string()
+    if 'BLOB' in decl:
+        return pa.binary()
+    return pa.float64()
+
+
+def table_schema(conn, table):
+    """
+    One Arrow schema per table, from PRAGMA table_info (partition column excluded).
+    Every partition is written with it, so a day where a column is entirely NULL
+    (e.g. pension before it was collected) does not come out as a null-typed column
+    that conflicts with the other partitions.
+    """
+    import pyarrow as pa
+    cols = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return pa.schema([(name, arrow_type(decl)) for _, name, decl, *_ in cols if name != 'date'])
+
+
+def existing_partitions(table_dir):
+    """Dates (YYYYMMDD) already written under table_dir."""
+    if not os.path.isdir(table_dir):
+        return set()
+    return {
+        name.split('=', 1)[1]
+        for name in os.listdir(table_dir)
+        if name.startswith('date=') and os.path.exists(os.path.join(table_dir, name, 'part-0.parquet'))
+    }
+
+
+def export_table(conn, table, out_dir=PARQUET_DIR, since=None):
+    """
+    Append new date partitions of `table`.
+    Partitions already on disk are skipped unless their date >= since,
+    which re-exports late corrections (e.g. --repair-supply).
+    Returns the number of partitions written.
+    """
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table_dir = os.path.join(out_dir, table)
+    done = existing_partitions(table_dir)
+    schema = table_schema(conn, table)
+
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT DISTINCT date FROM {table}")
+    # Schema allows both YYYYMMDD and YYYY-MM-DD; partitions always use YYYYMMDD
+    raw_dates = {}
+    for (d,) in cursor.fetchall():
+        raw_dates.setdefault(str(d).replace('-', ''), []).append(d)
+
+    todo = sorted(
+        d for d in raw_dates
+        if d not in done or (since and d >= since)
+    )
+    if not todo:
+        print(f"   {table}: up to date ({len(done)} partitions)")
+        return 0
+
+    for date_key in todo:
+        variants = raw_dates[date_key]
+        placeholders = ','.join(['?'] * len(variants))
+        df = pd.read_sql_query(
+            f"SELECT * FROM {table} WHERE date IN ({placeholders})", conn, params=variants
+        )
+        df = df.drop(columns=['date'])
+        part_dir = os.path.join(table_dir, f"date={date_key}")
+        os.makedirs(part_dir, exist_ok=True)
+        # Write then rename so a crash never leaves a half-written partition that looks done
+        tmp_path = os.path.join(part_dir, 'part-0.parquet.tmp')
+        pq.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False), tmp_path)
+        os.replace(tmp_path, os.path.join(part_dir, 'part-0.parquet'))
+
+    # Readers take the dataset schema from here instead of inferring it from one file
+    pq.write_metadata(schema, os.path.join(table_dir, '_common_metadata'))
+
+    print(f"   ✅ {table}: {len(todo)} partitions written ({todo[0]} ~ {todo[-1]})")
+    return len(todo)
+
+
+def export_tickers(conn, out_dir=PARQUET_DIR):
+    """Ticker master is small; rewrite it whole."""
+    _require_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    df = pd.read_sql_query("SELECT * FROM tickers", conn)
+    df.to_parquet(os.path.join(out_dir, 'tickers.parquet'), engine='pyarrow', index=False)
+    return len(df)
+
+
+def export_all(conn, out_dir=PARQUET_DIR, since=None):
+    print(f"📦 Exporting SQLite -> Parquet ({out_dir})...")
+    written = {table: export_table(conn, table, out_dir, since) for table in PARTITIONED_TABLES}
+    n_tickers = export_tickers(conn, out_dir)
+    print(f"✨ Parquet export finished. (tickers: {n_tickers})")
+    return written
+
+
+def _dataset(table, base_dir):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    table_dir = os.path.join(base_dir, table)
+    partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+    schema = None
+    metadata_path = os.path.join(table_dir, '_common_metadata')
+    if os.path.exists(metadata_path):
+        schema = pq.read_schema(metadata_path).append(pa.field("date", pa.string()))
+    return ds.dataset(table_dir, format="parquet", partitioning=partitioning, schema=schema)
+
+
+def _build_filter(start=None, end=None, codes=None, filters=None):
+    import pyarrow.dataset as ds
+    ops = {
+        '=': lambda f, v: f == v, '==': lambda f, v: f == v, '!=': lambda f, v: f != v,
+        '<': lambda f, v: f < v, '<=': lambda f, v: f <= v,
+        '>': lambda f, v: f > v, '>=': lambda f, v: f >= v,
+        'in': lambda f, v: f.isin(list(v)),
+    }
+    expr = None
+    clauses = []
+    if start:
+        clauses.append(ds.field('date') >= start.replace('-', ''))
+    if end:
+        clauses.append(ds.field('date') <= end.replace('-', ''))
+    if codes:
+        clauses.append(ds.field('code').isin(list(codes)))
+    for col, op, value in (filters or []):
+        if op not in ops:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        clauses.append(ops[op](ds.field(col), value))
+    for clause in clauses:
+        expr = clause if expr is None else expr & clause
+    return expr
+
+
+def query(table, columns=None, start=None, end=None, codes=None, filters=None, base_dir=PARQUET_DIR):
+    """
+    Read a partitioned table with column and predicate pushdown.
+    Only partitions within [start, end] are opened and only `columns` are decoded.
+    filters: extra [(column, op, value)] predicates, op in = != < <= > >= in
+    Example: query('daily_supply', ['code', 'date', 'foreigner'], start='20230101')
+    """
+    _require_pyarrow()
+    arrow_table = _dataset(table, base_dir).to_table(
+        columns=columns, filter=_build_filter(start, end, codes, filters)
+    )
+    return arrow_table.to_pandas()
+
+
+def query_arrays(table, columns, start=None, end=None, codes=None, filters=None, base_dir=PARQUET_DIR):
+    """Same as query() but returns {column: numpy array} without building a DataFrame."""
+    _require_pyarrow()
+    arrow_table = _dataset(table, base_dir).to_table(
+        columns=columns, filter=_build_filter(start, end, codes, filters)
+    )
+    return {col: arrow_table.column(col).to_numpy() for col in columns}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", type=str, default=PARQUET_DIR, help="Output directory")
+    parser.add_argument("--since", type=str, help="Re-export partitions from this date (YYYYMMDD)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        export_all(conn, args.out, args.since)
+    finally:
+        conn.close()
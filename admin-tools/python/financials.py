@@ -0,0 +1,215 @@
+import sqlite3
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Point-in-time quarterly fundamentals.
+# One row per (code, period) in the `financials` table, stamped with published_at
+# (the DART receipt date, or the statutory filing deadline when unknown).
+# Readers ask "what was known on date D" via an as-of lookup instead of reading
+# forward-filled columns from daily_price, so backfills never see future results.
+#
+# `financials_ttm` holds trailing-twelve-month sums and YoY growth derived from those
+# rows (refresh_ttm). DART's thstrm_amount is the 3-month figure for Q1-Q3 but the
+# full year for Q4, so Q4 is first made discrete (annual - Q1 - Q2 - Q3).
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '../../dailyport.db')
+
+# Statutory deadlines: quarterly/half-year reports 45 days after quarter end,
+# annual report 90 days after fiscal year end (-> next year's March 31).
+FILING_DEADLINES = {1: "0515", 2: "0814", 3: "1114", 4: "0331"}
+
+FIN_COLUMNS = ["revenue", "op_income", "net_income", "equity", "operating_margin", "roe"]
+FLOW_COLUMNS = ["revenue", "op_income", "net_income"] # income statement (summed); equity is a balance
+TTM_COLUMNS = ["revenue_ttm", "op_income_ttm", "net_income_ttm", "equity", "operating_margin_ttm", "roe_ttm",
+               "revenue_yoy", "op_income_yoy", "net_income_yoy"]
+
+
+def period_key(year, quarter):
+    """'2024Q3' - sorts chronologically as text."""
+    return f"{year}Q{quarter}"
+
+
+def filing_deadline(year, quarter):
+    """Latest date (YYYYMMDD) the report for year/quarter can be published."""
+    return f"{year + 1 if quarter == 4 else year}{FILING_DEADLINES[quarter]}"
+
+
+def published_date(rcept_no, year, quarter):
+    """
+    DART receipt numbers start with the filing date (YYYYMMDD......).
+    Falls back to the statutory deadline so a row is never visible too early.
+    """
+    text = str(rcept_no or '').strip()
+    if len(text) >= 8 and text[:8].isdigit():
+        try:
+            datetime.strptime(text[:8], "%Y%m%d")
+            return text[:8]
+        except ValueError:
+            pass
+    return filing_deadline(year, quarter)
+
+
+def upsert_financials(conn, rows):
+    """
+    rows: [{code, period, published_at, fs_div, revenue, op_income, net_income, equity,
+            operating_margin, roe}]
+    """
+    if not rows:
+        return 0
+    conn.executemany(f"""
+        INSERT OR REPLACE INTO financials
+        (code, period, published_at, fs_div, {', '.join(FIN_COLUMNS)}, updated_at)
+        VALUES (?, ?, ?, ?, {', '.join(['?'] * len(FIN_COLUMNS))}, CURRENT_TIMESTAMP)
+    """, [
+        (r["code"], r["period"], r["published_at"], r.get("fs_div"), *[r.get(c) for c in FIN_COLUMNS])
+        for r in rows
+    ])
+    return len(rows)
+
+
+def _load_asof(db, table, columns, as_of, codes=None):
+    as_of = str(as_of).replace('-', '')
+    code_filter = ""
+    params = [as_of, as_of]
+    if codes:
+        code_filter = f"AND f.code IN ({','.join(['?'] * len(codes))})"
+        params.extend(codes)
+    rows = db.execute(f"""
+        SELECT f.code, f.period, f.published_at, {', '.join('f.' + c for c in columns)}
+        FROM {table} f
+        WHERE f.published_at <= ?
+        AND f.period = (
+            SELECT MAX(g.period) FROM {table} g
+            WHERE g.code = f.code AND g.published_at <= ?
+        )
+        {code_filter}
+    """, params).fetchall()
+    result = {}
+    for r in rows:
+        d = dict(zip(["code", "period", "published_at"] + columns, tuple(r)))
+        result[d["code"]] = d
+    return result
+
+
+def load_financials_asof(db, as_of, codes=None):
+    """
+    {code: row dict} of the latest period published on or before as_of (YYYYMMDD).
+    db may be a connection or a cursor.
+    """
+    return _load_asof(db, "financials", FIN_COLUMNS, as_of, codes)
+
+
+def load_ttm_asof(db, as_of, codes=None):
+    """Same as load_financials_asof, over financials_ttm (TTM_COLUMNS)."""
+    return _load_asof(db, "financials_ttm", TTM_COLUMNS, as_of, codes)
+
+
+def load_profitability_asof(db, as_of, codes=None):
+    """
+    {code: {"roe", "operating_margin", "source"}} known on as_of, for screening.
+    Prefers the TTM window ("ttm"); tickers without four stored quarters (the nightly
+    run loads a single quarter, partial backfills, DART misses) get their latest
+    quarter instead ("quarter"), with Q1-Q3 ROE annualized (x4, Q4 is already annual).
+    """
+    result = {}
+    if has_financials(db):
+        for code, r in load_financials_asof(db, as_of, codes).items():
+            if r["roe"] is None:
+                continue
+            quarter = int(r["period"][-1])
+            result[code] = {"roe": r["roe"] * (1 if quarter == 4 else 4),
+                            "operating_margin": r["operating_margin"], "source": "quarter"}
+    if has_financials(db, "financials_ttm"):
+        for code, r in load_ttm_asof(db, as_of, codes).items():
+            if r["roe_ttm"] is not None:
+                result[code] = {"roe": r["roe_ttm"], "operating_margin": r["operating_margin_ttm"], "source": "ttm"}
+    return result
+
+
+def compute_ttm(df):
+    """
+    TTM and YoY per (code, period) from quarterly financials rows, vectorized.
+    df: code, period, published_at and the FLOW_COLUMNS + equity of `financials`.
+    TTM values are NaN unless the four quarters are consecutive and complete;
+    a Q4 row is NaN unless Q1-Q3 of the same year are stored.
+    YoY compares the discrete quarter with the same quarter a year earlier (NaN
+    when that is missing or not positive). roe_ttm uses average equity over the year.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=["code", "period", "published_at"] + TTM_COLUMNS)
+    df = df.copy()
+    df["year"] = df["period"].str[:4].astype(int)
+    df["quarter"] = df["period"].str[-1].astype(int)
+    df["idx"] = df["year"] * 4 + df["quarter"] - 1
+
+    # Q4 (annual report) -> discrete fourth quarter
+    nine_months = df[df["quarter"] < 4].groupby(["code", "year"]).agg(
+        n=("quarter", "nunique"), **{c: (c, "sum") for c in FLOW_COLUMNS})
+    prior = df.join(nine_months, on=["code", "year"], rsuffix="_9m")
+    is_q4 = df["quarter"] == 4
+    complete = prior["n"] == 3
+    for c in FLOW_COLUMNS:
+        df[c] = np.where(is_q4, np.where(complete, df[c] - prior[f"{c}_9m"], np.nan), df[c])
+
+    df = df.sort_values(["code", "idx"]).reset_index(drop=True)
+    g = df.groupby("code")
+    consecutive = (df["idx"] - g["idx"].shift(3)) == 3
+    for c in FLOW_COLUMNS:
+        total = df[c] + g[c].shift(1) + g[c].shift(2) + g[c].shift(3)
+        df[f"{c}_ttm"] = total.where(consecutive)
+    # Visible once every quarter of the window was (normally the newest one)
+    earlier = [g["published_at"].shift(k).fillna(df["published_at"]) for k in (1, 2, 3)]
+    df["published_at"] = pd.concat([df["published_at"]] + earlier, axis=1).max(axis=1)
+
+    # Same quarter one year earlier (lookup, so gaps in the history are handled)
+    year_ago = df.set_index(["code", "idx"]).reindex(pd.MultiIndex.from_arrays([df["code"], df["idx"] - 4]))
+    for c in FLOW_COLUMNS:
+        base = year_ago[c].to_numpy()
+        df[f"{c}_yoy"] = np.where(base > 0, (df[c].to_numpy() - base) / np.where(base > 0, base, 1) * 100, np.nan)
+    prev_equity = year_ago["equity"].to_numpy()
+    avg_equity = np.where(np.isnan(prev_equity), df["equity"], (df["equity"] + prev_equity) / 2)
+
+    df["operating_margin_ttm"] = np.where(df["revenue_ttm"] != 0,
+                                          df["op_income_ttm"] / df["revenue_ttm"].where(df["revenue_ttm"] != 0, 1) * 100,
+                                          np.nan)
+    df["roe_ttm"] = np.where(avg_equity > 0, df["net_income_ttm"] / np.where(avg_equity > 0, avg_equity, 1) * 100,
+                             np.nan)
+    return df[["code", "period", "published_at"] + TTM_COLUMNS]
+
+
+def refresh_ttm(conn, codes=None):
+    """Recompute financials_ttm for codes (all when None) from stored quarters. Returns rows written."""
+    code_filter, params = "", []
+    if codes:
+        code_filter = f"WHERE code IN ({','.join(['?'] * len(codes))})"
+        params = list(codes)
+    df = pd.read_sql_query(f"""
+        SELECT code, period, published_at, {', '.join(FLOW_COLUMNS)}, equity
+        FROM financials {code_filter}
+    """, conn, params=params)
+    ttm = compute_ttm(df)
+    if ttm.empty:
+        return 0
+    values = ttm[TTM_COLUMNS].astype(float)
+    values = values.astype(object).where(values.notna(), None)
+    conn.executemany(f"""
+        INSERT OR REPLACE INTO financials_ttm
+        (code, period, published_at, {', '.join(TTM_COLUMNS)}, updated_at)
+        VALUES (?, ?, ?, {', '.join(['?'] * len(TTM_COLUMNS))}, CURRENT_TIMESTAMP)
+    """, [
+        (code, period, published_at, *vals)
+        for (code, period, published_at), vals in zip(
+            ttm[["code", "period", "published_at"]].itertuples(index=False, name=None),
+            values.itertuples(index=False, name=None))
+    ])
+    return len(ttm)
+
+
+def has_financials(db, table="financials"):
+    """False on DBs that only carry the legacy forward-filled daily_price columns."""
+    try:
+        return db.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is not None
+    except sqlite3.OperationalError:
+        return False
@@ -0,0 +1,216 @@
+import sqlite3
+import os
+import time
+
+# Online migration of daily_price / daily_supply to a compact layout:
+#   - ticker_ids maps the 6-char code to a small integer id
+#   - dates are stored as INTEGER YYYYMMDD (both 'YYYYMMDD' and 'YYYY-MM-DD' inputs accepted)
+#   - <table>_compact is WITHOUT ROWID, clustered on (code_id, day) -> per-ticker range
+#     scans read consecutive pages
+#   - a covering (day, code_id, ...) index serves the date-first screening scans
+#   - daily_price / daily_supply become views with INSTEAD OF triggers, so existing
+#     SELECT / INSERT OR REPLACE / UPDATE statements keep working unchanged.
+#     The view's `date` column is INTEGER; '20250102' parameters still compare equal
+#     via SQLite column affinity and still use the index.
+#
+# Write semantics through the views (views have no defaults or unique constraints):
+#   - columns with a DEFAULT get it via COALESCE in the insert trigger, so an omitted
+#     (or explicit NULL) pension still stores 0
+#   - INSERT OR IGNORE / OR REPLACE behave as on the old tables (the outer conflict
+#     policy applies to the trigger body); a plain INSERT of an existing key replaces
+#     the row instead of failing
+#   - INSERT ... ON CONFLICT DO UPDATE (UPSERT) is rejected by SQLite on a view
+#     ("cannot UPSERT a view"); write these tables with INSERT OR REPLACE / UPDATE
+#
+# The copy runs in small per-ticker batches (each its own transaction) while the old
+# tables stay live; only the final swap takes a short write lock.
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '../../dailyport.db')
+
+COMPACT_TABLES = {
+    # table: (extra covering-index columns for date-first scans)
+    "daily_price": ["close", "market_cap", "volume"],
+    "daily_supply": ["foreigner", "institution", "pension"],
+}
+LEGACY_INDEXES = ["idx_price_code", "idx_price_date", "idx_supply_code", "idx_supply_date"]
+COPY_BATCH_TICKERS = 200
+
+DAY_EXPR = "CAST(replace({}, '-', '') AS INTEGER)"
+
+
+def is_compact(conn):
+    """True once daily_price has been swapped for the compatibility view."""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'daily_price'").fetchone()
+    return bool(row) and row[0] == 'view'
+
+
+def _value_columns(conn, table):
+    """(name, declared type, default expression or None) of every column except the key."""
+    return [(r[1], r[2] or '', r[4]) for r in conn.execute(f"PRAGMA table_info({table})")
+            if r[1] not in ('code', 'date')]
+
+
+def _create_compact_objects(conn, table, columns):
+    col_defs = ''.join(f",\n    {name} {ctype}{'' if dflt is None else ' DEFAULT ' + dflt}"
+                       for name, ctype, dflt in columns)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table}_compact (
+            code_id INTEGER NOT NULL,
+            day INTEGER NOT NULL{col_defs},
+            PRIMARY KEY (code_id, day)
+        ) WITHOUT ROWID
+    """)
+    names = {n for n, _, _ in columns}
+    covering = [c for c in COMPACT_TABLES[table] if c in names]
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{table}_compact_day
+        ON {table}_compact (day, code_id{''.join(', ' + c for c in covering)})
+    """)
+
+
+def _create_view_and_triggers(conn, table, columns):
+    names = [n for n, _, _ in columns]
+    select_cols = ''.join(f", c.{n} AS {n}" for n in names)
+    conn.execute(f"""
+        CREATE VIEW {table} AS
+        SELECT t.code AS code, c.day AS date{select_cols}
+        FROM {table}_compact c JOIN ticker_ids t ON t.id = c.code_id
+    """)
+
+    code_id = "(SELECT id FROM ticker_ids WHERE code = {}.code)"
+    col_list = ''.join(f", {n}" for n in names)
+    new_vals = ''.join(f", NEW.{n}" if dflt is None else f", COALESCE(NEW.{n}, {dflt})"
+                       for n, _, dflt in columns)
+    conn.execute(f"""
+        CREATE TRIGGER {table}_insert INSTEAD OF INSERT ON {table}
+        BEGIN
+            INSERT OR IGNORE INTO ticker_ids (code) VALUES (NEW.code);
+            INSERT OR REPLACE INTO {table}_compact (code_id, day{col_list})
+            VALUES ({code_id.format('NEW')}, {DAY_EXPR.format('NEW.date')}{new_vals});
+        END
+    """)
+    set_list = ', '.join(f"{n} = NEW.{n}" for n in names)
+    conn.execute(f"""
+        CREATE TRIGGER {table}_update INSTEAD OF UPDATE ON {table}
+        BEGIN
+            UPDATE {table}_compact SET {set_list}
+            WHERE code_id = {code_id.format('OLD')} AND day = OLD.date;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {table}_delete INSTEAD OF DELETE ON {table}
+        BEGIN
+            DELETE FROM {table}_compact
+            WHERE code_id = {code_id.format('OLD')} AND day = OLD.date;
+        END
+    """)
+
+
+def _copy_rows(conn, source, table, columns, codes=None, min_date=None):
+    names = ''.join(f", s.{n}" for n, _, _ in columns)
+    targets = ''.join(f", {n}" for n, _, _ in columns)
+    where, params = [], []
+    if codes is not None:
+        where.append(f"s.code IN ({','.join(['?'] * len(codes))})")
+        params.extend(codes)
+    if min_date is not None:
+        where.append(f"{DAY_EXPR.format('s.date')} >= ?")
+        params.append(min_date)
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {table}_compact (code_id, day{targets})
+        SELECT t.id, {DAY_EXPR.format('s.date')}{names}
+        FROM {source} s JOIN ticker_ids t ON t.code = s.code
+        {('WHERE ' + ' AND '.join(where)) if where else ''}
+    """, params)
+
+
+def migrate(conn, drop_legacy=False):
+    if is_compact(conn):
+        print("✅ Compact layout already in place.")
+        return False
+
+    print("🛠 Migrating daily_price / daily_supply to the compact layout...")
+    started = time.time()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ticker_ids (
+            id INTEGER PRIMARY KEY,
+            code TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO ticker_ids (code)
+        SELECT code FROM tickers
+        UNION SELECT DISTINCT code FROM daily_price
+        UNION SELECT DISTINCT code FROM daily_supply
+    """)
+    columns = {table: _value_columns(conn, table) for table in COMPACT_TABLES}
+    for table, cols in columns.items():
+        _create_compact_objects(conn, table, cols)
+    conn.commit()
+
+    # 1. Online bulk copy, a batch of tickers per transaction
+    high_water = {}
+    for table, cols in columns.items():
+        high_water[table] = conn.execute(
+            f"SELECT MAX({DAY_EXPR.format('date')}) FROM {table}"
+        ).fetchone()[0] or 0
+        codes = [r[0] for r in conn.execute(f"SELECT DISTINCT code FROM {table} ORDER BY code")]
+        for i in range(0, len(codes), COPY_BATCH_TICKERS):
+            _copy_rows(conn, table, table, cols, codes=codes[i:i + COPY_BATCH_TICKERS])
+            conn.commit()
+        print(f"   {table}: copied {len(codes)} tickers")
+
+    # 2. Swap under one short write transaction. Rows written to the newest days while
+    #    the copy was running are re-copied first.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Change-capture triggers (changelog.py) follow the data to the compact tables
+        from changelog import enabled_tables, enable, disable
+        captured = enabled_tables(conn)
+        disable(conn, captured)
+        conn.execute("""
+            INSERT OR IGNORE INTO ticker_ids (code)
+            SELECT DISTINCT code FROM daily_price UNION SELECT DISTINCT code FROM daily_supply
+        """)
+        for table, cols in columns.items():
+            _copy_rows(conn, table, table, cols, min_date=high_water[table])
+        for idx in LEGACY_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {idx}")
+        for table, cols in columns.items():
+            conn.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+            _create_view_and_triggers(conn, table, cols)
+        enable(conn, captured)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if drop_legacy:
+        drop_legacy_tables(conn)
+
+    print(f"✅ Compact layout ready in {time.time() - started:.1f}s"
+          f"{'' if drop_legacy else ' (old tables kept as *_legacy; rerun with --drop-legacy to reclaim space)'}")
+    return True
+
+
+def drop_legacy_tables(conn):
+    for table in COMPACT_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}_legacy")
+    conn.commit()
+    conn.execute("VACUUM")
+    print("🧹 Legacy tables dropped and DB vacuumed.")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drop-legacy", action="store_true", help="Drop *_legacy tables and VACUUM")
+    args = parser.parse_args()
+
+    print(f"Migrating DB at {DB_PATH}...")
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if not migrate(conn, drop_legacy=args.drop_legacy) and args.drop_legacy:
+            drop_legacy_tables(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,302 @@
+import sqlite3
+import os
+import json
+import logging
+import numpy as np
+
+# Persistent memory-mapped price panel.
+# One fixed-dtype matrix per field, laid out [ticker_row x trading_day_col] (C order),
+# plus meta.json holding the ticker<->row and calendar<->column maps.
+# Files are over-allocated so a new trading day is written in place as one column;
+# readers open them read-only and share the OS page cache across processes.
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '../../dailyport.db')
+PANEL_DIR = os.path.join(os.path.dirname(__file__), '../../panel')
+
+FIELDS = {
+    "open": np.float32,
+    "high": np.float32,
+    "low": np.float32,
+    "close": np.float32,
+    "volume": np.int64,
+    "market_cap": np.int64,
+    "foreigner": np.int64,
+    "institution": np.int64,
+    "pension": np.int64,
+}
+PRICE_FIELDS = ["open", "high", "low", "close", "volume", "market_cap"]
+SUPPLY_FIELDS = ["foreigner", "institution", "pension"]
+
+DAY_CHUNK = 256      # columns added per growth step
+TICKER_CHUNK = 512   # rows added per growth step
+
+
+def _fill_value(dtype):
+    return np.nan if np.issubdtype(dtype, np.floating) else 0
+
+
+class PricePanel:
+    """
+    Memory-mapped [ticker x day] matrices. Missing prices are NaN, missing flows 0.
+
+    panel = PricePanel.open()
+    closes = panel.field("close")                 # zero-copy view, all tickers/days
+    hist = panel.history("005930", "close", 120)  # last 120 closes, oldest first
+    """
+
+    def __init__(self, path, meta, writable):
+        self.path = path
+        self.writable = writable
+        self.tickers = meta["tickers"]
+        self.calendar = meta["calendar"]
+        self.cap_tickers = meta["cap_tickers"]
+        self.cap_days = meta["cap_days"]
+        self.row_of = {code: i for i, code in enumerate(self.tickers)}
+        self.col_of = {date: j for j, date in enumerate(self.calendar)}
+        self._maps = {}
+        self._open_maps()
+
+    # --- Open / Create ---
+
+    @classmethod
+    def open(cls, path=PANEL_DIR, writable=False):
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            if not writable:
+                raise FileNotFoundError(f"No price panel at {path}. Run price_panel.py to build it.")
+            os.makedirs(path, exist_ok=True)
+            meta = {"tickers": [], "calendar": [], "cap_tickers": TICKER_CHUNK, "cap_days": DAY_CHUNK}
+            for name, dtype in FIELDS.items():
+                mm = np.memmap(cls._file(path, name), dtype=dtype, mode='w+',
+                               shape=(meta["cap_tickers"], meta["cap_days"]))
+                mm[:] = _fill_value(dtype)
+                mm.flush()
+                del mm
+            cls._write_meta(path, meta)
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(path, meta, writable)
+
+    @staticmethod
+    def _file(path, name):
+        return os.path.join(path, f"{name}.bin")
+
+    @staticmethod
+    def _write_meta(path, meta):
+        tmp = os.path.join(path, 'meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, 'meta.json'))
+
+    def _open_maps(self):
+        mode = 'r+' if self.writable else 'r'
+        for name, dtype in FIELDS.items():
+            self._maps[name] = np.memmap(self._file(self.path, name), dtype=dtype, mode=mode,
+                                         shape=(self.cap_tickers, self.cap_days))
+
+    # --- Read API (zero-copy views) ---
+
+    @property
+    def n_tickers(self):
+        return len(self.tickers)
+
+    @property
+    def n_days(self):
+        return len(self.calendar)
+
+    def field(self, name):
+        """[n_tickers x n_days] view of one field."""
+        return self._maps[name][:self.n_tickers, :self.n_days]
+
+    def history(self, code, name, length=None, end_date=None):
+        """1-D view of one ticker's series (oldest first), optionally ending at end_date."""
+        row = self.row_of[code]
+        end = self.n_days if end_date is None else self.col_of[end_date] + 1
+        start = 0 if length is None else max(0, end - length)
+        return self._maps[name][row, start:end]
+
+    def cross_section(self, name, date):
+        """All tickers' values for one day."""
+        return self._maps[name][:self.n_tickers, self.col_of[date]]
+
+    # --- Write API ---
+
+    def _grow(self, need_tickers, need_days):
+        new_cap_t = self.cap_tickers
+        while new_cap_t < need_tickers:
+            new_cap_t += TICKER_CHUNK
+        new_cap_d = self.cap_days
+        while new_cap_d < need_days:
+            new_cap_d += DAY_CHUNK
+        if (new_cap_t, new_cap_d) == (self.cap_tickers, self.cap_days):
+            return
+
+        logger.info(f"Growing panel to {new_cap_t} tickers x {new_cap_d} days")
+        for name, dtype in FIELDS.items():
+            old = self._maps[name]
+            tmp_path = self._file(self.path, name) + '.tmp'
+            new = np.memmap(tmp_path, dtype=dtype, mode='w+', shape=(new_cap_t, new_cap_d))
+            new[:] = _fill_value(dtype)
+            new[:self.cap_tickers, :self.cap_days] = old
+            new.flush()
+            del new
+            self._maps[name] = None
+            del old
+            os.replace(tmp_path, self._file(self.path, name))
+        self.cap_tickers, self.cap_days = new_cap_t, new_cap_d
+        self._open_maps()
+
+    def append_day(self, date, rows):
+        """
+        Write one trading day as a new column.
+        rows: {code: {field: value}}; fields not given keep the fill value.
+        """
+        if not self.writable:
+            raise PermissionError("Panel opened read-only")
+        if self.calendar and date <= self.calendar[-1]:
+            raise ValueError(f"{date} is not after last panel date {self.calendar[-1]}")
+
+        self._add_tickers(rows)
+        self._grow(len(self.tickers), len(self.calendar) + 1)
+
+        col = len(self.calendar)
+        self._write_column(col, rows)
+        self.calendar.append(date)
+        self.col_of[date] = col
+        self.flush()
+
+    def rewrite_day(self, date, rows):
+        """
+        Overwrite an existing trading day in place (late corrections, supply repair).
+        The column is reset to fill values first, so rows replaces it entirely.
+        """
+        if not self.writable:
+            raise PermissionError("Panel opened read-only")
+        if date not in self.col_of:
+            raise KeyError(f"{date} is not in the panel")
+
+        self._add_tickers(rows)
+        self._grow(len(self.tickers), len(self.calendar))
+
+        col = self.col_of[date]
+        for name, dtype in FIELDS.items():
+            self._maps[name][:, col] = _fill_value(dtype)
+        self._write_column(col, rows)
+        self.flush()
+
+    def truncate(self, date):
+        """Drop every panel day on or after date (reset to fill values), so earlier days can be appended."""
+        if not self.writable:
+            raise PermissionError("Panel opened read-only")
+        keep = sum(1 for d in self.calendar if d < date)
+        for name, dtype in FIELDS.items():
+            self._maps[name][:, keep:] = _fill_value(dtype)
+        for d in self.calendar[keep:]:
+            del self.col_of[d]
+        del self.calendar[keep:]
+        self.flush()
+
+    def _add_tickers(self, codes):
+        for code in codes:
+            if code not in self.row_of:
+                self.row_of[code] = len(self.tickers)
+                self.tickers.append(code)
+
+    def _write_column(self, col, rows):
+        idx = np.fromiter((self.row_of[c] for c in rows), dtype=np.int64, count=len(rows))
+        for name, dtype in FIELDS.items():
+            values = [r.get(name) for r in rows.values()]
+            if all(v is None for v in values):
+                continue
+            fill = _fill_value(dtype)
+            arr = np.array([fill if v is None else v for v in values], dtype=np.float64)
+            self._maps[name][idx, col] = arr.astype(dtype)
+
+    def flush(self):
+        for mm in self._maps.values():
+            mm.flush()
+        self._write_meta(self.path, {
+            "tickers": self.tickers,
+            "calendar": self.calendar,
+            "cap_tickers": self.cap_tickers,
+            "cap_days": self.cap_days,
+        })
+
+
+def sync_panel(conn, path=PANEL_DIR, since=None):
+    """
+    Append one column per trading day present in SQLite but not yet in the panel.
+    since (YYYYMMDD): also re-read panel days on or after this date and overwrite
+    them in place, so corrections made in SQLite after a day was appended
+    (supply repair, late pykrx revisions) reach the panel. Stored days older than
+    the panel's last day that it does not have (backfills) are appended by cutting
+    the panel back to the earliest of them.
+    Returns the number of days appended.
+    """
+    panel = PricePanel.open(path, writable=True)
+    last = panel.calendar[-1] if panel.calendar else None
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT date FROM daily_price")
+    by_key = {}
+    for (d,) in cursor.fetchall():
+        by_key.setdefault(str(d).replace('-', ''), []).append(d)
+    # Days older than the panel's end that it never got (backfill into a gap): the
+    # calendar is append-only, so cut it back to the first one and re-append from there
+    missing = sorted(d for d in by_key if last is not None and d < last and d not in panel.col_of)
+    if missing:
+        logger.warning(f"Price panel: {len(missing)} stored days before {last} are not in the panel "
+                       f"({missing[0]} ~ {missing[-1]}); re-appending from {missing[0]}")
+        panel.truncate(missing[0])
+        last = panel.calendar[-1] if panel.calendar else None
+    new_dates = sorted(d for d in by_key if last is None or d > last)
+    since = since.replace('-', '') if since else None
+    stale_dates = sorted(d for d in by_key if since and d >= since and d in panel.col_of)
+    supply_cols = [c for c in SUPPLY_FIELDS if c in _columns(conn, "daily_supply")]
+
+    for date_key in stale_dates:
+        panel.rewrite_day(date_key, _read_day(cursor, by_key[date_key], supply_cols))
+    for date_key in new_dates:
+        panel.append_day(date_key, _read_day(cursor, by_key[date_key], supply_cols))
+
+    if stale_dates:
+        print(f"🧮 Price panel: rewrote {len(stale_dates)} days ({stale_dates[0]} ~ {stale_dates[-1]})")
+    if new_dates:
+        print(f"🧮 Price panel: appended {len(new_dates)} days ({new_dates[0]} ~ {new_dates[-1]}), "
+              f"{panel.n_tickers} tickers x {panel.n_days} days")
+    return len(new_dates)
+
+
+def _read_day(cursor, variants, supply_cols):
+    """{code: {field: value}} for one trading day (all stored date spellings)."""
+    placeholders = ','.join(['?'] * len(variants))
+    rows = {}
+    cursor.execute(f"SELECT code, {', '.join(PRICE_FIELDS)} FROM daily_price WHERE date IN ({placeholders})", variants)
+    for r in cursor.fetchall():
+        rows[r[0]] = dict(zip(PRICE_FIELDS, r[1:]))
+
+    if supply_cols:
+        cursor.execute(f"SELECT code, {', '.join(supply_cols)} FROM daily_supply WHERE date IN ({placeholders})", variants)
+        for r in cursor.fetchall():
+            rows.setdefault(r[0], {}).update(zip(supply_cols, r[1:]))
+    return rows
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--since", type=str, help="Also rewrite panel days from this date (YYYYMMDD)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        sync_panel(conn, since=args.since)
+    finally:
+        conn.close()
@@ -0,0 +1,410 @@
+import sqlite3
+import os
+import sys
+import json
+import time
+import random
+import statistics
+import tempfile
+from datetime import datetime, timedelta
+
+# Query-plan regression check for the analyzer's hot SQL.
+# Builds a synthetic DB from schema_sqlite.sql (optionally migrated to the compact
+# layout), runs EXPLAIN QUERY PLAN on every statement in HOT_QUERIES and fails if a
+# plan falls back to a full SCAN of the data tables or a temp B-tree. Optionally
+# times each statement and compares it with a stored baseline.
+# source_drift() fails when a copied statement no longer appears in its call site,
+# so an edited query cannot silently keep passing on a stale copy.
+#
+#   python query_plan_check.py                 # plans only (legacy + compact layout)
+#   python query_plan_check.py --timings       # plans + timings vs query_plan_baseline.json
+#   python query_plan_check.py --timings --update-baseline   # first run on a machine
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'schema_sqlite.sql')
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'query_plan_baseline.json')
+
+# name -> (sql, params(ctx), allowed plan fragments)
+# Keep the SQL text identical to the call sites it is copied from (see QUERY_SOURCES).
+HOT_QUERIES = {
+    # analyzer_daily.run_algo_screening
+    "screen_date_exists": (
+        "SELECT 1 FROM daily_price WHERE date = ? LIMIT 1",
+        lambda c: (c["date"],), ()),
+    "screen_max_price_date": (
+        "SELECT MAX(date) FROM daily_price",
+        lambda c: (), ()),
+    "screen_max_supply_date": (
+        "SELECT MAX(date) FROM daily_supply",
+        lambda c: (), ()),
+    "screen_mcap_universe": (
+        """
+        SELECT market_cap FROM daily_price p
+        JOIN tickers t ON p.code = t.code
+        WHERE p.date = ? AND t.is_active = 1 AND p.market_cap > 0
+        """,
+        lambda c: (c["date"],), ()),
+    "screen_tech_history": (
+        """
+        SELECT close, open, high, low, volume, date
+        FROM daily_price
+        WHERE code = ? AND date <= ?
+        ORDER BY date DESC LIMIT 150
+        """,
+        lambda c: (c["code"], c["date"]), ()),
+    "screen_value_picks": (
+        """
+        SELECT p.code, p.per, p.pbr, p.roe, p.operating_margin, p.market_cap, p.eps, p.close
+        FROM daily_price p
+        JOIN tickers t ON p.code = t.code
+        WHERE p.date = ? AND t.is_active = 1
+        """,
+        lambda c: (c["date"],), ()),
+    "screen_twin_engines": (
+        """
+        SELECT s.code, s.foreigner, s.institution, p.market_cap, p.close
+        FROM daily_supply s
+        JOIN daily_price p ON s.code = p.code AND s.date = p.date
+        JOIN tickers t ON s.code = t.code
+        WHERE s.date = ? AND t.is_active = 1
+        AND s.foreigner > 0 AND s.institution > 0
+        """,
+        lambda c: (c["date"],), ()),
+    "screen_foreigner_acc_sum": (
+        """
+        SELECT code, SUM(foreigner) as f_sum
+        FROM daily_supply
+        WHERE date >= strftime('%Y%m%d', 'now', '-21 days') AND date <= ?
+        GROUP BY code HAVING f_sum > 0
+        """,
+        # Aggregating a 21-day index range needs a small sort; a full scan does not pass.
+        lambda c: (c["date"],), ("USE TEMP B-TREE FOR GROUP BY",)),
+    "screen_foreigner_acc_box": (
+        """
+        SELECT close, MAX(close) as h, MIN(close) as l, market_cap
+        FROM daily_price WHERE code = ? AND date >= strftime('%Y%m%d', 'now', '-21 days')
+        """,
+        lambda c: (c["code"],), ()),
+    "screen_trend_candidates": (
+        """
+        SELECT p.code, p.close, p.open, p.high, p.volume, p.market_cap
+        FROM daily_price p JOIN tickers t ON p.code = t.code
+        WHERE p.date = ? AND t.is_active = 1 AND p.close > p.open
+        """,
+        lambda c: (c["date"],), ()),
+    "screen_trend_volume_20": (
+        "SELECT volume FROM daily_price WHERE code = ? AND date < ? ORDER BY date DESC LIMIT 20",
+        lambda c: (c["code"], c["date"]), ()),
+    "screen_trend_close_60": (
+        "SELECT close FROM daily_price WHERE code = ? AND date <= ? ORDER BY date DESC LIMIT 60",
+        lambda c: (c["code"], c["date"]), ()),
+    # financials.load_financials_asof (one pass over the small quarterly table + PK seek)
+    "financials_asof": (
+        """
+        SELECT f.code, f.period, f.published_at, f.revenue, f.op_income, f.net_income, f.equity, f.operating_margin, f.roe
+        FROM financials f
+        WHERE f.published_at <= ?
+        AND f.period = (
+            SELECT MAX(g.period) FROM financials g
+            WHERE g.code = f.code AND g.published_at <= ?
+        )
+        """,
+        lambda c: (c["date"], c["date"]), ("SCAN f",)),
+    # financials.load_ttm_asof (Value_Picks)
+    "financials_ttm_asof": (
+        """
+        SELECT f.code, f.period, f.published_at, f.revenue_ttm, f.op_income_ttm, f.net_income_ttm, f.equity, f.operating_margin_ttm, f.roe_ttm, f.revenue_yoy, f.op_income_yoy, f.net_income_yoy
+        FROM financials_ttm f
+        WHERE f.published_at <= ?
+        AND f.period = (
+            SELECT MAX(g.period) FROM financials_ttm g
+            WHERE g.code = f.code AND g.published_at <= ?
+        )
+        """,
+        lambda c: (c["date"], c["date"]), ("SCAN f",)),
+    # analyzer_daily.process_watchlist
+    "watchlist_price_history": (
+        """
+        SELECT code, date, close, open, high, low, volume, market_cap, per, pbr, revenue, net_income
+        FROM daily_price
+        WHERE code = ?
+        ORDER BY date DESC
+        """,
+        lambda c: (c["code"],), ()),
+    "watchlist_supply_history": (
+        """
+        SELECT code, date, foreigner, institution, pension
+        FROM daily_supply
+        WHERE code = ?
+        ORDER BY date DESC
+        """,
+        lambda c: (c["code"],), ()),
+    "watchlist_names": (
+        "SELECT code, name FROM tickers WHERE code IN (?,?,?)",
+        lambda c: tuple(c["codes"][:3]), ()),
+    # batch_daily.sync_market_data_bulk
+    "batch_supply_exists": (
+        "SELECT count(*) FROM daily_supply WHERE date = ?",
+        lambda c: (c["date"],), ()),
+    # data_sources/krx_store.ReadThroughKrx (stock-data-service fetch_stock_data)
+    "readthrough_market_days": (
+        "SELECT date, COUNT(*) FROM daily_price WHERE date BETWEEN ? AND ? GROUP BY date",
+        lambda c: (c["week_start"], c["date"]), ()),
+    "readthrough_last_day": (
+        "SELECT MAX(date) FROM daily_supply",
+        lambda c: (), ()),
+    "readthrough_price_window": (
+        """
+        SELECT date, open, high, low, close, volume FROM daily_price
+        WHERE code = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+        """,
+        lambda c: (c["code"], c["week_start"], c["date"]), ()),
+    "readthrough_supply_window": (
+        """
+        SELECT date, individual, foreigner, institution FROM daily_supply
+        WHERE code = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+        """,
+        lambda c: (c["code"], c["week_start"], c["date"]), ()),
+    "readthrough_prev_close": (
+        "SELECT close FROM daily_price WHERE code = ? AND date < ? ORDER BY date DESC LIMIT 1",
+        lambda c: (c["code"], c["week_start"]), ()),
+    # sync_to_supabase_price.stream_batches
+    "delta_sync_price": (
+        "SELECT code, date, open, high, low, close, volume FROM daily_price WHERE date >= ?",
+        lambda c: (c["date"],), ()),
+    "delta_sync_price_key": (
+        "SELECT code, date, open, high, low, close, volume FROM daily_price WHERE code = ? AND date IN (?, ?)",
+        lambda c: (c["code"], c["date"], f"{c['date'][:4]}-{c['date'][4:6]}-{c['date'][6:]}"), ()),
+    # changelog.read_changes
+    "changelog_read": (
+        """
+        SELECT seq, tbl, code, date, op FROM changelog
+        WHERE seq > ? AND seq <= ? AND tbl IN (?)
+        ORDER BY seq LIMIT ?
+        """,
+        lambda c: (0, 10 ** 9, "daily_price", 5000), ()),
+}
+
+
+# financials._load_asof serves both point-in-time tables
+_ASOF_AS_WRITTEN = """
+        SELECT f.code, f.period, f.published_at, {', '.join('f.' + c for c in columns)}
+        FROM {table} f
+        WHERE f.published_at <= ?
+        AND f.period = (
+            SELECT MAX(g.period) FROM {table} g
+            WHERE g.code = f.code AND g.published_at <= ?
+        )
+        """
+
+# krx_store._local_rows serves both daily tables
+_WINDOW_AS_WRITTEN = """
+            SELECT date, {', '.join(kind.columns)} FROM {kind.table}
+            WHERE code = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+        """
+
+# name -> (call-site file, text as written there when it is built with an f-string)
+QUERY_SOURCES = {
+    "screen_date_exists": ("analyzer_daily.py", None),
+    "screen_max_price_date": ("analyzer_daily.py", None),
+    "screen_max_supply_date": ("analyzer_daily.py", None),
+    "screen_mcap_universe": ("analyzer_daily.py", None),
+    "screen_tech_history": ("analyzer_daily.py", None),
+    "screen_value_picks": ("analyzer_daily.py", None),
+    "screen_twin_engines": ("analyzer_daily.py", None),
+    "screen_foreigner_acc_sum": ("analyzer_daily.py", None),
+    "screen_foreigner_acc_box": ("analyzer_daily.py", None),
+    "screen_trend_candidates": ("analyzer_daily.py", None),
+    "screen_trend_volume_20": ("analyzer_daily.py", None),
+    "screen_trend_close_60": ("analyzer_daily.py", None),
+    "financials_asof": ("financials.py", _ASOF_AS_WRITTEN),
+    "financials_ttm_asof": ("financials.py", _ASOF_AS_WRITTEN),
+    "watchlist_price_history": ("analyzer_daily.py", None),
+    "watchlist_supply_history": ("analyzer_daily.py", None),
+    "watchlist_names": ("analyzer_daily.py", "SELECT code, name FROM tickers WHERE code IN ({placeholders})"),
+    "batch_supply_exists": ("batch_daily.py", None),
+    "readthrough_market_days": ("data_sources/krx_store.py",
+                                "SELECT date, COUNT(*) FROM {kind.table} WHERE date BETWEEN ? AND ? GROUP BY date"),
+    "readthrough_last_day": ("data_sources/krx_store.py", "SELECT MAX(date) FROM {kind.table}"),
+    "readthrough_price_window": ("data_sources/krx_store.py", _WINDOW_AS_WRITTEN),
+    "readthrough_supply_window": ("data_sources/krx_store.py", _WINDOW_AS_WRITTEN),
+    "readthrough_prev_close": ("data_sources/krx_store.py", None),
+    "delta_sync_price": ("sync_to_supabase_price.py", "SELECT {', '.join(columns)} FROM {table} WHERE date >= ?"),
+    "delta_sync_price_key": ("sync_to_supabase_price.py",
+                             "SELECT {', '.join(columns)} FROM {table} WHERE code = ? AND date IN (?, ?)"),
+    "changelog_read": ("changelog.py", """
+            SELECT seq, tbl, code, date, op FROM changelog
+            WHERE seq > ? AND seq <= ? AND tbl IN ({placeholders})
+            ORDER BY seq LIMIT ?
+        """),
+}
+
+
+def normalize_sql(sql):
+    return ' '.join(sql.split())
+
+
+def source_drift(queries=None, sources=None):
+    """Names whose SQL (whitespace-normalized) is missing from its call-site file."""
+    queries = HOT_QUERIES if queries is None else queries
+    sources = QUERY_SOURCES if sources is None else sources
+    texts = {}
+    drifted = []
+    for name, (sql, _, _) in queries.items():
+        if name not in sources:
+            drifted.append(name)
+            continue
+        filename, as_written = sources[name]
+        if filename not in texts:
+            with open(os.path.join(os.path.dirname(__file__), filename), 'r', encoding='utf-8') as f:
+                texts[filename] = normalize_sql(f.read())
+        if normalize_sql(as_written or sql) not in texts[filename]:
+            drifted.append(name)
+    return drifted
+
+
+def _trading_days(n_days, end=datetime(2025, 12, 30)):
+    days, current = [], end
+    while len(days) < n_days:
+        if current.weekday() < 5:
+            days.append(current.strftime("%Y%m%d"))
+        current -= timedelta(days=1)
+    return sorted(days)
+
+
+def build_test_db(path, n_tickers=300, n_days=120, compact=False, seed=7):
+    """Synthetic DB with the production schema and realistic key distribution."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+
+    codes = [f"{i * 7 % 1000000:06d}" for i in range(1, n_tickers + 1)]
+    dates = _trading_days(n_days)
+    conn.executemany("INSERT INTO tickers (code, name, market, is_active) VALUES (?, ?, 'KOSPI', 1)",
+                     [(c, f"T{c}") for c in codes])
+    for date in dates:
+        conn.executemany("""
+            INSERT INTO daily_price (code, date, open, high, low, close, volume, market_cap, per, pbr, eps)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(c, date, 1000, 1100, 900, 1000 + rng.randint(-50, 50), rng.randint(1, 10**6),
+               rng.randint(10**10, 10**13), 10.0, 1.0, 100.0) for c in codes])
+        conn.executemany("""
+            INSERT INTO daily_supply (code, date, individual, foreigner, institution, pension)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(c, date, rng.randint(-10**9, 10**9), rng.randint(-10**9, 10**9),
+               rng.randint(-10**9, 10**9), 0) for c in codes])
+    conn.commit()
+
+    if compact:
+        from migrate_db_compact import migrate
+        migrate(conn)
+    return conn, {"date": dates[-1], "week_start": dates[-min(5, len(dates))], "code": codes[len(codes) // 2], "codes": codes}
+
+
+def plan_violations(plan_details, allowed=()):
+    """Plan lines that fall back to a full SCAN or a temp B-tree (unless allowed)."""
+    return [
+        detail for detail in plan_details
+        if (detail.startswith("SCAN ") or "TEMP B-TREE" in detail)
+        and not any(fragment in detail for fragment in allowed)
+    ]
+
+
+def explain(conn, sql, params):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def check_plans(conn, ctx):
+    """{name: [violations]} for every hot query (empty list = OK)."""
+    results = {}
+    for name, (sql, params, allowed) in HOT_QUERIES.items():
+        results[name] = plan_violations(explain(conn, sql, params(ctx)), allowed)
+    return results
+
+
+def time_queries(conn, ctx, repeat=5):
+    """Median wall time per hot query in milliseconds."""
+    timings = {}
+    for name, (sql, params, _) in HOT_QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql, params(ctx)).fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[name] = round(statistics.median(samples), 3)
+    return timings
+
+
+def compare_baseline(timings, baseline, tolerance=2.0, floor_ms=1.0):
+    """Queries slower than tolerance x baseline (ignoring sub-floor noise)."""
+    regressions = {}
+    for name, ms in timings.items():
+        base = baseline.get(name)
+        if base is not None and ms > max(base * tolerance, floor_ms):
+            regressions[name] = (base, ms)
+    return regressions
+
+
+def run(n_tickers, n_days, layouts, with_timings, update_baseline, tolerance):
+    failed = False
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    new_baseline = dict(baseline)
+
+    for name in source_drift():
+        failed = True
+        print(f"   ❌ {name}: SQL not found in {QUERY_SOURCES.get(name, ('?',))[0]} (update HOT_QUERIES)")
+
+    for layout in layouts:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"🧪 [{layout}] generating {n_tickers} tickers x {n_days} days...")
+            conn, ctx = build_test_db(os.path.join(tmp, 'plan.db'), n_tickers, n_days, compact=(layout == "compact"))
+            for name, bad in check_plans(conn, ctx).items():
+                if bad:
+                    failed = True
+                    print(f"   ❌ {name}: {' | '.join(bad)}")
+                else:
+                    print(f"   ✅ {name}")
+
+            if with_timings:
+                timings = time_queries(conn, ctx)
+                layout_base = baseline.get(layout, {})
+                missing = sorted(set(timings) - set(layout_base))
+                if missing and not update_baseline:
+                    # No baseline means nothing was compared; do not report that as a pass
+                    failed = True
+                    print(f"   ❌ no baseline for {len(missing)} queries ({', '.join(missing[:3])}...); "
+                          f"run with --update-baseline first")
+                for name, (base, ms) in compare_baseline(timings, layout_base, tolerance).items():
+                    failed = True
+                    print(f"   🐢 {name}: {ms:.2f}ms (baseline {base:.2f}ms)")
+                new_baseline[layout] = timings
+            conn.close()
+
+    if update_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(new_baseline, f, indent=2, sort_keys=True)
+        print(f"📝 Baseline written to {BASELINE_PATH}")
+    return not failed
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=2500, help="Synthetic tickers")
+    parser.add_argument("--days", type=int, default=250, help="Synthetic trading days")
+    parser.add_argument("--layout", choices=["legacy", "compact", "both"], default="both")
+    parser.add_argument("--timings", action="store_true", help="Also time queries against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Store current timings as baseline")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Allowed slowdown factor vs baseline")
+    args = parser.parse_args()
+
+    layouts = ["legacy", "compact"] if args.layout == "both" else [args.layout]
+    ok = run(args.tickers, args.days, layouts, args.timings or args.update_baseline,
+             args.update_baseline, args.tolerance)
+    sys.exit(0 if ok else 1)
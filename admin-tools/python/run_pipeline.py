@@ -0,0 +1,322 @@
+import sqlite3
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+
+# Nightly pipeline runner (replaces the fixed sequence in run_local_analysis.bat).
+# - stages declare their dependencies; a stage starts as soon as all of them succeeded
+#   or were skipped, so independent stages (Supabase price sync, financials) overlap
+# - a stage is skipped when the fingerprint of its inputs (its script, plus e.g. the
+#   day or the data version of the tables it reads) equals the one of its last
+#   successful run; --force runs everything. batch_daily is never skipped while
+#   daily_price is behind the expected trading day (it exits non-zero on failures)
+# - every stage run (status, duration, fingerprint) is stored in pipeline_runs
+# - a failed stage blocks its dependents; the others still run
+#
+#   python admin-tools/python/run_pipeline.py              # Windows: run_local_analysis.bat
+#   python admin-tools/python/run_pipeline.py --dry-run    # show what would run / be skipped
+#   python admin-tools/python/run_pipeline.py --only sync_prices --force
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(HERE, '../../dailyport.db')
+MAX_PARALLEL = 2
+MARKET_DATA_READY_HOUR = 16  # local (KST) hour after which the day's KRX data is expected
+
+STATUS_OK = "ok"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_BLOCKED = "blocked"
+
+
+# === Input fingerprints (conn -> value; conn is None before the DB exists) ===
+
+def today(conn):
+    return datetime.now().strftime("%Y%m%d")
+
+
+def expected_trading_day(now=None):
+    """Latest weekday whose data should be out: today after MARKET_DATA_READY_HOUR, else the one before."""
+    day = now or datetime.now()
+    if day.hour < MARKET_DATA_READY_HOUR:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.strftime("%Y%m%d")
+
+
+def price_freshness(conn):
+    """
+    The expected trading day once daily_price has rows for it. While it has none
+    the value is unique per call, so batch_daily never matches an earlier run
+    (holidays just mean an extra, cheap run).
+    """
+    expected = expected_trading_day()
+    dashed = f"{expected[:4]}-{expected[4:6]}-{expected[6:]}"
+    if conn is not None and conn.execute("SELECT 1 FROM daily_price WHERE date IN (?, ?) LIMIT 1",
+                                         (expected, dashed)).fetchone():
+        return ["current", expected]
+    return ["behind", expected, time.time()]
+
+
+def table_version(table):
+    """Latest day and its row count; with change capture on, the changelog position instead."""
+    def version(conn):
+        if conn is None:
+            return None
+        from changelog import is_enabled, last_seq
+        if is_enabled(conn, table):
+            return ["changelog", last_seq(conn)]
+        return list(conn.execute(f"""
+            SELECT date, COUNT(*) FROM {table} WHERE date = (SELECT MAX(date) FROM {table})
+        """).fetchone() or [])
+    version.__name__ = f"table_version({table})"
+    return version
+
+
+def financials_version(conn):
+    if conn is None:
+        return None
+    return list(conn.execute("SELECT COUNT(*), MAX(updated_at) FROM financials_ttm").fetchone())
+
+
+def schema_file(conn):
+    with open(os.path.join(HERE, 'schema_sqlite.sql'), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+Stage = namedtuple("Stage", "name script args deps inputs")
+
+STAGES = [
+    Stage("db_init", "db_init.py", (), (), (schema_file,)),
+    Stage("batch_daily", "batch_daily.py", (), ("db_init",), (today, price_freshness)),
+    Stage("sync_prices", "sync_to_supabase_price.py", (), ("batch_daily",), (table_version("daily_price"),)),
+    Stage("financials", "batch_financial_quarterly.py", (), ("batch_daily",), (today,)),
+    # Also daily: watchlists / portfolios come from Supabase
+    Stage("analyzer", "analyzer_daily.py", (), ("batch_daily", "financials"),
+          (today, table_version("daily_price"), table_version("daily_supply"), financials_version)),
+]
+
+
+def validate(stages):
+    """Stages in a runnable order; ValueError on unknown or cyclic dependencies."""
+    by_name = {s.name: s for s in stages}
+    ordered, visiting, done = [], set(), set()
+
+    def visit(stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Dependency cycle through {stage.name}")
+        visiting.add(stage.name)
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"{stage.name} depends on unknown stage {dep}")
+            visit(by_name[dep])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+def fingerprint(stage, conn):
+    with open(os.path.join(HERE, stage.script), 'rb') as f:
+        parts = [hashlib.sha256(f.read()).hexdigest(), list(stage.args)]
+    for fn in stage.inputs:
+        try:
+            parts.append(fn(conn))
+        except sqlite3.Error as e:  # table not there yet: never matches a previous run
+            parts.append(f"unavailable: {e}")
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()[:16]
+
+
+# === Run history (pipeline_runs, created by db_init.py from schema_sqlite.sql) ===
+
+def _connect(db_path):
+    return sqlite3.connect(db_path, timeout=30) if os.path.exists(db_path) else None
+
+
+def _has_history(conn):
+    return conn is not None and conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pipeline_runs'").fetchone() is not None
+
+
+def last_success(conn, stage):
+    if not _has_history(conn):
+        return None
+    row = conn.execute("""
+        SELECT fingerprint FROM pipeline_runs
+        WHERE stage = ? AND status = ? ORDER BY id DESC LIMIT 1
+    """, (stage, STATUS_OK)).fetchone()
+    return row[0] if row else None
+
+
+def record(db_path, run_id, result):
+    conn = _connect(db_path)
+    try:
+        if not _has_history(conn):
+            return
+        conn.execute("""
+            INSERT INTO pipeline_runs (run_id, stage, status, fingerprint, started_at, duration_s, message)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (run_id, result["stage"], result["status"], result.get("fingerprint"), result.get("started_at"),
+              result.get("duration_s"), result.get("message")))
+        conn.commit()
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def enable_wal(db_path):
+    """Parallel stages read and write the same DB: WAL keeps a reader from blocking a writer."""
+    conn = _connect(db_path)
+    if conn is not None:
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+
+
+# === Execution ===
+
+_print_lock = threading.Lock()
+
+
+def run_script(stage):
+    """Runs the stage's script, prefixing its output with the stage name. Returns (returncode, last line)."""
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, stage.script), *stage.args],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                            text=True, encoding="utf-8", errors="replace", env=env, cwd=HERE)
+    last = ""
+    for line in proc.stdout:
+        line = line.rstrip()
+        if line.strip():
+            last = line.strip()
+        with _print_lock:
+            print(f"[{stage.name}] {line}", flush=True)
+    return proc.wait(), last
+
+
+def run_pipeline(stages=None, only=None, force=False, dry_run=False, max_parallel=MAX_PARALLEL,
+                 db_path=DB_PATH, runner=run_script):
+    """
+    Runs the DAG. only: stage names to consider (others are treated as skipped).
+    Returns {stage: result dict} in completion order.
+    """
+    stages = validate(STAGES if stages is None else stages)
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+    results = {}
+    pending = {s.name: s for s in stages}
+    for name in list(pending):
+        if only and name not in only:
+            results[name] = {"stage": name, "status": STATUS_SKIPPED, "message": "not selected"}
+            del pending[name]
+
+    def decide(stage):
+        """(skip result, None) or (None, fingerprint to run with)."""
+        conn = _connect(db_path)
+        try:
+            fp = fingerprint(stage, conn)
+            if not force and last_success(conn, stage.name) == fp:
+                return {"stage": stage.name, "status": STATUS_SKIPPED, "fingerprint": fp,
+                        "message": "inputs unchanged"}, None
+        finally:
+            if conn is not None:
+                conn.close()
+        return None, fp
+
+    def execute(stage, fp):
+        started = time.time()
+        result = {"stage": stage.name, "fingerprint": fp,
+                  "started_at": datetime.now().isoformat(timespec="seconds")}
+        try:
+            code, last = runner(stage)
+            result["status"] = STATUS_OK if code == 0 else STATUS_FAILED
+            result["message"] = last[:500] if code else None
+        except Exception as e:
+            result["status"] = STATUS_FAILED
+            result["message"] = str(e)[:500]
+        result["duration_s"] = round(time.time() - started, 1)
+        return result
+
+    wal_checked = False
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        running = {}
+        while pending or running:
+            for stage in list(pending.values()):
+                states = [results.get(dep, {}).get("status") for dep in stage.deps]
+                if any(s in (STATUS_FAILED, STATUS_BLOCKED) for s in states):
+                    del pending[stage.name]
+                    results[stage.name] = {"stage": stage.name, "status": STATUS_BLOCKED,
+                                           "message": "upstream failed"}
+                    record(db_path, run_id, results[stage.name])
+                    continue
+                if not all(s in (STATUS_OK, STATUS_SKIPPED) for s in states) or len(running) >= max_parallel:
+                    continue
+                del pending[stage.name]
+                skipped, fp = decide(stage)
+                if skipped or dry_run:
+                    results[stage.name] = skipped or {"stage": stage.name, "status": STATUS_SKIPPED,
+                                                      "fingerprint": fp, "message": "would run (dry run)"}
+                    if skipped and not dry_run:
+                        record(db_path, run_id, skipped)
+                    print(f"⏭  {stage.name}: {results[stage.name]['message']}")
+                    continue
+                if not wal_checked:
+                    enable_wal(db_path)
+                    wal_checked = os.path.exists(db_path)
+                print(f"▶️  {stage.name} ({stage.script})")
+                running[pool.submit(execute, stage, fp)] = stage
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                result = future.result()
+                results[stage.name] = result
+                record(db_path, run_id, result)
+                icon = "✅" if result["status"] == STATUS_OK else "❌"
+                print(f"{icon} {stage.name}: {result['status']} in {result['duration_s']}s")
+    return results
+
+
+def summary(results, stages=None):
+    order = [s.name for s in validate(STAGES if stages is None else stages)]
+    lines = ["📋 Pipeline summary"]
+    for name in order:
+        r = results.get(name, {})
+        duration = f"{r['duration_s']:7.1f}s" if r.get("duration_s") is not None else " " * 8
+        lines.append(f"   {name:<14} {r.get('status', '-'):<8} {duration}  {r.get('message') or ''}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", type=str, help="Comma-separated stages to run (dependencies are not added)")
+    parser.add_argument("--force", action="store_true", help="Run stages even if their inputs are unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="Only print which stages would run")
+    parser.add_argument("--max-parallel", type=int, default=MAX_PARALLEL)
+    args = parser.parse_args()
+
+    only = set(args.only.split(",")) if args.only else None
+    unknown = only - {s.name for s in STAGES} if only else set()
+    if unknown:
+        print(f"❌ Unknown stages: {', '.join(sorted(unknown))} (known: {', '.join(s.name for s in STAGES)})")
+        sys.exit(2)
+
+    started = time.time()
+    results = run_pipeline(only=only, force=args.force, dry_run=args.dry_run, max_parallel=args.max_parallel)
+    print(summary(results))
+    print(f"⏱  {time.time() - started:.1f}s")
+    sys.exit(1 if any(r["status"] in (STATUS_FAILED, STATUS_BLOCKED) for r in results.values()) else 0)
@@ -32,8 +32,11 @@ CREATE TABLE IF NOT EXISTS daily_price (
     pbr REAL,
     bps REAL,
     div_yield REAL,
+    -- Legacy forward-filled fundamentals; new quarters are written to `financials`
     roe REAL,
     operating_margin REAL,
+    revenue REAL,
+    net_income REAL,
 
     PRIMARY KEY (code, date),
     FOREIGN KEY (code) REFERENCES tickers(code)
@@ -47,6 +50,7 @@ CREATE TABLE IF NOT EXISTS daily_supply (
     individual INTEGER, -- Net Buy Volume/Value
     foreigner INTEGER,
     institution INTEGER,
+    pension INTEGER DEFAULT 0, -- see migrate_db_add_pension.py for older DBs
     
     PRIMARY KEY (code, date),
     FOREIGN KEY (code) REFERENCES tickers(code)
@@ -59,7 +63,139 @@ CREATE TABLE IF NOT EXISTS user_config (
     value TEXT
 );
 
+-- 5. Point-in-time Quarterly Financials
+-- One row per company and fiscal quarter. published_at is the first trading day
+-- the numbers were public; readers join "latest period published on or before D"
+-- (financials.load_financials_asof) instead of forward-filling daily_price.
+CREATE TABLE IF NOT EXISTS financials (
+    code TEXT NOT NULL,
+    period TEXT NOT NULL, -- YYYYQn (e.g. 2024Q3)
+    published_at TEXT NOT NULL, -- YYYYMMDD (DART receipt date or filing deadline)
+    fs_div TEXT, -- CFS (consolidated) / OFS (separate)
+    revenue REAL,
+    op_income REAL,
+    net_income REAL,
+    equity REAL,
+    operating_margin REAL,
+    roe REAL,
+    updated_at DATETIME,
+
+    PRIMARY KEY (code, period),
+    FOREIGN KEY (code) REFERENCES tickers(code)
+);
+
+-- Incremental refresh bookkeeping (batch_financial_quarterly.py --incremental)
+CREATE TABLE IF NOT EXISTS financial_refresh_status (
+    code TEXT NOT NULL,
+    period TEXT NOT NULL, -- YYYYQn
+    corp_code TEXT,
+    rcept_no TEXT, -- latest periodic filing seen for this period
+    status TEXT NOT NULL, -- ok / pending (filed, statements not out yet) / failed
+    attempts INTEGER DEFAULT 0,
+    updated_at DATETIME,
+
+    PRIMARY KEY (code, period)
+);
+
+-- Trailing-twelve-month sums and YoY growth derived from `financials`
+-- (financials.refresh_ttm; Q4 made discrete from the annual report). Percent units.
+CREATE TABLE IF NOT EXISTS financials_ttm (
+    code TEXT NOT NULL,
+    period TEXT NOT NULL, -- YYYYQn, last quarter of the window
+    published_at TEXT NOT NULL, -- YYYYMMDD, when the whole window was public
+    revenue_ttm REAL,
+    op_income_ttm REAL,
+    net_income_ttm REAL,
+    equity REAL, -- at period end
+    operating_margin_ttm REAL,
+    roe_ttm REAL, -- TTM net income / average equity (period end, one year earlier)
+    revenue_yoy REAL, -- discrete quarter vs. same quarter a year earlier
+    op_income_yoy REAL,
+    net_income_yoy REAL,
+    updated_at DATETIME,
+
+    PRIMARY KEY (code, period),
+    FOREIGN KEY (code) REFERENCES tickers(code)
+);
+
+-- 6. DART Corp Code Mapping
+-- Listed companies only (stock_code -> 8-digit corp_code), refreshed by dart_corp_codes.py.
+CREATE TABLE IF NOT EXISTS dart_corp_codes (
+    corp_code TEXT PRIMARY KEY,
+    corp_name TEXT,
+    stock_code TEXT NOT NULL,
+    modify_date TEXT, -- YYYYMMDD, as reported by DART
+    updated_at DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_dart_corp_codes_stock ON dart_corp_codes(stock_code);
+
+-- 7. Upstream API Budget
+-- Requests used per source and calendar day (data_sources/rate_limit.DailyQuota).
+CREATE TABLE IF NOT EXISTS api_quota (
+    source TEXT NOT NULL, -- e.g. dart
+    day TEXT NOT NULL, -- YYYYMMDD
+    used INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, day)
+);
+
 -- Indexes for performance
-CREATE INDEX IF NOT EXISTS idx_price_code ON daily_price(code);
+-- (code lookups are served by the (code, date) primary keys)
 CREATE INDEX IF NOT EXISTS idx_price_date ON daily_price(date);
-CREATE INDEX IF NOT EXISTS idx_supply_code ON daily_supply(code);
+CREATE INDEX IF NOT EXISTS idx_supply_date ON daily_supply(date);
+-- Hot statements and their expected plans are checked by query_plan_check.py
+
+-- 8. Compact layout
+-- migrate_db_compact.py converts daily_price / daily_supply into views over
+-- WITHOUT ROWID *_compact tables (integer ticker ids, INTEGER YYYYMMDD dates).
+
+-- 9. Supabase Sync Bookkeeping (sync_to_supabase_price.py)
+-- Last synced date per Supabase table; a run sends rows dated on or after it.
+CREATE TABLE IF NOT EXISTS sync_state (
+    target TEXT PRIMARY KEY, -- Supabase table, e.g. daily_price
+    watermark TEXT NOT NULL, -- YYYYMMDD
+    rows_sent INTEGER, -- by the run that set it
+    updated_at DATETIME
+);
+
+-- Upsert batches that failed, kept with their rows and retried by the next run
+CREATE TABLE IF NOT EXISTS sync_failures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target TEXT NOT NULL,
+    payload TEXT NOT NULL, -- JSON list of records as sent
+    row_count INTEGER,
+    error TEXT,
+    attempts INTEGER DEFAULT 1,
+    created_at DATETIME,
+    updated_at DATETIME
+);
+
+-- 10. Change Log (changelog.py)
+-- Filled by optional triggers on daily_price / daily_supply (python changelog.py --enable);
+-- incremental consumers read it from their checkpoint instead of rescanning date ranges.
+CREATE TABLE IF NOT EXISTS changelog (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, -- never reused after compaction
+    tbl TEXT NOT NULL, -- daily_price / daily_supply
+    code TEXT NOT NULL,
+    date INTEGER NOT NULL, -- YYYYMMDD
+    op TEXT NOT NULL -- I (insert / replace) / U (update)
+);
+
+CREATE TABLE IF NOT EXISTS changelog_checkpoints (
+    consumer TEXT PRIMARY KEY, -- e.g. supabase:daily_price
+    seq INTEGER NOT NULL, -- last changelog.seq processed
+    updated_at DATETIME
+);
+
+-- 11. Pipeline Runs (run_pipeline.py)
+-- One row per stage per run; an `ok` row with the same fingerprint lets the next run skip the stage.
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL, -- YYYYMMDD-HHMMSS of the runner invocation
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL, -- ok / failed / skipped / blocked
+    fingerprint TEXT, -- hash of the stage's script and inputs
+    started_at DATETIME,
+    duration_s REAL,
+    message TEXT -- last output line of a failed stage, skip reason
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_stage ON pipeline_runs(stage, status);
@@ -1,12 +1,42 @@
 import sqlite3
 import os
-import time
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from supabase import create_client, Client
+import changelog
+
+# Delta sync of the local daily tables to Supabase.
+# - the last synced date per table is kept in sync_state (the watermark); a run streams
+#   only rows dated on or after it (the watermark day is re-sent, it may have been
+#   synced before the batch finished it), the first run takes the last INITIAL_DAYS
+# - rows are read with fetchmany and upserted in concurrent batches with a bounded
+#   number in flight, so memory stays flat whatever the window
+# - a batch that fails is stored in sync_failures and retried on the next run
+#   (MAX_ATTEMPTS) instead of being lost; batches out of attempts are reported as
+#   abandoned (and fail the run) until --retry-abandoned re-queues them
+# - with change capture on (python changelog.py --enable) the table is synced from its
+#   changelog checkpoint instead: exactly the rows written since the last run, including
+#   corrections to old days (batch_daily.py --repair-supply). The first run after
+#   enabling registers the checkpoint and still syncs by date.
+#
+#   python sync_to_supabase_price.py              # new days since the watermark
+#   python sync_to_supabase_price.py --full       # re-send the last --days days
+#   python sync_to_supabase_price.py --retry-abandoned   # give abandoned batches MAX_ATTEMPTS more
 
 # Config
 DB_PATH = os.path.join(os.path.dirname(__file__), '../../dailyport.db')
+INITIAL_DAYS = 90
+BATCH_SIZE = 1000
+WORKERS = 4
+MAX_ATTEMPTS = 5
+
+# Supabase table -> columns sent (same names in SQLite and Supabase)
+SYNC_TABLES = {
+    "daily_price": ("code", "date", "open", "high", "low", "close", "volume"),
+}
 
 # Env Loading
 env_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -19,59 +49,238 @@ load_dotenv(env_path)
 SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Missing Supabase credentials.")
-    exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-conn = sqlite3.connect(DB_PATH)
-conn.row_factory = sqlite3.Row
-
-def sync_prices(days=90):
-    cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y%m%d")
-    print(f"🚀 Syncing Daily Price from SQLite to Supabase (Since {cutoff_date})...")
-
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM daily_price WHERE date >= ?", (cutoff_date,))
-    rows = cursor.fetchall()
-    
-    total = len(rows)
-    print(f"📊 Found {total} records to sync.")
-
-    batch_size = 1000
-    batch = []
-    
-    for i, row in enumerate(rows):
-        # Map SQLite columns to Supabase columns
-        # SQLite: code, date, open, high, low, close, volume...
-        # Supabase: same
-        record = {
-            "code": row['code'],
-            "date": row['date'], # Assuming YYYYMMDD format in SQLite
-            "open": row['open'],
-            "high": row['high'],
-            "low": row['low'],
-            "close": row['close'],
-            "volume": row['volume']
-        }
-        batch.append(record)
-
-        if len(batch) >= batch_size:
-            try:
-                supabase.table('daily_price').upsert(batch).execute()
-                print(f"   Generated {i+1}/{total}...", end='\r')
-            except Exception as e:
-                print(f"\n❌ Error syncing batch: {e}")
-            batch = []
-            
-    # Final batch
-    if batch:
+
+def get_client():
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise RuntimeError("Missing Supabase credentials (NEXT_PUBLIC_SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY)")
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+def get_watermark(conn, table):
+    row = conn.execute("SELECT watermark FROM sync_state WHERE target = ?", (table,)).fetchone()
+    return row[0] if row else None
+
+
+def set_watermark(conn, table, watermark, rows_sent):
+    conn.execute("""
+        INSERT OR REPLACE INTO sync_state (target, watermark, rows_sent, updated_at)
+        VALUES (?, ?, ?, ?)
+    """, (table, watermark, rows_sent, datetime.now().isoformat(timespec="seconds")))
+    conn.commit()
+
+
+def stream_batches(conn, table, since, batch_size=BATCH_SIZE):
+    """Upsert-ready record batches for rows dated >= since, read batch_size rows at a time."""
+    columns = SYNC_TABLES[table]
+    cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE date >= ?", (since,))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        # date: YYYYMMDD text (INTEGER in the compact layout)
+        yield [dict(zip(columns, (row[0], str(row[1]), *row[2:]))) for row in rows]
+
+
+def stream_changed_batches(conn, table, consumer, until, batch_size=BATCH_SIZE):
+    """Record batches for the (code, date) keys logged after the consumer's checkpoint, up to until."""
+    columns = SYNC_TABLES[table]
+    sql = f"SELECT {', '.join(columns)} FROM {table} WHERE code = ? AND date IN (?, ?)"
+    keys = {}
+    for change in changelog.read_changes(conn, consumer, (table,), until=until):
+        keys[(change.code, change.date)] = None
+        if len(keys) >= batch_size:
+            yield _lookup(conn, sql, columns, keys)
+            keys = {}
+    if keys:
+        yield _lookup(conn, sql, columns, keys)
+
+
+def _lookup(conn, sql, columns, keys):
+    records = []
+    for code, day in keys:
+        # The log stores YYYYMMDD as INTEGER; legacy rows may spell the date YYYY-MM-DD
+        text = str(day)
+        row = conn.execute(sql, (code, day, f"{text[:4]}-{text[4:6]}-{text[6:]}")).fetchone()
+        if row:  # deleted since it was logged
+            records.append(dict(zip(columns, (row[0], str(row[1]), *row[2:]))))
+    return records
+
+
+def upsert(client, table, records):
+    client.table(table).upsert(records).execute()
+
+
+def upsert_concurrently(client, table, batches, workers=WORKERS, on_done=None):
+    """
+    Upserts every batch with at most 2 x workers batches in flight.
+    on_done(records, error) runs on the calling thread (error None on success).
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def drain(return_when):
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                records = pending.pop(future)
+                if on_done:
+                    on_done(records, future.exception())
+
+        for records in batches:
+            if not records:
+                continue
+            if len(pending) >= workers * 2:
+                drain(FIRST_COMPLETED)
+            pending[pool.submit(upsert, client, table, records)] = records
+        if pending:
+            drain(ALL_COMPLETED)
+
+
+def record_failure(conn, table, records, error, attempts=1, failure_id=None):
+    now = datetime.now().isoformat(timespec="seconds")
+    if failure_id is None:
+        conn.execute("""
+            INSERT INTO sync_failures (target, payload, row_count, error, attempts, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (table, json.dumps(records, ensure_ascii=False), len(records), str(error)[:500], attempts, now, now))
+    else:
+        conn.execute("UPDATE sync_failures SET error = ?, attempts = ?, updated_at = ? WHERE id = ?",
+                     (str(error)[:500], attempts, now, failure_id))
+
+
+def retry_failures(conn, client, table, max_attempts=MAX_ATTEMPTS):
+    """Re-sends stored batches that have attempts left. Returns (resent rows, still failing batches)."""
+    rows = conn.execute("""
+        SELECT id, payload, attempts FROM sync_failures
+        WHERE target = ? AND attempts < ? ORDER BY id
+    """, (table, max_attempts)).fetchall()
+    resent = failing = 0
+    for failure_id, payload, attempts in rows:
+        records = json.loads(payload)
         try:
-            supabase.table('daily_price').upsert(batch).execute()
+            upsert(client, table, records)
         except Exception as e:
-            print(f"\n❌ Error syncing final batch: {e}")
+            failing += 1
+            record_failure(conn, table, records, e, attempts + 1, failure_id)
+            continue
+        resent += len(records)
+        conn.execute("DELETE FROM sync_failures WHERE id = ?", (failure_id,))
+    conn.commit()
+    return resent, failing
+
+
+def abandoned_failures(conn, table, max_attempts=MAX_ATTEMPTS):
+    """(batches, rows) in sync_failures that ran out of attempts and are no longer retried."""
+    batches, rows = conn.execute("""
+        SELECT COUNT(*), COALESCE(SUM(row_count), 0) FROM sync_failures
+        WHERE target = ? AND attempts >= ?
+    """, (table, max_attempts)).fetchone()
+    return batches, rows
+
+
+def requeue_abandoned(conn, table, max_attempts=MAX_ATTEMPTS):
+    """Resets the attempts of abandoned batches so the next run retries them. Returns the batch count."""
+    cur = conn.execute("UPDATE sync_failures SET attempts = 0 WHERE target = ? AND attempts >= ?",
+                       (table, max_attempts))
+    conn.commit()
+    return cur.rowcount
+
+
+def sync_table(conn, client, table, days=INITIAL_DAYS, full=False, batch_size=BATCH_SIZE, workers=WORKERS):
+    """
+    Retries stored failures, then sends the changelog since the checkpoint (capture on)
+    or the rows since the watermark. Returns a summary dict.
+    """
+    retried, still_failing = retry_failures(conn, client, table)
+
+    consumer = f"supabase:{table}"
+    use_changelog = not full and changelog.is_enabled(conn, table)
+    if use_changelog and changelog.checkpoint(conn, consumer) is None:
+        # Registered before the date sync below, so nothing written meanwhile is missed
+        changelog.register(conn, consumer)
+        use_changelog = False
+
+    watermark = None if full else get_watermark(conn, table)
+    since = watermark or (datetime.now() - timedelta(days=days)).strftime("%Y%m%d")
+    stats = {"table": table, "since": since, "retried": retried, "still_failing": still_failing,
+             "sent": 0, "failed": 0, "abandoned": 0, "watermark": watermark, "changelog": None}
+    if use_changelog:
+        until = changelog.last_seq(conn)
+        stats["changelog"] = (changelog.checkpoint(conn, consumer), until)
+        batches = stream_changed_batches(conn, table, consumer, until, batch_size)
+    else:
+        batches = stream_batches(conn, table, since, batch_size)
+    newest = since
+    failures = []
+
+    def on_done(records, error):
+        nonlocal newest
+        newest = max(newest, max(r["date"] for r in records))
+        if error is not None:
+            # Stored once the read cursor is exhausted
+            failures.append((records, error))
+            print(f"\n❌ Batch of {len(records)} failed (kept for retry): {error}")
+            return
+        stats["sent"] += len(records)
+        print(f"   Synced {stats['sent']} rows...", end='\r')
+
+    upsert_concurrently(client, table, batches, workers, on_done)
+
+    for records, error in failures:
+        record_failure(conn, table, records, error)
+        stats["failed"] += len(records)
+    conn.commit()
+    # Failed rows wait in sync_failures, so the watermark / checkpoint moves past them too
+    if use_changelog:
+        changelog.advance(conn, consumer, until)
+    if stats["sent"] or stats["failed"]:
+        set_watermark(conn, table, newest, stats["sent"])
+        stats["watermark"] = newest
+    stats["abandoned"] = abandoned_failures(conn, table)[1]
+    return stats
+
+
+def sync_prices(days=INITIAL_DAYS, full=False, batch_size=BATCH_SIZE, workers=WORKERS, db_path=DB_PATH, client=None,
+                retry_abandoned=False):
+    client = client or get_client()
+    conn = sqlite3.connect(db_path)
+    try:
+        results = []
+        for table in SYNC_TABLES:
+            if retry_abandoned:
+                print(f"♻️ {table}: {requeue_abandoned(conn, table)} abandoned batches re-queued")
+            print(f"🚀 Syncing {table} from SQLite to Supabase...")
+            stats = sync_table(conn, client, table, days, full, batch_size, workers)
+            source = (f"changelog #{stats['changelog'][0]}..#{stats['changelog'][1]}" if stats["changelog"]
+                      else stats["since"])
+            print(f"\n✅ {table}: {stats['sent']} rows since {source} "
+                  f"(retried {stats['retried']}, failed {stats['failed']}, watermark {stats['watermark']})")
+            if stats["failed"] or stats["still_failing"]:
+                print(f"   ⚠️ failed batches are kept in sync_failures and retried next run (up to {MAX_ATTEMPTS} attempts)")
+            if stats["abandoned"]:
+                print(f"   ❌ {stats['abandoned']} rows in sync_failures are out of attempts and no longer retried "
+                      f"(python sync_to_supabase_price.py --retry-abandoned)")
+            results.append(stats)
+        if any(r["changelog"] for r in results):
+            print(f"🧹 changelog: {changelog.compact(conn)} consumed entries removed")
+        return results
+    finally:
+        conn.close()
 
-    print(f"\n✅ Sync Completed.")
 
 if __name__ == "__main__":
-    sync_prices()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=INITIAL_DAYS, help="Window for the first run / --full")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and re-send the --days window")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--retry-abandoned", action="store_true",
+                        help=f"Re-queue failed batches that used up their {MAX_ATTEMPTS} attempts")
+    args = parser.parse_args()
+    try:
+        results = sync_prices(args.days, args.full, args.batch_size, args.workers,
+                              retry_abandoned=args.retry_abandoned)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    sys.exit(1 if any(r["failed"] or r["abandoned"] for r in results) else 0)
@@ -0,0 +1,15 @@
+import os
+import sqlite3
+import pytest
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'schema_sqlite.sql')
+
+
+@pytest.fixture
+def db_conn(tmp_path):
+    """Fresh file-backed SQLite DB with the production schema."""
+    conn = sqlite3.connect(str(tmp_path / 'dailyport.db'))
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+    yield conn
+    conn.close()
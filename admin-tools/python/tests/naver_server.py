@@ -0,0 +1,115 @@
+"""
+Local stand-in for the two Naver endpoints naver_finance talks to.
+
+- /api/realtime?query=SERVICE_ITEM:a,b,...  polling JSON (EUC-KR, like the real one)
+- /item/main.naver?code=...                 item page (saved fixture if present, else a minimal page)
+
+Every 6-digit code exists except UNKNOWN; prices are derived from the code so
+tests can predict them. Requests are counted per path.
+"""
+import json
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+UNKNOWN = "999999"
+
+ITEM_PAGE = """<html><body>
+<div class="wrap_company"><h2><a href="#">T{code}</a></h2></div>
+<div class="rate_info"><p class="no_today"><em><span class="blind">{price:,}</span></em></p>
+<p class="no_exday"><em class="no_up"><span class="blind">10</span></em>
+<em class="no_up"><span class="blind">1.00</span></em></p></div>
+<div class="aside_invest_info"><em id="_market_sum">{cap:,}</em><em id="_per">10.5</em><em id="_pbr">1.2</em>
+<table><tr><th>EPS</th><td>{eps:,}</td></tr></table></div>
+</body></html>"""
+
+
+def price_of(code):
+    return int(code) % 1000 + 1000
+
+
+def realtime_item(code):
+    down = int(code) % 2 == 0
+    return {"cd": code, "nm": f"T{code}", "sv": price_of(code) + (10 if down else -10), "nv": price_of(code),
+            "cv": 10, "cr": 0.99, "rf": "5" if down else "2", "ov": price_of(code), "hv": price_of(code) + 20,
+            "lv": price_of(code) - 20, "aq": int(code) * 100, "aa": 0, "ms": "OPEN"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.requests[url.path] += 1
+        if url.path == "/api/realtime":
+            codes = query.get("query", [""])[0].split(":", 1)[-1].split(",")
+            self.server.batch_sizes.append(len(codes))
+            datas = [realtime_item(c) for c in codes if c != UNKNOWN]
+            payload = {"resultCode": "success", "result": {"pollingInterval": 7000,
+                                                          "areas": [{"name": "SERVICE_ITEM", "datas": datas}]}}
+            self._send(200, json.dumps(payload, ensure_ascii=False).encode("euc-kr"),
+                       "application/json; charset=EUC-KR")
+        elif url.path == "/item/main.naver":
+            code = query.get("code", [""])[0]
+            fixture = os.path.join(FIXTURES, f"naver_item_{code}.html")
+            if code == UNKNOWN:
+                self._send(404, b"", "text/html")
+            elif os.path.exists(fixture):
+                with open(fixture, "rb") as f:
+                    self._send(200, f.read(), "text/html; charset=utf-8")
+            else:
+                page = ITEM_PAGE.format(code=code, price=price_of(code), cap=int(code) * 10, eps=100)
+                self._send(200, page.encode("utf-8"), "text/html; charset=utf-8")
+        else:
+            self._send(404, b"", "text/plain")
+
+
+class NaverStandIn:
+    """with NaverStandIn() as server: server.realtime_url, server.item_url, server.requests"""
+
+    def __init__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.requests = Counter()
+        self._server.batch_sizes = []
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def realtime_url(self):
+        return self.base_url + "/api/realtime"
+
+    @property
+    def item_url(self):
+        return self.base_url + "/item/main.naver"
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    @property
+    def batch_sizes(self):
+        return self._server.batch_sizes
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,101 @@
+import pytest
+import changelog
+from migrate_db_compact import migrate
+
+
+def write_prices(conn, rows, verb="INSERT OR REPLACE"):
+    conn.executemany(f"{verb} INTO daily_price (code, date, close) VALUES (?, ?, ?)", rows)
+    conn.commit()
+
+
+@pytest.fixture
+def conn(db_conn):
+    db_conn.executemany("INSERT INTO tickers (code, name, market) VALUES (?, ?, 'KOSPI')", [("000001", "A"), ("000002", "B")])
+    write_prices(db_conn, [("000001", "20250102", 100)])  # before capture: not logged
+    changelog.enable(db_conn)
+    db_conn.commit()
+    return db_conn
+
+
+def logged(conn):
+    return conn.execute("SELECT tbl, code, date, op FROM changelog ORDER BY seq").fetchall()
+
+
+def test_inserts_replaces_and_updates_are_logged(conn):
+    write_prices(conn, [("000001", "20250103", 101), ("000001", "20250103", 102)])
+    conn.execute("UPDATE daily_price SET close = 99 WHERE code = '000001' AND date = '20250102'")
+    conn.execute("INSERT OR REPLACE INTO daily_supply (code, date, foreigner) VALUES ('000002', '20250102', 5)")
+    conn.commit()
+    assert logged(conn) == [("daily_price", "000001", 20250103, "I"), ("daily_price", "000001", 20250103, "I"),
+                            ("daily_price", "000001", 20250102, "U"), ("daily_supply", "000002", 20250102, "I")]
+    assert changelog.enabled_tables(conn) == ["daily_price", "daily_supply"]
+
+    changelog.disable(conn, ["daily_supply"])
+    conn.execute("INSERT INTO daily_supply (code, date) VALUES ('000001', '20250103')")
+    assert len(logged(conn)) == 4 and changelog.enabled_tables(conn) == ["daily_price"]
+
+
+def test_consumers_read_from_their_checkpoint(conn):
+    with pytest.raises(ValueError):
+        list(changelog.read_changes(conn, "nobody"))
+    assert changelog.register(conn, "early", from_start=True) == 0
+    write_prices(conn, [("000001", "20250103", 1)])
+    assert changelog.register(conn, "late") == 1  # starts at the end of the log
+    write_prices(conn, [("000002", "20250103", 2), ("000002", "20250106", 3)])
+
+    early = list(changelog.read_changes(conn, "early", page=2))
+    assert [c.seq for c in early] == [1, 2, 3] and early[0].code == "000001"
+    assert [(c.code, c.date) for c in changelog.read_changes(conn, "late")] == [("000002", 20250103), ("000002", 20250106)]
+    assert [c.seq for c in changelog.read_changes(conn, "early", ("daily_supply",))] == []
+    assert [c.seq for c in changelog.read_changes(conn, "early", until=2)] == [1, 2]
+
+    changelog.advance(conn, "early", 2)
+    assert changelog.status(conn)["consumers"] == {"early": 1, "late": 2}
+
+
+def test_compaction_keeps_what_a_consumer_still_needs(conn):
+    assert changelog.compact(conn) == 0  # no consumers: nothing is consumed
+    changelog.register(conn, "a", from_start=True)
+    changelog.register(conn, "b", from_start=True)
+    write_prices(conn, [("000001", "20250103", 1), ("000001", "20250106", 2)])   # seq 1, 2
+    write_prices(conn, [("000001", "20250103", 3)])                              # seq 3 repeats seq 1's key
+    changelog.advance(conn, "a", 3)
+    changelog.advance(conn, "b", 1)
+
+    assert changelog.compact(conn) == 1  # seq 1 (both consumers passed it)
+    assert [r[0] for r in conn.execute("SELECT seq FROM changelog")] == [2, 3]
+    write_prices(conn, [("000001", "20250106", 4)])                              # seq 4 repeats seq 2's key
+    assert changelog.compact(conn) == 1  # seq 2: b still gets the key through seq 4
+    assert [(c.seq, c.date) for c in changelog.read_changes(conn, "b")] == [(3, 20250103), (4, 20250106)]
+
+    changelog.advance(conn, "b", 4)
+    changelog.advance(conn, "a", 4)
+    changelog.compact(conn)
+    # An empty log keeps counting from the last seq
+    assert logged(conn) == [] and changelog.last_seq(conn) == 4
+    write_prices(conn, [("000002", "20250107", 5)])
+    assert [c.seq for c in changelog.read_changes(conn, "a")] == [5]
+
+
+def test_triggers_follow_the_compact_migration(conn):
+    migrate(conn)
+    triggers = dict(conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'changelog%'"))
+    assert triggers == {"changelog_daily_price_insert": "daily_price_compact",
+                        "changelog_daily_price_update": "daily_price_compact",
+                        "changelog_daily_supply_insert": "daily_supply_compact",
+                        "changelog_daily_supply_update": "daily_supply_compact"}
+    assert logged(conn) == []  # the copy itself is not a change
+
+    write_prices(conn, [("000002", "2025-01-03", 7)])  # through the view's INSTEAD OF trigger
+    conn.execute("UPDATE daily_price SET close = 8 WHERE code = '000002' AND date = 20250103")
+    conn.commit()
+    assert logged(conn) == [("daily_price", "000002", 20250103, "I"), ("daily_price", "000002", 20250103, "U")]
+
+
+def test_enable_requires_the_schema(tmp_path):
+    import sqlite3
+    bare = sqlite3.connect(str(tmp_path / "bare.db"))
+    bare.execute("CREATE TABLE daily_price (code TEXT, date TEXT, close REAL)")
+    with pytest.raises(RuntimeError):
+        changelog.enable(bare)
+    changelog.enable(bare, [])  # nothing captured (migrate_db_compact on an old DB)
@@ -0,0 +1,39 @@
+import pandas as pd
+from dart_accounts import normalize_statements, parse_amounts
+
+
+def test_parse_amounts():
+    assert parse_amounts(pd.Series(["1,234", "-", "-5,000", "n/a"])).tolist()[:3] == [1234.0, 0.0, -5000.0]
+    assert parse_amounts(pd.Series(["n/a"])).isna().all()
+
+
+def test_normalize_prefers_account_id_then_exact_name():
+    df = pd.DataFrame([
+        # 000001: consolidated wins; account_id beats names; exact name beats substring
+        ("000001", "CFS", "ifrs-full_Revenue", "영업수익", "900", "20240814000001"),
+        ("000001", "CFS", "", "매출액", "800", "20240814000001"),
+        ("000001", "CFS", "", "영업이익(손실)", "90", "20240814000001"),
+        ("000001", "CFS", "", "당기 순이익", "40", "20240814000001"),
+        ("000001", "OFS", "", "자본총계", "1", "20240814000001"),
+        ("000001", "CFS", "", "자본총계", "400", "20240814000001"),
+        # 000002: separate only, substring fallback skips non-operating income, '-' amounts
+        ("000002", "OFS", "", "이자수익", "300", "20240816000002"),
+        ("000002", "OFS", "", "금융수익", "20", "20240816000002"),
+        ("000002", "OFS", "", "영업수익합계", "250", "20240816000002"),
+        ("000002", "OFS", "", "영업이익", "-", "20240816000002"),
+        # 000003: only interest/other income -> no revenue
+        ("000003", "OFS", "", "이자수익", "70", "20240816000003"),
+        ("000003", "OFS", "", "기타수익", "5", "20240816000003"),
+        ("000003", "OFS", "", "영업외수익", "6", "20240816000003"),
+        ("000003", "OFS", "", "수익합계", "8", "20240816000003"),
+    ], columns=["stock_code", "fs_div", "account_id", "account_nm", "thstrm_amount", "rcept_no"])
+    out = normalize_statements(df)
+    assert out.loc["000001", ["revenue", "op_income", "net_income", "equity"]].tolist() == [900, 90, 40, 400]
+    assert out.loc["000001", "fs_div"] == "CFS"
+    assert out.loc["000002", ["revenue", "op_income", "net_income", "equity"]].tolist() == [250, 0, 0, 0]
+    assert out.loc["000003", "revenue"] == 8
+    assert out.loc["000002", "rcept_no"] == "20240816000002"
+
+
+def test_normalize_empty():
+    assert normalize_statements(pd.DataFrame()).empty
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+import pandas as pd
+from dart_corp_codes import load_corp_map, needs_refresh, refresh_corp_codes
+
+
+class FakeDart:
+    def __init__(self, rows):
+        self.rows = rows
+        self.downloads = 0
+
+    def corp_codes(self):
+        self.downloads += 1
+        return pd.DataFrame(self.rows, columns=["corp_code", "corp_name", "stock_code", "modify_date"])
+
+
+ROWS = [
+    ("00126380", "삼성전자", "005930", "20240101"),
+    ("00164779", "SK하이닉스", "000660", "20240101"),
+    ("00999999", "비상장", " ", "20240101"),
+]
+
+
+def test_mapping_is_cached_until_stale(db_conn):
+    dart = FakeDart(ROWS)
+    assert load_corp_map(db_conn, dart) == {"005930": "00126380", "000660": "00164779"}
+    assert load_corp_map(db_conn, dart, stock_codes=["005930", "000660"]) == {"005930": "00126380", "000660": "00164779"}
+    assert dart.downloads == 1
+
+    # Unknown ticker: refresh at most once per day
+    assert not needs_refresh(db_conn, ["035420"])
+    assert needs_refresh(db_conn, ["035420"], now=datetime.now() + timedelta(days=1))
+    assert needs_refresh(db_conn, now=datetime.now() + timedelta(days=8))
+
+
+def test_refresh_rewrites_only_changed_rows(db_conn):
+    refresh_corp_codes(db_conn, FakeDart(ROWS))
+    changed = refresh_corp_codes(db_conn, FakeDart([ROWS[0], ("00164779", "SK하이닉스", "000660", "20250301")]))
+    assert changed == 1
+
+
+def test_refresh_drops_unlisted_and_latest_modify_date_wins(db_conn):
+    refresh_corp_codes(db_conn, FakeDart(ROWS))
+    # 000660 delisted; 005930 listed under two corp codes (the newer one must win)
+    refresh_corp_codes(db_conn, FakeDart([ROWS[0], ("00888888", "삼성전자(신설)", "005930", "20250301")]))
+    assert db_conn.execute("SELECT COUNT(*) FROM dart_corp_codes WHERE stock_code = '000660'").fetchone()[0] == 0
+    assert load_corp_map(db_conn, FakeDart(ROWS)) == {"005930": "00888888"}
@@ -0,0 +1,48 @@
+import time
+import pytest
+from data_sources.recorder import open_source, FixtureNotFound, MODE_RECORD, MODE_REPLAY
+
+
+class FakeUpstream:
+    def __init__(self):
+        self.calls = 0
+        self.corp_codes = ["00126380"]
+
+    def get_price(self, code, date=None):
+        self.calls += 1
+        return {"code": code, "date": date, "close": 1000}
+
+    def broken(self, code):
+        raise ValueError(f"holiday {code}")
+
+
+def test_record_then_replay_roundtrip(tmp_path):
+    upstream = FakeUpstream()
+    rec = open_source("fake", lambda: upstream, mode=MODE_RECORD, fixture_dir=str(tmp_path))
+    live_result = rec.get_price("005930", date="20250102")
+    assert rec.corp_codes == ["00126380"]
+    with pytest.raises(ValueError):
+        rec.broken("005930")
+
+    def must_not_build():
+        raise AssertionError("replay must not build the live target")
+
+    rep = open_source("fake", must_not_build, mode=MODE_REPLAY, fixture_dir=str(tmp_path), latency=0)
+    assert rep.get_price("005930", date="20250102") == live_result
+    assert rep.corp_codes == ["00126380"]
+    with pytest.raises(ValueError, match="holiday"):
+        rep.broken("005930")
+    assert upstream.calls == 1
+
+
+def test_replay_missing_fixture_and_latency(tmp_path):
+    rec = open_source("fake", FakeUpstream, mode=MODE_RECORD, fixture_dir=str(tmp_path))
+    rec.get_price("000660")
+
+    rep = open_source("fake", FakeUpstream, mode=MODE_REPLAY, fixture_dir=str(tmp_path), latency=0.05)
+    with pytest.raises(FixtureNotFound):
+        rep.get_price("035420")
+
+    start = time.perf_counter()
+    rep.get_price("000660")
+    assert time.perf_counter() - start >= 0.05
@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import export_parquet
+
+
+def _seed(conn, dates):
+    conn.executemany("INSERT OR REPLACE INTO tickers (code, name, market) VALUES (?, ?, ?)",
+                     [("005930", "삼성전자", "KOSPI"), ("000660", "SK하이닉스", "KOSPI")])
+    for i, d in enumerate(dates):
+        conn.executemany(
+            "INSERT OR REPLACE INTO daily_price (code, date, close, per) VALUES (?, ?, ?, ?)",
+            [("005930", d, 70000 + i, 12.5), ("000660", d, 150000 + i, 8.0)])
+        conn.executemany(
+            "INSERT OR REPLACE INTO daily_supply (code, date, foreigner, institution) VALUES (?, ?, ?, ?)",
+            [("005930", d, 100 * i, -5), ("000660", d, -100 * i, 7)])
+    conn.commit()
+
+
+def test_export_appends_only_new_partitions(db_conn, tmp_path):
+    out = str(tmp_path / "pq")
+    _seed(db_conn, ["20250102", "2025-01-03"])
+    assert export_parquet.export_all(db_conn, out) == {"daily_price": 2, "daily_supply": 2}
+
+    _seed(db_conn, ["20250106"])
+    assert export_parquet.export_table(db_conn, "daily_price", out) == 1
+    assert export_parquet.existing_partitions(f"{out}/daily_price") == {"20250102", "20250103", "20250106"}
+    # Late correction: --since forces a rewrite from that date on
+    assert export_parquet.export_table(db_conn, "daily_supply", out, since="20250103") == 2
+
+
+def test_query_pushdown(db_conn, tmp_path):
+    out = str(tmp_path / "pq")
+    _seed(db_conn, ["20250102", "20250103", "20250106"])
+    export_parquet.export_all(db_conn, out)
+
+    df = export_parquet.query("daily_price", ["code", "date", "close"], start="2025-01-03",
+                              codes=["005930"], base_dir=out)
+    assert sorted(df["date"]) == ["20250103", "20250106"]
+    assert set(df["code"]) == {"005930"}
+
+    arrays = export_parquet.query_arrays("daily_supply", ["code", "foreigner"],
+                                         filters=[("foreigner", ">", 0)], base_dir=out)
+    assert list(arrays["code"]) == ["005930", "005930"]
+
+
+def test_mixed_null_partitions_share_one_schema(db_conn, tmp_path):
+    out = str(tmp_path / "pq")
+    # pension is NULL for every row of the first day, filled on the second
+    db_conn.executemany("INSERT INTO daily_supply (code, date, foreigner, pension) VALUES (?, ?, ?, ?)",
+                        [("005930", "20250102", 1, None), ("000660", "20250102", 2, None),
+                         ("005930", "20250103", 3, 30), ("000660", "20250103", None, 40)])
+    db_conn.commit()
+    export_parquet.export_table(db_conn, "daily_supply", out)
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    for d in ("20250102", "20250103"):
+        schema = pq.read_schema(f"{out}/daily_supply/date={d}/part-0.parquet")
+        assert schema.field("pension").type == pa.int64()
+        assert schema.field("foreigner").type == pa.int64()
+
+    df = export_parquet.query("daily_supply", ["code", "date", "pension"],
+                              filters=[("pension", ">", 0)], base_dir=out)
+    assert sorted(df["pension"]) == [30, 40]
@@ -0,0 +1,149 @@
+import pandas as pd
+import batch_financial_quarterly as bfq
+from data_sources.dart_api import DartApiError, STATUS_LIMIT
+from data_sources.rate_limit import TokenBucket, DailyQuota, RequestScheduler
+from batch_financial_quarterly import fetch_statements_bulk, parse_statements, parse_report_period, refresh_incremental
+
+
+
+def serial_scheduler():
+    return RequestScheduler(TokenBucket(1000), workers=1)
+
+
+STATEMENTS = {
+    # corp_code: [(fs_div, account_nm, thstrm_amount)]
+    "00000001": [("CFS", "매출액", "1,000"), ("CFS", "영업이익", "100"), ("CFS", "당기순이익", "50"),
+                 ("CFS", "자본총계", "500"), ("OFS", "매출액", "900")],
+    "00000002": [("OFS", "영업수익", "200"), ("OFS", "영업이익", "-"), ("OFS", "당기순이익", "10"),
+                 ("OFS", "자본총계", "0")],
+    "00000003": [("CFS", "매출액", "300"), ("CFS", "영업이익", "30"), ("CFS", "당기순이익", "3"),
+                 ("CFS", "자본총계", "30")],
+}
+
+
+class FakeDart:
+    def __init__(self, broken_batch=None):
+        self.calls = []
+        self.broken_batch = broken_batch
+
+    def finstate(self, corp_code, bsns_year, reprt_code='11011'):
+        self.calls.append(corp_code)
+        if corp_code == self.broken_batch:
+            raise ConnectionError("RemoteDisconnected")
+        rows = [
+            {"corp_code": c, "stock_code": f"{int(c):06d}", "rcept_no": "20240814000001",
+             "fs_div": fs, "account_nm": nm, "thstrm_amount": amt}
+            for c in corp_code.split(',') for fs, nm, amt in STATEMENTS[c]
+        ]
+        return pd.DataFrame(rows)
+
+
+def test_bulk_fetch_batches_and_falls_back_per_company(monkeypatch):
+    monkeypatch.setattr(bfq.time, "sleep", lambda s: None)
+    dart = FakeDart(broken_batch="00000001,00000002")
+    df, failed = fetch_statements_bulk(dart, sorted(STATEMENTS), 2024, '11012', batch_size=2,
+                                       scheduler=serial_scheduler())
+    assert failed == []
+    # broken batch: 3 attempts, then one call per company; the second batch goes through in one call
+    assert dart.calls == ["00000001,00000002"] * 3 + ["00000001", "00000002", "00000003"]
+    assert set(df["corp_code"]) == set(STATEMENTS)
+
+
+class LimitedDart(FakeDart):
+    """Bulk call disconnects; the per-company fallback hits the daily limit (020)."""
+
+    def finstate(self, corp_code, bsns_year, reprt_code='11011'):
+        self.calls.append(corp_code)
+        if ',' in corp_code:
+            raise ConnectionError("RemoteDisconnected")
+        if corp_code == "00000002":
+            raise DartApiError(STATUS_LIMIT, "사용한도를 초과하였습니다.")
+        return FakeDart.finstate(FakeDart(), corp_code, bsns_year, reprt_code)
+
+
+def test_limit_in_per_company_fallback_stops_remaining_calls(monkeypatch):
+    monkeypatch.setattr(bfq.time, "sleep", lambda s: None)
+    dart = LimitedDart()
+    scheduler = serial_scheduler()
+    df, failed = fetch_statements_bulk(dart, sorted(STATEMENTS), 2024, '11012', batch_size=3,
+                                       scheduler=scheduler)
+    # 020 is not retried and no further company is requested
+    assert dart.calls == ["00000001,00000002,00000003"] * 3 + ["00000001", "00000002"]
+    assert failed == ["00000002", "00000003"]
+    assert set(df["corp_code"]) == {"00000001"}
+    assert scheduler.stopped
+
+
+def test_parse_prefers_consolidated_and_computes_ratios():
+    df = FakeDart().finstate(','.join(sorted(STATEMENTS)), 2024)
+    rows = {r["code"]: r for r in parse_statements(df, 2024, 2)}
+    assert rows["000001"]["revenue"] == 1000 and rows["000001"]["fs_div"] == "CFS"
+    assert rows["000001"]["operating_margin"] == 10 and rows["000001"]["roe"] == 10
+    assert rows["000002"]["op_income"] == 0 and rows["000002"]["roe"] == 0
+    assert rows["000003"]["published_at"] == "20240814" and rows["000003"]["period"] == "2024Q2"
+
+
+def test_parse_report_period():
+    assert parse_report_period("분기보고서 (2024.09)") == (2024, 3)
+    assert parse_report_period("[기재정정]반기보고서 (2024.06)") == (2024, 2)
+    assert parse_report_period("사업보고서 (2023.12)") == (2023, 4)
+    assert parse_report_period("주요사항보고서(자기주식취득결정)") is None
+
+
+class FilingDart(FakeDart):
+    def __init__(self, filings, published):
+        super().__init__()
+        self.filings = filings
+        self.published = published
+        self.list_calls = []
+
+    def list_page(self, start, end, kind='A', final=True, page_no=1, page_count=100):
+        self.list_calls.append((start, end))
+        return pd.DataFrame(self.filings), 1
+
+    def finstate(self, corp_code, bsns_year, reprt_code='11011'):
+        df = super().finstate(corp_code, bsns_year, reprt_code)
+        return df[df["corp_code"].isin(self.published)]
+
+
+def test_incremental_refresh_tracks_watermark_and_pending(db_conn, monkeypatch):
+    monkeypatch.setattr(bfq.time, "sleep", lambda s: None)
+    filings = [
+        {"corp_code": "00000001", "stock_code": "000001", "report_nm": "반기보고서 (2024.06)", "rcept_no": "20240814000001"},
+        {"corp_code": "00000002", "stock_code": "000002", "report_nm": "반기보고서 (2024.06)", "rcept_no": "20240814000002"},
+        {"corp_code": "00000003", "stock_code": "000003", "report_nm": "반기보고서 (2024.06)", "rcept_no": "20240814000003"},
+    ]
+    active = ["000001", "000002"]  # 000003 is not an active ticker
+    dart = FilingDart(filings, published={"00000001"})
+    assert refresh_incremental(db_conn, dart, active, since="20240801", until="20240814",
+                               scheduler=serial_scheduler(), held=set()) == 1
+    status = dict(db_conn.execute("SELECT code, status FROM financial_refresh_status").fetchall())
+    assert status == {"000001": "ok", "000002": "pending"}
+
+    # Next run starts from the watermark, skips 'ok' and retries 'pending'
+    dart = FilingDart([], published={"00000001", "00000002"})
+    assert refresh_incremental(db_conn, dart, active, until="20240815", scheduler=serial_scheduler(), held=set()) == 1
+    assert dart.list_calls == [("20240814", "20240815")]
+    assert dart.calls == ["00000002"]
+    assert db_conn.execute("SELECT COUNT(*) FROM financials WHERE period = '2024Q2'").fetchone()[0] == 2
+
+
+class PagedDart:
+    def __init__(self, pages):
+        self.pages = pages
+        self.pages_read = []
+
+    def list_page(self, start, end, kind='A', final=True, page_no=1, page_count=100):
+        self.pages_read.append((start, page_no))
+        return pd.DataFrame([{"rcept_no": f"{start}-{page_no}"}]), self.pages
+
+
+def test_every_list_page_takes_a_quota_unit(db_conn, tmp_path):
+    quota = DailyQuota(str(tmp_path / "dailyport.db"), "dart", 100)
+    scheduler = RequestScheduler(TokenBucket(1000), quota, workers=1)
+    dart = PagedDart(pages=3)
+    # 2 windows (LIST_WINDOW_DAYS) x 3 pages
+    filings = bfq.list_periodic_filings(dart, "20240101", "20240515", scheduler)
+    assert len(dart.pages_read) == 6 and len(filings) == 6
+    assert [p for _, p in dart.pages_read] == [1, 2, 3, 1, 2, 3]
+    assert quota.used() == 6
@@ -0,0 +1,94 @@
+import pytest
+from financials import (
+    period_key, published_date, filing_deadline, upsert_financials, load_financials_asof, has_financials,
+    refresh_ttm, load_ttm_asof, load_profitability_asof
+)
+
+
+def _row(code, year, quarter, published_at, roe):
+    return {"code": code, "period": period_key(year, quarter), "published_at": published_at, "fs_div": "CFS",
+            "revenue": 100.0, "op_income": 10.0, "net_income": 5.0, "equity": 50.0,
+            "operating_margin": 10.0, "roe": roe}
+
+
+def test_published_date_falls_back_to_filing_deadline():
+    assert published_date("20240814000123", 2024, 2) == "20240814"
+    assert published_date(None, 2024, 4) == "20250331"
+    assert published_date("2024-bad", 2024, 1) == filing_deadline(2024, 1) == "20240515"
+
+
+def test_asof_lookup_never_sees_unpublished_quarters(db_conn):
+    assert not has_financials(db_conn)
+    upsert_financials(db_conn, [
+        _row("005930", 2024, 2, "20240814", 8.0),
+        _row("005930", 2024, 3, "20241114", 9.0),
+        _row("000660", 2024, 3, "20241030", 20.0),
+    ])
+    db_conn.commit()
+    assert has_financials(db_conn)
+
+    before = load_financials_asof(db_conn, "20241031")
+    assert before["005930"]["period"] == "2024Q2" and before["005930"]["roe"] == 8.0
+    assert before["000660"]["period"] == "2024Q3"
+
+    after = load_financials_asof(db_conn, "2024-11-14", codes=["005930"])
+    assert list(after) == ["005930"] and after["005930"]["roe"] == 9.0
+    assert load_financials_asof(db_conn, "20240101") == {}
+
+
+def _quarter(code, year, quarter, revenue, equity):
+    # Q1-Q3 are 3-month amounts; Q4 carries the full year as DART reports it
+    return {"code": code, "period": period_key(year, quarter), "published_at": filing_deadline(year, quarter),
+            "fs_div": "CFS", "revenue": revenue, "op_income": revenue / 10, "net_income": revenue / 20,
+            "equity": equity, "operating_margin": 10.0, "roe": None}
+
+
+def test_ttm_makes_q4_discrete_and_needs_four_quarters(db_conn):
+    upsert_financials(db_conn, [
+        _quarter("005930", 2023, 1, 100, 1000), _quarter("005930", 2023, 2, 110, 1000),
+        _quarter("005930", 2023, 3, 120, 1000), _quarter("005930", 2023, 4, 480, 1000),
+        _quarter("005930", 2024, 1, 125, 1200), _quarter("005930", 2024, 2, 130, 1200),
+        # 000660: Q2 missing -> no complete window, Q4 cannot be made discrete
+        _quarter("000660", 2023, 1, 50, 500), _quarter("000660", 2023, 3, 50, 500),
+        _quarter("000660", 2023, 4, 200, 500),
+    ])
+    assert refresh_ttm(db_conn) == 9
+    db_conn.commit()
+
+    rows = {(r[0], r[1]): r[2:] for r in db_conn.execute(
+        "SELECT code, period, revenue_ttm, roe_ttm, revenue_yoy, operating_margin_ttm FROM financials_ttm")}
+    # 2023Q4 discrete = 480 - 330 = 150; window 2023Q1..Q4 sums to the annual figure
+    assert rows[("005930", "2023Q4")][0] == 480
+    # 2024Q2 window: 120 + 150 + 125 + 130
+    assert rows[("005930", "2024Q2")][0] == 525
+    assert rows[("005930", "2024Q2")][1] == pytest.approx(525 / 20 / 1100 * 100)
+    assert rows[("005930", "2024Q2")][2] == pytest.approx((130 - 110) / 110 * 100)
+    assert rows[("005930", "2024Q2")][3] == pytest.approx(10.0)
+    assert rows[("005930", "2023Q3")][0] is None
+    assert rows[("000660", "2023Q4")][0] is None
+
+    asof = load_ttm_asof(db_conn, "20240901")
+    assert asof["005930"]["period"] == "2024Q2" and asof["005930"]["revenue_ttm"] == 525
+    assert load_ttm_asof(db_conn, "20240501", codes=["005930"])["005930"]["period"] == "2023Q4"
+
+
+def test_profitability_falls_back_to_the_latest_quarter_without_four_quarters(db_conn):
+    assert load_profitability_asof(db_conn, "20241231") == {}
+    # The nightly run stores one quarter at a time: no TTM window yet
+    upsert_financials(db_conn, [_row("005930", 2024, 3, "20241114", 2.5), _row("000660", 2023, 4, "20240315", 12.0)])
+    refresh_ttm(db_conn)
+    db_conn.commit()
+
+    fin = load_profitability_asof(db_conn, "20241231")
+    assert fin["005930"] == {"roe": 10.0, "operating_margin": 10.0, "source": "quarter"}  # Q3 annualized
+    assert fin["000660"]["roe"] == 12.0  # annual report
+
+    # Backfilled history completes the 2024Q3 window
+    upsert_financials(db_conn, [_quarter("005930", 2023, q, 100, 50) for q in (1, 2, 3)]
+                      + [_quarter("005930", 2023, 4, 400, 50)] + [_quarter("005930", 2024, q, 100, 50) for q in (1, 2)])
+    refresh_ttm(db_conn)
+    db_conn.commit()
+    fin = load_profitability_asof(db_conn, "20241231")
+    assert fin["005930"]["source"] == "ttm"
+    assert fin["005930"]["roe"] == load_ttm_asof(db_conn, "20241231")["005930"]["roe_ttm"] == pytest.approx(40.0)
+    assert fin["000660"]["source"] == "quarter"
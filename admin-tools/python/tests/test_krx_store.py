@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+from data_sources.krx_store import ReadThroughKrx
+
+# Mon 2025-01-06 .. Fri 2025-01-10; the DB holds the market through Thursday
+WEEK = ["20250106", "20250107", "20250108", "20250109"]
+CODES = ["000001", "000002", "000003"]
+
+
+class FakeKrx:
+    def __init__(self):
+        self.calls = []
+
+    def get_market_ohlcv(self, start, end=None, code=None, market=None):
+        self.calls.append(("ohlcv", start, end, code))
+        days = pd.bdate_range(start, end or start)
+        return pd.DataFrame({"시가": 1.0, "고가": 2.0, "저가": 0.5, "종가": 110.0, "거래량": 7,
+                             "거래대금": 770.0, "등락률": 10.0}, index=pd.Index(days, name="날짜"))
+
+    def get_market_trading_value_by_date(self, start, end, code):
+        self.calls.append(("investor", start, end, code))
+        days = pd.bdate_range(start, end)
+        return pd.DataFrame({"기관합계": 3, "기타법인": 0, "개인": 1, "외국인합계": 2, "전체": 6},
+                            index=pd.Index(days, name="날짜"))
+
+    def get_market_ticker_name(self, code):
+        return f"T{code}"
+
+
+@pytest.fixture
+def store(db_conn, tmp_path):
+    db_conn.executemany("INSERT INTO tickers (code, name, market) VALUES (?, ?, 'KOSPI')", [(c, c) for c in CODES])
+    for i, day in enumerate(["20250103"] + WEEK):
+        db_conn.executemany("""
+            INSERT INTO daily_price (code, date, open, high, low, close, volume) VALUES (?, ?, 1, 2, 0.5, ?, 5)
+        """, [(c, day, 100 + i) for c in CODES if not (c == "000003" and day == "20250108")])
+        db_conn.executemany("INSERT INTO daily_supply (code, date, individual, foreigner, institution) VALUES (?, ?, 10, 20, 30)",
+                            [(c, day) for c in CODES])
+    db_conn.commit()
+    krx = FakeKrx()
+    return ReadThroughKrx(str(tmp_path / "dailyport.db"), krx, min_market_rows=2), krx
+
+
+def test_covered_window_is_served_from_sqlite(store):
+    provider, krx = store
+    df = provider.get_market_ohlcv("20250106", "20250109", "000001")
+    assert krx.calls == []
+    assert df.index.strftime("%Y%m%d").tolist() == WEEK
+    assert df["종가"].tolist() == [101, 102, 103, 104]
+    # 등락률 from the previous close, including the day before the window
+    assert df["등락률"].tolist() == [1.0, 0.99, 0.98, 0.97]
+
+    flows = provider.get_market_trading_value_by_date("20250106", "20250109", "000001")
+    assert flows.iloc[-1][["개인", "외국인합계", "기관합계"]].tolist() == [10, 20, 30]
+    assert krx.calls == [] and provider.stats()["local_days"] == 8
+
+
+def test_days_past_the_db_go_to_krx_without_write_back(store, db_conn):
+    provider, krx = store
+    df = provider.get_market_ohlcv("20250106", "20250110", "000001")
+    assert krx.calls == [("ohlcv", "20250110", "20250110", "000001")]
+    assert df.index.strftime("%Y%m%d").tolist() == WEEK + ["20250110"]
+    assert df["등락률"].iloc[-1] == 10.0  # KRX row keeps its own rate
+    # Friday stays absent: the batch fills the whole market day later
+    assert db_conn.execute("SELECT COUNT(*) FROM daily_price WHERE date = '20250110'").fetchone()[0] == 0
+
+
+def test_ticker_gap_on_a_market_day_is_fetched_but_not_written(store, db_conn):
+    provider, krx = store
+    df = provider.get_market_ohlcv("20250106", "20250109", "000003")
+    assert krx.calls == [("ohlcv", "20250108", "20250108", "000003")]
+    assert df.loc["2025-01-08", "종가"] == 110.0
+    # An OHLCV-only row would block batch_daily from ever storing the full one
+    assert db_conn.execute("SELECT COUNT(*) FROM daily_price WHERE code = '000003' AND date = '20250108'").fetchone()[0] == 0
+
+    provider.get_market_trading_value_by_date("20250106", "20250110", "000003")
+    assert db_conn.execute("SELECT COUNT(*) FROM daily_supply WHERE date = '20250110'").fetchone()[0] == 0
+    assert provider.stats() == {"local_days": 7, "remote_calls": 2}
+
+
+def test_unknown_tickers_and_other_calls_pass_through(store, db_conn):
+    provider, krx = store
+    df = provider.get_market_ohlcv("20250106", "20250109", "069500")  # ETF: never in daily_price
+    assert krx.calls == [("ohlcv", "20250106", "20250109", "069500")] and len(df) == 4
+    assert db_conn.execute("SELECT COUNT(*) FROM daily_price WHERE code = '069500'").fetchone()[0] == 0
+
+    provider.get_market_ohlcv("20250109", market="ALL")
+    assert krx.calls[-1] == ("ohlcv", "20250109", None, None)
+    assert provider.get_market_ticker_name("000001") == "T000001"
+
+
+def test_missing_db_is_a_plain_pykrx_call(tmp_path):
+    krx = FakeKrx()
+    provider = ReadThroughKrx(str(tmp_path / "none.db"), krx)
+    assert len(provider.get_market_trading_value_by_date("20250106", "20250107", "000001")) == 2
+    assert krx.calls == [("investor", "20250106", "20250107", "000001")]
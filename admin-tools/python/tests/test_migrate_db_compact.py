@@ -0,0 +1,82 @@
+import sqlite3
+import pytest
+import migrate_db_compact
+from migrate_db_compact import migrate, is_compact
+from db_init import strip_view_indexes
+from tests.conftest import SCHEMA_PATH
+
+
+def _seed(conn):
+    conn.execute("INSERT INTO tickers (code, name, market) VALUES ('005930', '삼성전자', 'KOSPI')")
+    conn.executemany("INSERT INTO daily_price (code, date, close, market_cap) VALUES (?, ?, ?, ?)",
+                     [("005930", "20250102", 70000, 4e14), ("005930", "2025-01-03", 71000, 4e14),
+                      ("000660", "20250103", 150000, 1e14)])
+    conn.executemany("INSERT INTO daily_supply (code, date, foreigner, institution, pension) VALUES (?, ?, ?, ?, ?)",
+                     [("005930", "20250102", 5, 6, 7), ("000660", "20250103", -1, 2, 3)])
+    conn.commit()
+
+
+def test_migration_preserves_rows_and_queries(db_conn, monkeypatch):
+    monkeypatch.setattr(migrate_db_compact, "COPY_BATCH_TICKERS", 1)
+    _seed(db_conn)
+    assert migrate(db_conn) is True
+    assert is_compact(db_conn)
+    assert migrate(db_conn) is False
+
+    rows = db_conn.execute("SELECT code, date, close FROM daily_price ORDER BY code, date").fetchall()
+    assert rows == [("000660", 20250103, 150000), ("005930", 20250102, 70000), ("005930", 20250103, 71000)]
+    # Text parameters still match the INTEGER date column
+    assert db_conn.execute("SELECT COUNT(*) FROM daily_price WHERE date = ?", ("20250103",)).fetchone()[0] == 2
+    assert db_conn.execute("SELECT pension FROM daily_supply WHERE code = '005930'").fetchone()[0] == 7
+
+
+def test_writes_through_compatibility_views(db_conn):
+    _seed(db_conn)
+    migrate(db_conn)
+
+    db_conn.execute("INSERT OR REPLACE INTO daily_price (code, date, close) VALUES ('373220', '20250106', 400000)")
+    db_conn.execute("INSERT OR REPLACE INTO daily_price (code, date, close) VALUES ('005930', '2025-01-03', 72000)")
+    db_conn.execute("UPDATE daily_price SET per = 11.5 WHERE code = '005930' AND date >= '20250102'")
+    db_conn.execute("DELETE FROM daily_supply WHERE code = '000660'")
+    db_conn.commit()
+
+    assert db_conn.execute("SELECT close, per FROM daily_price WHERE code = '005930' AND date = 20250103").fetchone() == (72000, 11.5)
+    assert db_conn.execute("SELECT close FROM daily_price WHERE code = '373220'").fetchone() == (400000,)
+    assert db_conn.execute("SELECT COUNT(*) FROM daily_supply_compact").fetchone()[0] == 1
+
+
+def test_hot_lookups_use_compact_indexes(db_conn):
+    _seed(db_conn)
+    migrate(db_conn)
+    plan = ' '.join(r[3] for r in db_conn.execute(
+        "EXPLAIN QUERY PLAN SELECT code, foreigner FROM daily_supply WHERE date = ?", ("20250103",)))
+    assert "COVERING INDEX idx_daily_supply_compact_day" in plan
+    plan = ' '.join(r[3] for r in db_conn.execute(
+        "EXPLAIN QUERY PLAN SELECT close FROM daily_price WHERE code = ? AND date < ? ORDER BY date DESC LIMIT 20",
+        ("005930", "20250103")))
+    assert "PRIMARY KEY (code_id=? AND day<?)" in plan and "TEMP B-TREE" not in plan
+
+
+def test_schema_rerun_after_migration(db_conn):
+    """db_init.py re-applies the schema every night; it must not trip over the views."""
+    _seed(db_conn)
+    migrate(db_conn)
+    with open(SCHEMA_PATH, encoding="utf-8") as f:
+        schema_sql = f.read()
+    db_conn.executescript(strip_view_indexes(schema_sql))
+
+
+def test_view_inserts_keep_defaults_and_conflict_policy(db_conn):
+    _seed(db_conn)
+    migrate(db_conn)
+
+    # pension is declared DEFAULT 0; the view must not turn an omitted value into NULL
+    db_conn.execute("INSERT OR REPLACE INTO daily_supply (code, date, foreigner) VALUES ('373220', '20250106', 1)")
+    assert db_conn.execute("SELECT pension FROM daily_supply WHERE code = '373220'").fetchone() == (0,)
+
+    db_conn.execute("INSERT OR IGNORE INTO daily_price (code, date, close) VALUES ('005930', '20250102', 1)")
+    assert db_conn.execute("SELECT close FROM daily_price WHERE code = '005930' AND date = 20250102").fetchone() == (70000,)
+
+    with pytest.raises(sqlite3.OperationalError, match="UPSERT"):
+        db_conn.execute("INSERT INTO daily_price (code, date, close) VALUES ('005930', '20250102', 1) "
+                        "ON CONFLICT(code, date) DO UPDATE SET close = excluded.close")
@@ -0,0 +1,52 @@
+import os
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+
+from data_sources import naver_parse
+from data_sources.naver_parse import parse_stock_page, parse_etf_page, benchmark, ENGINE_BS4, ENGINE_LXML
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+PAGES = {code: os.path.join(FIXTURES, f"naver_item_{code}.html") for code in ("005930", "000660", "069500")}
+
+
+def _page(code):
+    with open(PAGES[code], encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("code", sorted(PAGES))
+def test_lxml_fragments_match_bs4_on_saved_pages(code):
+    html = _page(code)
+    assert naver_parse._fragments(html) is not None
+    assert parse_stock_page(html, code, ENGINE_LXML) == parse_stock_page(html, code, ENGINE_BS4)
+    assert parse_etf_page(html, code, ENGINE_LXML) == parse_etf_page(html, code, ENGINE_BS4)
+
+
+def test_extracted_values():
+    up = parse_stock_page(_page("005930"), "005930")
+    assert (up["name"], up["currentPrice"], up["changePrice"], up["changePercent"]) == ("삼성전자", 71000, 1000, 1.43)
+    assert (up["per"], up["pbr"], up["marketCap"]) == (12.81, 1.15, 424_1432 * 100_000_000)
+    down = parse_stock_page(_page("000660"), "000660")
+    assert (down["changePrice"], down["changePercent"]) == (-4200, -2.25)
+    etf = parse_etf_page(_page("069500"), "069500")
+    assert (etf["nav"], etf["premiumDiscount"]) == (34250, -0.1)
+
+
+def test_falls_back_to_full_page_when_blocks_are_missing():
+    html = _page("005930").replace('class="aside_invest_info"', 'class="aside_other"')
+    assert naver_parse._fragments(html) is None
+    assert parse_stock_page(html, "005930", ENGINE_LXML) == parse_stock_page(html, "005930", ENGINE_BS4)
+    assert parse_stock_page("<html></html>", "005930") ["name"] == "005930"
+
+
+def test_element_slices_balance_nested_tags():
+    html = '<div class="a x"><div>in<div>deep</div></div></div><div class="ab">no</div><div class="a">2</div>'
+    assert naver_parse._element_slices(html, "a") == [
+        '<div class="a x"><div>in<div>deep</div></div></div>', '<div class="a">2</div>']
+
+
+def test_lxml_engine_is_several_times_faster():
+    timings = benchmark(_page("005930"), repeat=5)
+    assert timings[ENGINE_LXML] * 3 < timings[ENGINE_BS4]
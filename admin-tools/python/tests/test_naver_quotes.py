@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from data_sources import naver_finance
+from data_sources.rate_limit import TokenBucket
+from data_sources.recorder import HttpResponse
+from data_sources.quote_cache import QuoteCache, SingleFlight
+
+PAGE = """
+<div class="wrap_company"><h2><a href="#">{name}</a></h2></div>
+<p class="no_today"><em><span class="blind">{price}</span></em></p>
+<p class="no_exday"><em class="no_up"><span class="blind">100</span></em>
+<em class="no_up"><span class="blind">1.50</span></em></p>
+<em id="_per">12.3</em><em id="_pbr">1.1</em><em id="_market_sum">4,000</em>
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class SlowNaver:
+    """Fake Naver HTTP: fixed latency, tracks how many requests are in flight."""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=10):
+        ticker = url.rsplit("=", 1)[1]
+        with self._lock:
+            self.calls.append(ticker)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        if ticker == "999999":
+            return HttpResponse(404, "")
+        return HttpResponse(200, PAGE.format(name=f"T{ticker}", price=f"{int(ticker) % 1000 + 1000:,}"))
+
+
+@pytest.fixture
+def naver(monkeypatch):
+    fake = SlowNaver()
+    monkeypatch.setattr(naver_finance, "_http", fake)
+    monkeypatch.setattr(naver_finance, "_limiter", TokenBucket(1000))
+    monkeypatch.setattr(naver_finance, "MAX_CONCURRENCY", 4)
+    monkeypatch.setattr(naver_finance, "_cache", QuoteCache())
+    monkeypatch.setattr(naver_finance, "_flights", SingleFlight())
+    return fake
+
+
+TICKERS = [f"{i:06d}" for i in range(1, 21)]
+
+
+def test_multiple_quotes_are_concurrent_and_bounded(naver):
+    started = time.perf_counter()
+    quotes = naver_finance.get_multiple_quotes(TICKERS + ["999999", "000001"])
+    elapsed = time.perf_counter() - started
+
+    assert list(quotes) == TICKERS  # input order, failures dropped, duplicates fetched once
+    assert quotes["000005"]["currentPrice"] == 1005 and quotes["000005"]["changePrice"] == 100
+    assert sorted(naver.calls) == sorted(TICKERS + ["999999"])
+    assert naver.max_in_flight <= 4
+    # 21 requests x 50ms serially would be > 1s
+    assert elapsed < 21 * naver.latency / 2
+
+    # Second round is served from the cache without new requests
+    naver.calls.clear()
+    assert list(naver_finance.iter_quotes(TICKERS[:3])) == [(t, quotes[t]) for t in TICKERS[:3]]
+    assert naver.calls == []
+
+
+def test_async_quotes_complete_out_of_order(naver):
+    async def collect():
+        return [t async for t, q in naver_finance.aiter_quotes(TICKERS, max_concurrency=3) if q]
+
+    order = asyncio.run(collect())
+    assert sorted(order) == TICKERS
+    assert naver.max_in_flight <= 3
+    quotes = asyncio.run(naver_finance.get_multiple_quotes_async(TICKERS[:5]))
+    assert list(quotes) == TICKERS[:5]
+
+
+def test_global_rate_limit_applies_across_threads(naver, monkeypatch):
+    naver.latency = 0
+    monkeypatch.setattr(naver_finance, "_limiter", TokenBucket(50, capacity=1))
+    started = time.perf_counter()
+    naver_finance.get_multiple_quotes(TICKERS[:11], force_refresh=True)
+    assert time.perf_counter() - started >= 10 / 50 * 0.9
+
+
+def test_concurrent_callers_share_one_request(naver):
+    naver.latency = 0.1
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        quotes = list(pool.map(lambda _: naver_finance.get_stock_quote("000042", force_refresh=True), range(8)))
+    assert naver.calls == ["000042"]
+    assert all(q is quotes[0] for q in quotes)
+    assert naver_finance.cache_stats()["coalesced"] == 7
+
+
+def test_stale_quote_is_served_while_one_refresh_runs(naver, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(naver_finance, "_cache", QuoteCache(stale_ttl=300, clock=clock))
+    old = {"ticker": "000007", "currentPrice": 1}
+    naver_finance._cache.set(naver_finance.NS_STOCK, "000007", old, ttl=60)
+    clock.now += 61
+    naver.latency = 0.2
+
+    started = time.perf_counter()
+    served = [naver_finance.get_stock_quote("000007") for _ in range(5)]
+    assert time.perf_counter() - started < naver.latency
+    assert all(q is old for q in served)
+
+    deadline = time.time() + 5
+    while naver_finance._flights.in_flight((naver_finance.NS_STOCK, "000007")) and time.time() < deadline:
+        time.sleep(0.01)
+    assert naver.calls == ["000007"]
+    assert naver_finance.get_stock_quote("000007")["currentPrice"] == 1007
+    stats = naver_finance.cache_stats()
+    assert (stats["stale_hits"], stats["background_refreshes"]) == (5, 1)
+
+    # Past the stale window the caller waits for a fresh quote
+    clock.now += 10_000_000
+    naver.calls.clear()
+    assert naver_finance.get_stock_quote("000007")["currentPrice"] == 1007
+    assert naver.calls == ["000007"]
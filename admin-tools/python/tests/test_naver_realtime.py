@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from data_sources import naver_finance
+from data_sources.rate_limit import TokenBucket
+from data_sources.recorder import HttpClient
+from data_sources.quote_cache import QuoteCache, SingleFlight
+from tests.naver_server import NaverStandIn, UNKNOWN, price_of
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with NaverStandIn() as standin:
+        monkeypatch.setattr(naver_finance, "_http", HttpClient(pool_size=4))
+        monkeypatch.setattr(naver_finance, "_limiter", TokenBucket(1000))
+        monkeypatch.setattr(naver_finance, "_cache", QuoteCache())
+        monkeypatch.setattr(naver_finance, "_flights", SingleFlight())
+        monkeypatch.setattr(naver_finance, "MAX_CONCURRENCY", 4)
+        monkeypatch.setattr(naver_finance, "REALTIME_URL", standin.realtime_url)
+        monkeypatch.setattr(naver_finance, "ITEM_URL", standin.item_url)
+        monkeypatch.setattr(naver_finance, "REALTIME_BATCH", 100)
+        yield standin
+
+
+WATCHLIST = [f"{i:06d}" for i in range(100, 300)]
+
+
+def test_watchlist_prices_cost_a_few_requests(server):
+    quotes = naver_finance.get_realtime_quotes(WATCHLIST + [UNKNOWN], fundamentals=False)
+
+    assert list(quotes) == WATCHLIST
+    assert server.requests["/api/realtime"] == 3 and server.batch_sizes == [100, 100, 1]
+    assert server.requests["/item/main.naver"] == 0
+    up, down = quotes["000101"], quotes["000102"]
+    assert (up["currentPrice"], up["changePrice"], up["changePercent"], up["volume"]) == (1101, 10, 0.99, 10100)
+    assert (down["changePrice"], down["changePercent"]) == (-10, -0.99)
+    assert up["name"] == "T000101" and up["source"] == "NAVER_REALTIME"
+
+    # Cached until the TTL expires
+    naver_finance.get_realtime_quotes(WATCHLIST[:10], fundamentals=False)
+    assert server.requests["/api/realtime"] == 3
+
+
+def test_fundamentals_are_scraped_once_and_merged(server):
+    quotes = naver_finance.get_realtime_quotes(["005930", "000123", UNKNOWN])
+    assert list(quotes) == ["005930", "000123"]
+    assert server.requests["/item/main.naver"] == 3  # incl. the unknown code, which fails
+
+    samsung = quotes["005930"]
+    assert samsung["currentPrice"] == price_of("005930")  # price from the polling JSON ...
+    assert (samsung["per"], samsung["pbr"]) == (12.81, 1.15)  # ... PER/PBR from the item page
+    assert samsung["high52Week"] is not None and samsung["marketCap"] == 424_1432 * 100_000_000
+
+    # Fresh prices, fundamentals from the long-lived cache: no more page downloads
+    quotes = naver_finance.get_realtime_quotes(["005930", "000123"], force_refresh=True)
+    assert server.requests["/api/realtime"] == 2
+    assert server.requests["/item/main.naver"] == 3
+    assert quotes["000123"]["per"] == 10.5 and quotes["000123"]["eps"] == 100
+
+
+def test_backend_switch_and_html_fallback(server, monkeypatch):
+    monkeypatch.setattr(naver_finance, "QUOTE_BACKEND", naver_finance.BACKEND_REALTIME)
+    monkeypatch.setattr(naver_finance, "REALTIME_URL", server.base_url + "/gone")
+    quotes = naver_finance.get_multiple_quotes(["000123", "000124"])
+    # Polling endpoint failed: full quotes come from the item pages instead
+    assert [q["source"] for q in quotes.values()] == ["NAVER", "NAVER"]
+    assert quotes["000124"]["currentPrice"] == price_of("000124")
+
+
+def test_async_quotes_follow_the_backend_switch(server, monkeypatch):
+    monkeypatch.setattr(naver_finance, "QUOTE_BACKEND", naver_finance.BACKEND_REALTIME)
+    quotes = asyncio.run(naver_finance.get_multiple_quotes_async(["000124", "000123", UNKNOWN]))
+    assert list(quotes) == ["000124", "000123"]
+    assert {q["source"] for q in quotes.values()} == {"NAVER_REALTIME"}
+    assert server.requests["/api/realtime"] == 1
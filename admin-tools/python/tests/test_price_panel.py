@@ -0,0 +1,81 @@
+import numpy as np
+import price_panel
+from price_panel import PricePanel, sync_panel
+
+
+def _seed_day(conn, date, rows):
+    for code, close in rows.items():
+        conn.execute("INSERT OR REPLACE INTO tickers (code, name, market) VALUES (?, ?, 'KOSPI')", (code, code))
+        conn.execute("INSERT OR REPLACE INTO daily_price (code, date, open, high, low, close, volume, market_cap) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (code, date, close, close, close, close, 1000, 5e12))
+        conn.execute("INSERT OR REPLACE INTO daily_supply (code, date, foreigner, institution) VALUES (?, ?, ?, ?)",
+                     (code, date, 10, -10))
+    conn.commit()
+
+
+def test_sync_appends_columns_incrementally(db_conn, tmp_path):
+    path = str(tmp_path / "panel")
+    _seed_day(db_conn, "20250102", {"005930": 70000, "000660": 150000})
+    _seed_day(db_conn, "20250103", {"005930": 71000, "000660": 151000})
+    assert sync_panel(db_conn, path) == 2
+
+    # New listing appears on day 3; nothing else is re-read
+    _seed_day(db_conn, "20250106", {"005930": 72000, "000660": 152000, "373220": 400000})
+    assert sync_panel(db_conn, path) == 1
+    assert sync_panel(db_conn, path) == 0
+
+    panel = PricePanel.open(path)
+    assert panel.calendar == ["20250102", "20250103", "20250106"]
+    closes = panel.field("close")
+    assert closes.shape == (3, 3)
+    assert list(panel.history("005930", "close")) == [70000, 71000, 72000]
+    assert np.isnan(panel.history("373220", "close")[:2]).all()
+    assert panel.cross_section("foreigner", "20250103")[panel.row_of["000660"]] == 10
+    assert panel.history("000660", "market_cap", 1)[0] == 5_000_000_000_000
+
+
+def test_panel_grows_past_capacity(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_panel, "DAY_CHUNK", 2)
+    monkeypatch.setattr(price_panel, "TICKER_CHUNK", 1)
+    panel = PricePanel.open(str(tmp_path / "panel"), writable=True)
+    for i, date in enumerate(["20250102", "20250103", "20250106"]):
+        panel.append_day(date, {"005930": {"close": 100 + i}, "000660": {"close": 200 + i}})
+
+    reader = PricePanel.open(str(tmp_path / "panel"))
+    assert reader.cap_days >= 3 and reader.cap_tickers >= 2
+    assert list(reader.history("000660", "close", length=2)) == [201, 202]
+
+
+def test_sync_since_rewrites_existing_days_in_place(db_conn, tmp_path):
+    path = str(tmp_path / "panel")
+    _seed_day(db_conn, "20250102", {"005930": 70000, "000660": 150000})
+    _seed_day(db_conn, "20250103", {"005930": 71000})
+    sync_panel(db_conn, path)
+
+    # Supply repair corrects day 2 and adds a ticker missed the first time
+    db_conn.execute("UPDATE daily_supply SET foreigner = 99 WHERE code = '005930' AND date = '20250103'")
+    _seed_day(db_conn, "20250103", {"000660": 151000})
+    assert sync_panel(db_conn, path) == 0
+    assert PricePanel.open(path).cross_section("foreigner", "20250103")[0] == 10
+
+    assert sync_panel(db_conn, path, since="2025-01-03") == 0
+    panel = PricePanel.open(path)
+    assert panel.calendar == ["20250102", "20250103"]
+    assert panel.cross_section("foreigner", "20250103")[panel.row_of["005930"]] == 99
+    assert list(panel.history("000660", "close")) == [150000, 151000]
+    assert list(panel.history("005930", "close")) == [70000, 71000]
+
+
+def test_backfilled_days_before_the_panel_end_are_not_dropped(db_conn, tmp_path):
+    path = str(tmp_path / "panel")
+    _seed_day(db_conn, "20250102", {"005930": 70000})
+    _seed_day(db_conn, "20250106", {"005930": 72000})
+    sync_panel(db_conn, path)
+
+    # batch_daily.py --start backfills a day that was missed between the two
+    _seed_day(db_conn, "20250103", {"005930": 71000})
+    _seed_day(db_conn, "20250107", {"005930": 73000})
+    assert sync_panel(db_conn, path) == 3
+    panel = PricePanel.open(path)
+    assert panel.calendar == ["20250102", "20250103", "20250106", "20250107"]
+    assert list(panel.history("005930", "close")) == [70000, 71000, 72000, 73000]
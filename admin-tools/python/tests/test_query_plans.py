@@ -0,0 +1,51 @@
+import pytest
+import query_plan_check
+from financials import load_financials_asof, load_ttm_asof
+from query_plan_check import (HOT_QUERIES, build_test_db, check_plans, compare_baseline, normalize_sql,
+                              plan_violations, run, source_drift)
+
+
+@pytest.mark.parametrize("layout", ["legacy", "compact"])
+def test_hot_queries_use_indexes(tmp_path, layout):
+    conn, ctx = build_test_db(str(tmp_path / "plan.db"), n_tickers=200, n_days=40, compact=(layout == "compact"))
+    try:
+        results = check_plans(conn, ctx)
+    finally:
+        conn.close()
+    assert {name: bad for name, bad in results.items() if bad} == {}
+
+
+def test_plan_violations_and_baseline():
+    plan = ["SCAN daily_price", "SEARCH t USING INDEX sqlite_autoindex_tickers_1 (code=?)",
+            "USE TEMP B-TREE FOR GROUP BY"]
+    assert plan_violations(plan) == ["SCAN daily_price", "USE TEMP B-TREE FOR GROUP BY"]
+    assert plan_violations(plan, ("USE TEMP B-TREE FOR GROUP BY",)) == ["SCAN daily_price"]
+
+    regressions = compare_baseline({"a": 10.0, "b": 0.9, "c": 3.0}, {"a": 4.0, "b": 0.1, "c": 2.0}, tolerance=2.0)
+    assert regressions == {"a": (4.0, 10.0)}
+
+
+def test_hot_queries_match_call_sites():
+    assert source_drift() == []
+    assert source_drift({"edited": ("SELECT 1 FROM nowhere", None, ())}, {"edited": ("analyzer_daily.py", None)}) == ["edited"]
+
+
+@pytest.mark.parametrize("name, loader", [("financials_asof", load_financials_asof),
+                                          ("financials_ttm_asof", load_ttm_asof)])
+def test_asof_statements_are_what_runs(tmp_path, name, loader):
+    conn, ctx = build_test_db(str(tmp_path / "plan.db"), n_tickers=5, n_days=2)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        loader(conn, ctx["date"])
+    finally:
+        conn.close()
+    expected = HOT_QUERIES[name][0].replace("?", f"'{ctx['date']}'")
+    assert [normalize_sql(s) for s in statements] == [normalize_sql(expected)]
+
+
+def test_timings_without_baseline_fail(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_plan_check, "BASELINE_PATH", str(tmp_path / "baseline.json"))
+    assert run(20, 5, ["legacy"], with_timings=True, update_baseline=False, tolerance=2.0) is False
+    assert run(20, 5, ["legacy"], with_timings=True, update_baseline=True, tolerance=2.0) is True
+    assert run(20, 5, ["legacy"], with_timings=True, update_baseline=False, tolerance=1000.0) is True
@@ -0,0 +1,97 @@
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from data_sources.quote_cache import QuoteCache, SingleFlight, KST, is_trading, session_ttl
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_uses_monotonic_clock_and_namespaces():
+    clock = FakeClock()
+    cache = QuoteCache(max_entries=10, default_ttl=60, clock=clock)
+    cache.set("stock", "069500", {"price": 1})
+    cache.set("etf", "069500", {"nav": 2}, ttl=5)
+
+    assert cache.get("stock", "069500") == {"price": 1}
+    assert cache.get("etf", "069500") == {"nav": 2}
+    clock.now += 10
+    assert cache.get("etf", "069500") is None
+    assert cache.get("stock", "069500") == {"price": 1}
+    clock.now += 60
+    assert cache.get("stock", "069500") is None
+    assert len(cache) == 0
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["evictions"]) == (3, 2, 2, 0)
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = QuoteCache(max_entries=2, clock=FakeClock())
+    cache.set("stock", "a", 1)
+    cache.set("stock", "b", 2)
+    cache.get("stock", "a")
+    cache.set("stock", "c", 3)
+    assert cache.get("stock", "b") is None
+    assert cache.get("stock", "a") == 1 and cache.get("stock", "c") == 3
+    assert cache.stats()["evictions"] == 1 and len(cache) == 2
+
+
+def test_session_ttl_short_in_session_long_after_close():
+    assert is_trading(datetime(2025, 1, 2, 10, 0, tzinfo=KST))
+    assert session_ttl(datetime(2025, 1, 2, 10, 0, tzinfo=KST)) == 60
+    # Thursday 20:00 -> Friday 08:30
+    assert session_ttl(datetime(2025, 1, 2, 20, 0, tzinfo=KST), closed_max=86400) == 12.5 * 3600
+    # Saturday noon -> Monday 08:30 (capped)
+    assert session_ttl(datetime(2025, 1, 4, 12, 0, tzinfo=KST)) == 12 * 3600
+    # Servers in UTC: 00:30 UTC = 09:30 KST
+    assert is_trading(datetime(2025, 1, 2, 0, 30, tzinfo=timezone.utc))
+    assert not is_trading(datetime(2025, 1, 2, 9, 0, tzinfo=timezone.utc))
+
+
+def test_lookup_serves_stale_values_inside_window():
+    clock = FakeClock()
+    cache = QuoteCache(default_ttl=60, stale_ttl=30, clock=clock)
+    cache.set("stock", "a", 1)
+    assert cache.lookup("stock", "a") == (1, True)
+    clock.now += 70
+    assert cache.get("stock", "a") is None
+    assert cache.lookup("stock", "a") == (1, False)
+    clock.now += 30
+    assert cache.lookup("stock", "a") == (None, False)
+    assert len(cache) == 0
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_single_flight_shares_result_and_error():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow(key):
+        calls.append(key)
+        release.wait(5)
+        if key == "bad":
+            raise ValueError(key)
+        return {"key": key}
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        good = [pool.submit(flights.do, "good", slow, "good") for _ in range(3)]
+        bad = [pool.submit(flights.do, "bad", slow, "bad") for _ in range(3)]
+        while flights.coalesced < 4:
+            time.sleep(0.005)
+        assert not flights.do_background("good", pool, slow, "good")
+        release.set()
+        assert len({id(f.result()) for f in good}) == 1
+        for f in bad:
+            with pytest.raises(ValueError):
+                f.result()
+    assert sorted(calls) == ["bad", "good"]
+    assert not flights.in_flight("good")
@@ -0,0 +1,47 @@
+import threading
+import pytest
+from data_sources.rate_limit import TokenBucket, DailyQuota, RequestScheduler, QuotaExhausted
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_paces_after_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=5, clock=clock, sleep=clock.sleep)
+    for _ in range(15):
+        bucket.acquire()
+    # 5 burst tokens, then 10 more at 10/s
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_daily_quota_is_shared_and_never_exceeded(db_conn, tmp_path):
+    path = str(tmp_path / "dailyport.db")
+    quota = DailyQuota(path, "dart", limit=50, today=lambda: "20250102")
+    results = []
+    threads = [threading.Thread(target=lambda: results.extend(quota.reserve() for _ in range(10))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 50
+    # Another process/run sees the same counter; a new day starts fresh
+    assert DailyQuota(path, "dart", limit=50, today=lambda: "20250102").remaining() == 0
+    assert DailyQuota(path, "dart", limit=50, today=lambda: "20250103").remaining() == 50
+
+
+def test_scheduler_stops_when_quota_runs_out(db_conn, tmp_path):
+    quota = DailyQuota(str(tmp_path / "dailyport.db"), "dart", limit=3)
+    scheduler = RequestScheduler(TokenBucket(1000), quota, workers=2)
+    assert scheduler.map(lambda i: scheduler.call(lambda: i * 2), [1, 2, 3]) == [2, 4, 6]
+    with pytest.raises(QuotaExhausted):
+        scheduler.call(lambda: None)
+    assert scheduler.stopped
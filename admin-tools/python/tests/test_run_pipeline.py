@@ -0,0 +1,116 @@
+import time
+import threading
+import pytest
+import run_pipeline as rp
+
+
+class FakeRunner:
+    """Records (stage, start, end); fails the stages in fail."""
+
+    def __init__(self, fail=(), seconds=0.2):
+        self.fail = set(fail)
+        self.seconds = seconds
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage):
+        start = time.perf_counter()
+        time.sleep(self.seconds)
+        with self._lock:
+            self.spans[stage.name] = (start, time.perf_counter())
+        return (1, "boom") if stage.name in self.fail else (0, "done")
+
+
+@pytest.fixture
+def db(db_conn, tmp_path, monkeypatch):
+    # daily_price already holds the expected trading day, so batch_daily may be skipped
+    monkeypatch.setattr(rp, "expected_trading_day", lambda now=None: "20250109")
+    db_conn.execute("INSERT INTO daily_price (code, date, close) VALUES ('000001', '20250109', 1)")
+    db_conn.commit()
+    return str(tmp_path / "dailyport.db")
+
+
+def statuses(results):
+    return {name: r["status"] for name, r in results.items()}
+
+
+def test_independent_stages_overlap_and_dependencies_hold(db):
+    runner = FakeRunner()
+    results = rp.run_pipeline(db_path=db, runner=runner)
+    assert set(statuses(results).values()) == {"ok"}
+    spans = runner.spans
+    # sync_prices and financials both only need batch_daily
+    assert spans["sync_prices"][0] < spans["financials"][1] and spans["financials"][0] < spans["sync_prices"][1]
+    assert spans["batch_daily"][1] <= min(spans["sync_prices"][0], spans["financials"][0])
+    assert spans["analyzer"][0] >= spans["financials"][1]
+
+
+def test_unchanged_inputs_are_skipped_until_the_data_moves(db, db_conn):
+    rp.run_pipeline(db_path=db, runner=FakeRunner(seconds=0))
+    runner = FakeRunner(seconds=0)
+    results = rp.run_pipeline(db_path=db, runner=runner)
+    assert runner.spans == {} and set(statuses(results).values()) == {"skipped"}
+
+    db_conn.execute("INSERT INTO daily_price (code, date, close) VALUES ('000001', '20250110', 1)")
+    db_conn.commit()
+    runner = FakeRunner(seconds=0)
+    rp.run_pipeline(db_path=db, runner=runner)
+    assert set(runner.spans) == {"sync_prices", "analyzer"}
+
+    runner = FakeRunner(seconds=0)
+    rp.run_pipeline(db_path=db, runner=runner, force=True, only={"sync_prices"})
+    assert set(runner.spans) == {"sync_prices"}
+
+
+def test_failure_blocks_dependents_and_is_recorded(db, db_conn):
+    results = rp.run_pipeline(db_path=db, runner=FakeRunner(fail={"financials"}, seconds=0))
+    assert statuses(results) == {"db_init": "ok", "batch_daily": "ok", "sync_prices": "ok",
+                                 "financials": "failed", "analyzer": "blocked"}
+    rows = db_conn.execute("SELECT stage, status, message FROM pipeline_runs ORDER BY id").fetchall()
+    assert ("financials", "failed", "boom") in rows and ("analyzer", "blocked", "upstream failed") in rows
+    assert all(r[0] is not None for r in db_conn.execute(
+        "SELECT duration_s FROM pipeline_runs WHERE status IN ('ok', 'failed')"))
+
+    # Only the failed stage and what it blocked run again
+    runner = FakeRunner(seconds=0)
+    rp.run_pipeline(db_path=db, runner=runner)
+    assert set(runner.spans) == {"financials", "analyzer"}
+
+
+def test_batch_daily_reruns_while_prices_are_behind(db, db_conn, monkeypatch):
+    rp.run_pipeline(db_path=db, runner=FakeRunner(seconds=0))
+    monkeypatch.setattr(rp, "expected_trading_day", lambda now=None: "20250110")
+    for _ in range(2):  # a run that exits 0 without fetching the day does not count
+        runner = FakeRunner(seconds=0)
+        rp.run_pipeline(db_path=db, runner=runner, only={"batch_daily"})
+        assert set(runner.spans) == {"batch_daily"}
+
+    db_conn.execute("INSERT INTO daily_price (code, date, close) VALUES ('000001', '2025-01-10', 1)")
+    db_conn.commit()
+    rp.run_pipeline(db_path=db, runner=FakeRunner(seconds=0), only={"batch_daily"})
+    runner = FakeRunner(seconds=0)
+    rp.run_pipeline(db_path=db, runner=runner, only={"batch_daily"})
+    assert runner.spans == {}
+
+
+def test_expected_trading_day():
+    from datetime import datetime
+    assert rp.expected_trading_day(datetime(2025, 1, 10, 19)) == "20250110"  # Fri evening
+    assert rp.expected_trading_day(datetime(2025, 1, 10, 15)) == "20250109"  # Fri before 16:00
+    assert rp.expected_trading_day(datetime(2025, 1, 12, 12)) == "20250110"  # Sunday
+    assert rp.expected_trading_day(datetime(2025, 1, 13, 8)) == "20250110"   # Monday morning
+
+
+def test_dry_run_runs_nothing(db):
+    runner = FakeRunner(seconds=0)
+    results = rp.run_pipeline(db_path=db, runner=runner, dry_run=True)
+    assert runner.spans == {} and all(r["message"] == "would run (dry run)" for r in results.values())
+
+
+def test_bad_graphs_are_rejected():
+    a = rp.Stage("a", "db_init.py", (), ("b",), ())
+    b = rp.Stage("b", "db_init.py", (), ("a",), ())
+    with pytest.raises(ValueError):
+        rp.validate([a, b])
+    with pytest.raises(ValueError):
+        rp.validate([rp.Stage("c", "db_init.py", (), ("missing",), ())])
@@ -0,0 +1,53 @@
+import os
+import sys
+import json
+import pytest
+
+SERVICE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'stock-data-service')
+sys.path.insert(0, os.path.abspath(SERVICE_DIR))
+
+import stock_search_index as ssi  # noqa: E402
+
+
+def entry(code, name, market="KOSPI"):
+    return {"ticker": code, "code": code, "name": name, "market": market,
+            "asset_type": "ETF" if market == "ETF" else "STOCK", "chosung": ssi.get_choseong(name)}
+
+
+STOCKS = sorted([
+    entry("005930", "삼성전자"), entry("005935", "삼성전자우"), entry("000660", "SK하이닉스"),
+    entry("069500", "KODEX 200", "ETF"), entry("0118Z0", "ACE 미국AI테크핵심산업액티브", "ETF"),
+    entry("035720", "카카오", "KOSDAQ"), entry("000590", "CS홀딩스"),
+], key=lambda s: s["name"])
+
+
+@pytest.mark.parametrize("ids", [[], [0], [3, 4, 200, 1000], list(range(0, 3000, 2)), [5000]])
+def test_postings_round_trip(ids):
+    assert ssi.unpack_postings(ssi.pack_postings(ids, 6000)) == ids
+
+
+def test_dense_postings_use_the_bitmap():
+    packed = ssi.pack_postings(list(range(0, 800, 2)), 800)
+    assert ssi.base64.b64decode(packed)[0] == ssi.PACK_BITMAP
+
+
+@pytest.mark.parametrize("query", ["삼성", "전자우", "ㅅㅅ", "ㅋㅋ", "0059", "z0", "Z0", "kodex", "KODEX",
+                                   "SK", "sk", "e", "E", "200", "없는종목", "ㄱ", " "])
+def test_search_matches_the_linear_scan(query):
+    searcher = ssi.StockSearchIndex(json.loads(json.dumps(ssi.build_index(STOCKS))))
+    assert searcher.search(query) == ssi.linear_search(STOCKS, query)
+    assert searcher.search(query, limit=2) == ssi.linear_search(STOCKS, query, limit=2)
+
+
+def test_unknown_version_is_rejected():
+    with pytest.raises(ValueError):
+        ssi.StockSearchIndex({"v": 99})
+
+
+@pytest.mark.skipif(not os.path.exists(ssi.STOCKS_PATH), reason="src/data/stocks.json not generated")
+def test_generated_stock_list():
+    with open(ssi.STOCKS_PATH, 'r', encoding='utf-8') as f:
+        stocks = json.load(f)
+    searcher = ssi.StockSearchIndex(ssi.build_index(stocks))
+    for query in ssi.benchmark_queries(stocks, n=100):
+        assert searcher.search(query) == ssi.linear_search(stocks, query), query
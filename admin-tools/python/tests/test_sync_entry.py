@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import subprocess
+import pytest
+
+SERVICE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'stock-data-service')
+API_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'api')
+sys.path.insert(0, os.path.abspath(SERVICE_DIR))
+
+import import_benchmark  # noqa: E402
+
+
+def test_entry_point_imports_without_heavy_modules_or_credentials():
+    env = {k: v for k, v in os.environ.items() if "SUPABASE" not in k}
+    code = ("import sys; sys.path.insert(0, %r); import sync; "
+            "print(sync.sync_tickers is not None, sorted(m for m in %r if m in sys.modules))"
+            % (os.path.abspath(API_DIR), import_benchmark.HEAVY_MODULES))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env,
+                         cwd=os.path.abspath(API_DIR))
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split("\n")[0] == "True []"
+
+
+def test_parse_importtime():
+    stderr = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _abc
+import time:       300 |        420 | abc
+import time:      5000 |       5000 |     main.helper
+import time:      1000 |       6000 |   main
+import time:        50 |       6050 | sync
+"""
+    rows = import_benchmark.parse_importtime(stderr)
+    assert rows[0] == ("_abc", 1, 120, 120) and rows[2] == ("main.helper", 2, 5000, 5000)
+    summary = import_benchmark.summarize(rows)
+    assert summary["total_ms"] == 6.0 and summary["heaviest"][0] == ("main.helper", 5.0)
+    assert summary["heavy_loaded"] == []
+    assert import_benchmark.compare_baseline(60.0, {"total_ms": 25.0}) == (25.0, 60.0)
+    assert import_benchmark.compare_baseline(15.0, {"total_ms": 5.0}) is None  # under the noise floor
+
+
+@pytest.fixture
+def service(monkeypatch):
+    import main
+    ages = {"000001": 10, "000002": 10_000}
+    written = []
+
+    def fetch(ticker):
+        if ticker == "000003":
+            time.sleep(1)
+        if ticker == "000004":
+            return None
+        if ticker == "000005":
+            raise ValueError("boom")
+        return {"date": "2025-01-02"}
+
+    monkeypatch.setattr(main, "cache_ages", lambda tickers: ages)
+    monkeypatch.setattr(main, "fetch_stock_data", fetch)
+    monkeypatch.setattr(main, "upsert_cache_rows", lambda rows: written.extend(rows) or len(rows))
+    return main, written
+
+
+def test_sync_tickers_statuses(service):
+    main, written = service
+    results = main.sync_tickers(["000001", "000002", "000003", "000004", "000005", "000001"],
+                                max_age=300, budget=0.3)
+    assert {t: r["status"] for t, r in results.items()} == {
+        "000001": "fresh", "000002": "synced", "000003": "timeout", "000004": "no_data", "000005": "error"}
+    assert [row["ticker"] for row in written] == ["000002"]
+    assert results["000005"]["message"] == "boom"
+
+
+def test_sync_tickers_max_age_zero_fetches_everything(service):
+    main, written = service
+    results = main.sync_tickers(["000001", "000002"], max_age=0)
+    assert [r["status"] for r in results.values()] == ["synced", "synced"]
+
+
+def test_sync_tickers_stops_at_the_budget(monkeypatch):
+    import main
+    fetched, written = [], []
+
+    def fetch(ticker):
+        fetched.append(ticker)
+        time.sleep(0.3 if ticker == "000009" else 0)
+        return {"date": "2025-01-02"}
+
+    def upsert(rows):
+        time.sleep(0.3)
+        written.extend(rows)
+        return len(rows)
+
+    monkeypatch.setattr(main, "fetch_stock_data", fetch)
+    monkeypatch.setattr(main, "upsert_cache_rows", upsert)
+    monkeypatch.setattr(main, "UPSERT_BATCH_SIZE", 1)
+
+    # One worker stuck on the first ticker: the queued ones are cancelled, not fetched
+    results = main.sync_tickers(["000009", "000008", "000007"], max_age=0, budget=0.1, workers=1)
+    assert fetched == ["000009"] and written == []
+    assert {r["status"] for r in results.values()} == {"timeout"}
+
+    # Fetched in time, but the first upsert uses up the budget
+    results = main.sync_tickers(["000001", "000002"], max_age=0, budget=0.2)
+    assert [r["status"] for r in results.values()] == ["synced", "timeout"]
+    assert [row["ticker"] for row in written] == ["000001"]
+
+
+def test_parse_timestamp_accepts_postgrest_formats():
+    import main
+    assert main.parse_timestamp("2025-01-02T10:00:00.12345+00:00").microsecond == 123450
+    assert main.parse_timestamp("2025-01-02T10:00:00Z") == main.parse_timestamp("2025-01-02T19:00:00+09:00")
+    assert main.parse_timestamp("2025-01-02T10:00:00").utcoffset().total_seconds() == 0
+
+
+def test_investor_snapshot_groups_like_the_per_ticker_path(monkeypatch):
+    import main
+    import pandas as pd
+    net = {"개인": {"005930": -30, "000660": 5}, "외국인": {"005930": 20}, "기타외국인": {"005930": 1, "000660": 2},
+           "기관합계": {"005930": 9, "000660": -7}}
+
+    class FakeStock:
+        def get_market_net_purchases_of_equities(self, start, end, market, investor):
+            return pd.DataFrame({"순매수거래대금": net[investor]})
+
+    monkeypatch.setattr(main, "get_stock", lambda: FakeStock())
+    flows = main.fetch_investor_snapshot("20250102")
+    # investor_foreign = 외국인합계 (외국인 + 기타외국인); ETFs are absent, not zero
+    assert flows == {"005930": {"investor_individual": -30, "investor_foreign": 21, "investor_institution": 9},
+                     "000660": {"investor_individual": 5, "investor_foreign": 2, "investor_institution": -7}}
+    ohlcv = pd.DataFrame({"시가": [1.0], "고가": [1.0], "저가": [1.0], "종가": [1.0], "거래량": [1], "등락률": [0.0]},
+                         index=pd.to_datetime(["2025-01-02"]))
+    etf = main.build_market_data("069500", ohlcv, flows.get("069500", {}))
+    assert not any(key.startswith("investor_") for key in etf)
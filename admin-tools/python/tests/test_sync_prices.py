@@ -0,0 +1,141 @@
+import threading
+import pytest
+import sync_to_supabase_price as sync
+
+DAYS = ["20250106", "20250107", "20250108"]
+CODES = [f"{i:06d}" for i in range(1, 6)]
+
+
+class FakeSupabase:
+    """client.table(name).upsert(records).execute(), failing for the batches in fail_on."""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.upserts = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        client = self
+
+        class Query:
+            def upsert(self, records):
+                self.records = records
+                return self
+
+            def execute(self):
+                with client._lock:
+                    client.calls += 1
+                    call = client.calls
+                    if call in client.fail_on:
+                        raise ConnectionError(f"call {call} failed")
+                    client.upserts.append((name, self.records))
+
+        return Query()
+
+    def rows(self):
+        return sorted((r["code"], r["date"]) for _, records in self.upserts for r in records)
+
+
+@pytest.fixture
+def conn(db_conn):
+    for day in DAYS:
+        db_conn.executemany("INSERT INTO daily_price (code, date, open, high, low, close, volume) VALUES (?, ?, 1, 2, 0.5, 1.5, 10)",
+                            [(c, day) for c in CODES])
+    db_conn.commit()
+    return db_conn
+
+
+def test_first_run_sends_the_window_then_only_new_days(conn):
+    client = FakeSupabase()
+    stats = sync.sync_table(conn, client, "daily_price", days=36500, batch_size=4, workers=2)
+    assert stats["sent"] == 15 and stats["watermark"] == "20250108"
+    assert client.rows() == sorted((c, d) for c in CODES for d in DAYS)
+    assert all(len(records) <= 4 for _, records in client.upserts)
+    assert client.upserts[0][1][0].keys() == {"code", "date", "open", "high", "low", "close", "volume"}
+
+    conn.executemany("INSERT INTO daily_price (code, date, close) VALUES (?, '20250109', 2)", [(c,) for c in CODES])
+    conn.commit()
+    client = FakeSupabase()
+    stats = sync.sync_table(conn, client, "daily_price", batch_size=100)
+    # The watermark day is re-sent with the new one
+    assert stats["since"] == "20250108" and stats["watermark"] == "20250109"
+    assert {d for _, d in client.rows()} == {"20250108", "20250109"}
+
+
+def test_failed_batches_are_kept_and_retried(conn):
+    client = FakeSupabase(fail_on={2})
+    stats = sync.sync_table(conn, client, "daily_price", days=36500, batch_size=5, workers=1)
+    assert stats["sent"] == 10 and stats["failed"] == 5
+    assert stats["watermark"] == "20250108"
+    stored = conn.execute("SELECT target, row_count, attempts, error FROM sync_failures").fetchall()
+    assert stored == [("daily_price", 5, 1, "call 2 failed")]
+
+    # Next run: still failing once, then sent
+    client = FakeSupabase(fail_on={1})
+    stats = sync.sync_table(conn, client, "daily_price")
+    assert stats["retried"] == 0 and stats["still_failing"] == 1
+    assert conn.execute("SELECT attempts FROM sync_failures").fetchone() == (2,)
+
+    client = FakeSupabase()
+    stats = sync.sync_table(conn, client, "daily_price")
+    assert stats["retried"] == 5 and stats["still_failing"] == 0
+    assert conn.execute("SELECT COUNT(*) FROM sync_failures").fetchone() == (0,)
+
+
+def test_batches_out_of_attempts_are_reported_until_requeued(conn):
+    sync.sync_table(conn, FakeSupabase(fail_on={1}), "daily_price", days=36500, batch_size=5, workers=1)
+    conn.execute("UPDATE sync_failures SET attempts = ?", (sync.MAX_ATTEMPTS,))
+
+    # No longer retried, but reported on every run
+    for _ in range(2):
+        client = FakeSupabase()
+        stats = sync.sync_table(conn, client, "daily_price")
+        assert stats["retried"] == 0 and stats["abandoned"] == 5 and client.calls == 1
+
+    assert sync.requeue_abandoned(conn, "daily_price") == 1
+    stats = sync.sync_table(conn, FakeSupabase(), "daily_price")
+    assert stats["retried"] == 5 and stats["abandoned"] == 0
+
+
+def test_compact_layout_dates_are_sent_as_text(conn):
+    from migrate_db_compact import migrate
+    migrate(conn)
+    client = FakeSupabase()
+    stats = sync.sync_table(conn, client, "daily_price", days=36500)
+    assert stats["sent"] == 15 and stats["watermark"] == "20250108"
+    assert {r["date"] for _, records in client.upserts for r in records} == set(DAYS)
+
+
+def test_changelog_mode_sends_exactly_the_written_rows(conn):
+    import changelog
+    changelog.enable(conn)
+    conn.commit()
+    client = FakeSupabase()
+    stats = sync.sync_table(conn, client, "daily_price", days=36500)
+    # First run registers the checkpoint and still syncs by date
+    assert stats["changelog"] is None and stats["sent"] == 15
+    assert changelog.checkpoint(conn, "supabase:daily_price") == 0
+
+    # A late correction behind the watermark and a new day
+    conn.execute("UPDATE daily_price SET close = 9 WHERE code = '000002' AND date = '20250106'")
+    conn.execute("INSERT OR REPLACE INTO daily_price (code, date, close) VALUES ('000003', '20250109', 3)")
+    conn.execute("INSERT OR REPLACE INTO daily_price (code, date, close) VALUES ('000003', '20250109', 4)")
+    conn.commit()
+    client = FakeSupabase()
+    stats = sync.sync_table(conn, client, "daily_price")
+    assert stats["changelog"] == (0, 3)
+    assert client.rows() == [("000002", "20250106"), ("000003", "20250109")]
+    assert [r["close"] for _, records in client.upserts for r in records] == [9, 4]
+    assert stats["watermark"] == "20250109" and changelog.checkpoint(conn, "supabase:daily_price") == 3
+
+    client = FakeSupabase()
+    assert sync.sync_table(conn, client, "daily_price")["sent"] == 0 and client.upserts == []
+    assert changelog.compact(conn) == 3
+
+    # Legacy rows written with a dashed date are logged as 20250110 and still found
+    conn.execute("INSERT INTO daily_price (code, date, close) VALUES ('000004', '2025-01-10', 5)")
+    conn.commit()
+    client = FakeSupabase()
+    assert sync.sync_table(conn, client, "daily_price")["sent"] == 1
+    assert client.rows() == [("000004", "2025-01-10")]
@@ -4,6 +4,7 @@ import sys
 import json
 from datetime import datetime
 from pykrx import stock
+from stock_search_index import write_index
 
 # Hangul Choseong (Initials) List
 CHOSEONG_LIST = [
@@ -108,5 +109,10 @@ def generate_stock_list():
 
     print(f"Successfully saved {len(all_stocks)} stocks to {output_file}")
 
+    # Compact search index (minified, chosung/code/name character postings) next to it
+    index_file = os.path.join(output_dir, 'stocks.index.json')
+    write_index(all_stocks, index_file)
+    print(f"Search index saved to {index_file} ({os.path.getsize(index_file) // 1024} KB)")
+
 if __name__ == "__main__":
     generate_stock_list()
@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+from datetime import datetime
+
+# Import-time report for the api/sync.py serverless entry point.
+# Runs `python -X importtime -c "import sync"` in fresh interpreters, takes the
+# median cumulative time of the entry module, lists the heaviest imports and fails
+# when a heavy dependency is pulled in at import time again or the total regresses
+# against the stored baseline. --record appends the run to a history file so the
+# cold-start cost can be followed over time.
+#
+#   python import_benchmark.py                      # report + compare with import_baseline.json
+#   python import_benchmark.py --update-baseline    # first run on a machine / accept new numbers
+#   python import_benchmark.py --record             # also append to import_history.jsonl
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(HERE, '..', '..', 'api')
+ENTRY = "sync"  # api/sync.py
+BASELINE_PATH = os.path.join(HERE, 'import_baseline.json')
+HISTORY_PATH = os.path.join(HERE, 'import_history.jsonl')
+
+# Must stay lazy (loaded on first use in main.get_stock / get_supabase)
+HEAVY_MODULES = ("pandas", "numpy", "pykrx", "matplotlib", "supabase", "postgrest", "httpx")
+
+
+def parse_importtime(stderr):
+    """[(name, depth, self_us, cumulative_us)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(parts[0]), int(parts[1])))
+    return rows
+
+
+def measure_once(entry=ENTRY, path=API_DIR):
+    code = f"import sys; sys.path.insert(0, {os.path.abspath(path)!r}); import {entry}"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, cwd=path)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {entry} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def summarize(rows, entry=ENTRY, top=10):
+    entry_row = next(r for r in rows if r[0] == entry and r[1] == 0)
+    loaded = {r[0] for r in rows}
+    return {
+        "total_ms": round(entry_row[3] / 1000, 1),
+        "heaviest": [(name, round(self_us / 1000, 1))
+                     for name, _, self_us, _ in sorted(rows, key=lambda r: -r[2])[:top]],
+        "heavy_loaded": sorted(m for m in HEAVY_MODULES if m in loaded),
+    }
+
+
+def measure(runs=5):
+    """Median total over `runs` fresh interpreters, details from the median run."""
+    summaries = sorted((summarize(measure_once()) for _ in range(runs)), key=lambda s: s["total_ms"])
+    return summaries[len(summaries) // 2]
+
+
+def compare_baseline(total_ms, baseline, tolerance=2.0, floor_ms=20.0):
+    """(baseline_ms, total_ms) when the total regressed beyond tolerance, else None."""
+    base = baseline.get("total_ms")
+    if base is not None and total_ms > max(base * tolerance, floor_ms):
+        return base, total_ms
+    return None
+
+
+def run(runs, update_baseline, record, tolerance):
+    result = measure(runs)
+    print(f"⏱  import {ENTRY}: {result['total_ms']:.1f} ms (median of {runs})")
+    for name, ms in result["heaviest"]:
+        print(f"   {ms:8.1f} ms  {name}")
+
+    failed = False
+    if result["heavy_loaded"]:
+        failed = True
+        print(f"   ❌ loaded at import time: {', '.join(result['heavy_loaded'])} (import them on first use)")
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    if not baseline and not update_baseline:
+        print("   ⚠️ no baseline yet; run with --update-baseline")
+    regression = compare_baseline(result["total_ms"], baseline, tolerance)
+    if regression:
+        failed = True
+        print(f"   🐢 {regression[1]:.1f} ms (baseline {regression[0]:.1f} ms)")
+
+    if update_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({"total_ms": result["total_ms"], "python": sys.version.split()[0]}, f, indent=2)
+        print(f"📝 baseline written to {BASELINE_PATH}")
+    if record:
+        with open(HISTORY_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"at": datetime.now().isoformat(timespec="seconds"),
+                                "python": sys.version.split()[0], **result}, ensure_ascii=False) + "\n")
+
+    print("❌ import benchmark failed" if failed else "✅ import benchmark passed")
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--update-baseline", action="store_true", help="Store the current total as the baseline")
+    parser.add_argument("--record", action="store_true", help="Append this run to import_history.jsonl")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Allowed slowdown factor vs baseline")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.runs, args.update_baseline, args.record, args.tolerance) else 1)
@@ -1,13 +1,25 @@
-
 import os
+import re
 import sys
 import json
+import time
 import logging
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from pykrx import stock
-import pandas as pd
+
+# Import surface is stdlib + dotenv only: pandas, pykrx and supabase are imported on
+# first use (get_stock / get_supabase), so api/sync.py cold starts stay cheap and a
+# request served from fresh cache rows never loads pykrx at all.
+# Measure with: python import_benchmark.py
+
+# Shared record/replay data sources live in admin-tools/python/data_sources
+# (not deployed with api/sync.py, which then talks to pykrx directly)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python'))
+
+# Local DB filled by admin-tools/python/batch_daily.py (absent on Vercel)
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../dailyport.db')
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -24,17 +36,44 @@ load_dotenv(env_path)
 SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
 
-logger.info(f"Loading env from: {env_path}")
-logger.info(f"SUPABASE_URL present: {bool(SUPABASE_URL)}")
-logger.info(f"SUPABASE_KEY present: {bool(SUPABASE_KEY)}")
+# Built once per process (warm serverless container) on first use
+_supabase = None
+_stock = None
+_init_lock = threading.Lock()
+
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    logger.error("Missing Supabase credentials.")
-    # Debug what keys ARE available
-    # logger.info(f"Available keys: {list(os.environ.keys())}") 
-    sys.exit(1)
+def get_supabase():
+    """Supabase client, created on first call. Raises RuntimeError without credentials."""
+    global _supabase
+    with _init_lock:
+        if _supabase is None:
+            logger.info(f"Loading env from: {env_path}")
+            logger.info(f"SUPABASE_URL present: {bool(SUPABASE_URL)}")
+            logger.info(f"SUPABASE_KEY present: {bool(SUPABASE_KEY)}")
+            if not SUPABASE_URL or not SUPABASE_KEY:
+                raise RuntimeError("Missing Supabase credentials.")
+            from supabase import create_client
+            _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return _supabase
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def get_stock():
+    """
+    pykrx.stock (live, or recorded/replayed per DATA_SOURCE_MODE), created on first call.
+    Per-ticker range calls read the local DB first and only go to KRX for the days it
+    does not cover.
+    """
+    global _stock
+    with _init_lock:
+        if _stock is None:
+            try:
+                from data_sources.recorder import krx_source
+                from data_sources.krx_store import ReadThroughKrx
+                _stock = ReadThroughKrx(DB_PATH, krx_source())
+            except ImportError:
+                from pykrx import stock
+                _stock = stock
+        return _stock
 
 def fetch_stock_data(ticker):
     """
@@ -49,16 +88,12 @@ def fetch_stock_data(ticker):
     try:
         # 1. Get OHLCV (Price) - Most recent record
         # get_market_ohlcv returns a DataFrame
-        df_ohlcv = stock.get_market_ohlcv(start_date, today, code)
+        df_ohlcv = get_stock().get_market_ohlcv(start_date, today, code)
         
         if df_ohlcv.empty:
             logger.warning(f"No OHLCV data for {ticker}")
             return None
         
-        # Get the last row (most recent)
-        latest_ohlcv = df_ohlcv.iloc[-1]
-        last_date = df_ohlcv.index[-1].strftime("%Y-%m-%d")
-
         # 2. Get Investor Trading Value (Individual, Foreigner, Institution)
         # Wrap in try/except because pykrx can fail on specific tickers/dates (ValueError: Length mismatch)
         investor_data = {
@@ -70,7 +105,7 @@ def fetch_stock_data(ticker):
         try:
             # get_market_trading_value_by_date returns DataFrame
             # columns: ['기관합계', '기타법인', '개인', '외국인합계', '전체']
-            df_investor = stock.get_market_trading_value_by_date(start_date, today, code)
+            df_investor = get_stock().get_market_trading_value_by_date(start_date, today, code)
             
             if not df_investor.empty:
                 latest_investor = df_investor.iloc[-1]
@@ -82,48 +117,64 @@ def fetch_stock_data(ticker):
         except Exception as inv_err:
             logger.warning(f"Investor data fetch failed for {ticker} (using 0): {inv_err}")
 
-        # Construct payload
-        market_data = {
-            "ticker": ticker,
-            "currentPrice": float(latest_ohlcv['종가']),
-            "changePercent": float(latest_ohlcv['등락률']),
-            "open": float(latest_ohlcv['시가']),
-            "high": float(latest_ohlcv['고가']),
-            "low": float(latest_ohlcv['저가']),
-            "volume": int(latest_ohlcv['거래량']),
-            "date": last_date,
-            "currency": "KRW",
-            # Add investor data
-            **investor_data
-        }
-        
-        # Historical data (last 5 days only for this payload? 
-        # Or should we fetching full history? 
-        # market-data.ts interface expects `historical` array. 
-        # Let's provide a small slice of history if needed, or rely on client to keep history.
-        # For now, let's keep it simple and just return the latest snapshot.
-        # But wait, market-data.ts `MarketData` has `historical` array. 
-        # Let's populate it with the fetched range (5 days).
-        
-        historical_list = []
-        for date_idx, row in df_ohlcv.iterrows():
-            historical_list.append({
-                "date": date_idx.strftime("%Y-%m-%d"),
-                "open": float(row['시가']),
-                "high": float(row['고가']),
-                "low": float(row['저가']),
-                "close": float(row['종가']),
-                "volume": int(row['거래량'])
-            })
-            
-        market_data['historical'] = historical_list
-
-        return market_data
+        return build_market_data(ticker, df_ohlcv, investor_data)
 
     except Exception as e:
         logger.error(f"Error fetching {ticker}: {e}")
         return None
 
+def build_market_data(ticker, df_ohlcv, investor_data):
+    """
+    analysis_cache payload from a date-indexed OHLCV frame (시가/고가/저가/종가/거래량/등락률)
+    and the latest investor net purchases. Shared by the per-ticker and snapshot paths.
+    """
+    # Get the last row (most recent)
+    latest_ohlcv = df_ohlcv.iloc[-1]
+    last_date = df_ohlcv.index[-1].strftime("%Y-%m-%d")
+
+    # Construct payload
+    market_data = {
+        "ticker": ticker,
+        "currentPrice": float(latest_ohlcv['종가']),
+        "changePercent": float(latest_ohlcv['등락률']),
+        "open": float(latest_ohlcv['시가']),
+        "high": float(latest_ohlcv['고가']),
+        "low": float(latest_ohlcv['저가']),
+        "volume": int(latest_ohlcv['거래량']),
+        "date": last_date,
+        "currency": "KRW",
+        # Add investor data
+        **investor_data
+    }
+
+    # market-data.ts `MarketData` has a `historical` array: the fetched range (5 days)
+    historical_list = []
+    for date_idx, row in df_ohlcv.iterrows():
+        historical_list.append({
+            "date": date_idx.strftime("%Y-%m-%d"),
+            "open": float(row['시가']),
+            "high": float(row['고가']),
+            "low": float(row['저가']),
+            "close": float(row['종가']),
+            "volume": int(row['거래량'])
+        })
+
+    market_data['historical'] = historical_list
+
+    return market_data
+
+
+def cache_row(ticker, data):
+    # Table schema: ticker (text, PK), data (jsonb), generated_at (timestamptz), source (text)
+    # generated_at in UTC like the web app writes it, so freshness checks agree across hosts
+    return {
+        "ticker": ticker,
+        "data": data,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "source": "PYKRX_SERVICE"
+    }
+
+
 def sync_ticker(ticker):
     logger.info(f"Syncing {ticker}...")
     data = fetch_stock_data(ticker)
@@ -131,16 +182,7 @@ def sync_ticker(ticker):
         # Upsert to Supabase
         try:
             # We need to wrap 'data' inside the JSON column 'data'
-            # Table schema: ticker (text, PK), data (jsonb), generated_at (timestamptz), source (text)
-            
-            payload = {
-                "ticker": ticker,
-                "data": data,
-                "generated_at": datetime.now().isoformat(),
-                "source": "PYKRX_SERVICE"
-            }
-            
-            supabase.from_("analysis_cache").upsert(payload).execute()
+            get_supabase().from_("analysis_cache").upsert(cache_row(ticker, data)).execute()
             logger.info(f"Successfully synced {ticker}")
             print(json.dumps(data, indent=2)) # Print to stdout for debugging/bridge
         except Exception as e:
@@ -148,6 +190,218 @@ def sync_ticker(ticker):
     else:
         logger.warning(f"Failed to get data for {ticker}")
 
+# === Market-wide snapshot (--sync-all) ===
+# A handful of per-date calls for the whole market instead of two range calls per ticker.
+
+SNAPSHOT_LOOKBACK_DAYS = 5  # same window as fetch_stock_data
+UPSERT_BATCH_SIZE = 500
+OHLCV_COLUMNS = ['시가', '고가', '저가', '종가', '거래량', '등락률']
+# payload field -> investor names for get_market_net_purchases_of_equities, summed.
+# Same grouping as the per-ticker path's trading-value columns (외국인합계 = 외국인 + 기타외국인).
+INVESTORS = {
+    'investor_individual': ('개인',),
+    'investor_foreign': ('외국인', '기타외국인'),
+    'investor_institution': ('기관합계',),
+}
+
+
+def fetch_market_ohlcv(date):
+    """All stocks and ETFs on one date (index: 6-digit code), None on non-trading days."""
+    import pandas as pd
+    df_stocks = get_stock().get_market_ohlcv(date, market="ALL")
+    if df_stocks.empty or df_stocks['거래량'].sum() == 0:
+        return None
+    frames = [df_stocks[OHLCV_COLUMNS]]
+    try:
+        # ETF listing has no 등락률; it is derived from the previous close below
+        df_etf = get_stock().get_etf_ohlcv_by_ticker(date)
+        if not df_etf.empty:
+            frames.append(df_etf[OHLCV_COLUMNS[:-1]].assign(등락률=float('nan')))
+    except Exception as e:
+        logger.warning(f"ETF OHLCV fetch failed for {date}: {e}")
+    df = pd.concat(frames)
+    return df[~df.index.duplicated()]
+
+
+def fetch_investor_snapshot(date):
+    """
+    {code: investor_data} for one date (net purchase value per investor group).
+    Equities only: ETFs are not in the result. A group whose calls failed is left out.
+    """
+    flows = {}
+    for field, investors in INVESTORS.items():
+        totals = None
+        try:
+            for investor in investors:
+                df = get_stock().get_market_net_purchases_of_equities(date, date, "ALL", investor)
+                values = df['순매수거래대금']
+                totals = values if totals is None else totals.add(values, fill_value=0)
+        except Exception as e:
+            logger.warning(f"Investor snapshot failed for {field} on {date} (left out): {e}")
+            continue
+        for code, value in totals.items():
+            flows.setdefault(code, {})[field] = int(value)
+    return flows
+
+
+def fetch_market_snapshot(days=SNAPSHOT_LOOKBACK_DAYS):
+    """
+    {code: market_data} for every listed stock and ETF, built from one OHLCV call
+    per trading day in the window plus the investor calls (INVESTORS) for the latest day.
+    """
+    import pandas as pd
+    now = datetime.now()
+    daily = {}
+    for offset in range(days, -1, -1):
+        day = now - timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        date = day.strftime("%Y%m%d")
+        df = fetch_market_ohlcv(date)
+        if df is not None:
+            daily[pd.Timestamp(day.date())] = df
+    if not daily:
+        return {}
+
+    panel = pd.concat(daily, names=['날짜', '티커']).sort_index()
+    # 등락률 for ETFs: change against the previous close in the window (0 on the first day)
+    pct = panel.groupby(level='티커')['종가'].pct_change().mul(100).round(2)
+    panel['등락률'] = panel['등락률'].fillna(pct).fillna(0.0)
+
+    latest = max(daily).strftime("%Y%m%d")
+    flows = fetch_investor_snapshot(latest)
+    logger.info(f"Snapshot: {len(daily)} trading days, {panel.index.get_level_values('티커').nunique()} tickers")
+
+    # No flows (ETFs, failed group): the investor_* fields are left out rather than reported as 0
+    snapshot = {}
+    for code, df_ohlcv in panel.groupby(level='티커'):
+        snapshot[code] = build_market_data(code, df_ohlcv.droplevel('티커'), flows.get(code, {}))
+    return snapshot
+
+
+def upsert_cache_rows(rows, batch_size=UPSERT_BATCH_SIZE):
+    """Upsert analysis_cache rows in batches; returns the number written."""
+    written = 0
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        try:
+            get_supabase().from_("analysis_cache").upsert(batch).execute()
+            written += len(batch)
+        except Exception as e:
+            logger.error(f"Supabase upsert error (rows {i}-{i + len(batch) - 1}): {e}")
+    return written
+
+
+def sync_all_snapshot(tickers):
+    """
+    Full sync from one market snapshot. Tickers missing from the snapshot
+    (e.g. suspended that day) fall back to the per-ticker path.
+    """
+    snapshot = fetch_market_snapshot()
+    if not snapshot:
+        logger.error("Market snapshot is empty (no trading days in the window or KRX unavailable).")
+        return
+    rows, missing = [], []
+    for ticker in tickers:
+        data = snapshot.get(ticker.replace('.KS', '').replace('.KQ', ''))
+        if data:
+            rows.append(cache_row(ticker, dict(data, ticker=ticker)))
+        else:
+            missing.append(ticker)
+    written = upsert_cache_rows(rows)
+    print(f"Snapshot sync: {written}/{len(rows)} rows upserted, {len(missing)} tickers not in snapshot")
+    for ticker in missing:
+        sync_ticker(ticker)
+
+
+# === Multi-ticker sync (api/sync.py) ===
+
+SYNC_WORKERS = int(os.getenv("SYNC_WORKERS", "4"))
+SYNC_MAX_AGE_SECONDS = int(os.getenv("SYNC_MAX_AGE_SECONDS", "300"))
+SYNC_TIME_BUDGET_SECONDS = float(os.getenv("SYNC_TIME_BUDGET_SECONDS", "8"))  # Vercel limit is 10s
+SYNC_FETCH_SHARE = 0.8  # of the budget for fetching; the rest is left for the upserts
+
+STATUS_FRESH = "fresh"      # analysis_cache already newer than max_age, not fetched
+STATUS_SYNCED = "synced"
+STATUS_NO_DATA = "no_data"  # pykrx returned nothing for the ticker
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"  # not finished within the time budget
+OK_STATUSES = (STATUS_FRESH, STATUS_SYNCED)
+
+
+def parse_timestamp(value):
+    """timestamptz text from PostgREST ('...Z', '+00:00', any fraction length) -> aware datetime (naive = UTC)."""
+    text = value.replace('Z', '+00:00')
+    # fromisoformat before 3.11 only takes 3 or 6 fraction digits
+    text = re.sub(r'\.(\d+)', lambda m: '.' + m.group(1)[:6].ljust(6, '0'), text)
+    parsed = datetime.fromisoformat(text)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def cache_ages(tickers):
+    """{ticker: seconds since generated_at} for tickers that have an analysis_cache row."""
+    res = get_supabase().from_("analysis_cache").select("ticker, generated_at").in_("ticker", list(tickers)).execute()
+    now = datetime.now(timezone.utc)
+    return {row["ticker"]: (now - parse_timestamp(row["generated_at"])).total_seconds() for row in res.data or []}
+
+
+def sync_tickers(tickers, max_age=SYNC_MAX_AGE_SECONDS, budget=SYNC_TIME_BUDGET_SECONDS, workers=SYNC_WORKERS):
+    """
+    Sync several tickers concurrently within `budget` seconds.
+    Tickers whose cache row is at most `max_age` seconds old are skipped (0 = always fetch).
+    Returns {ticker: {"status": ..., ...}} in input order.
+    """
+    started = time.monotonic()
+    tickers = list(dict.fromkeys(tickers))
+    results = {}
+
+    ages = {}
+    if max_age > 0:
+        try:
+            ages = cache_ages(tickers)
+        except Exception as e:
+            logger.warning(f"Cache freshness lookup failed (fetching all): {e}")
+    stale = []
+    for ticker in tickers:
+        age = ages.get(ticker)
+        if age is not None and age <= max_age:
+            results[ticker] = {"status": STATUS_FRESH, "age": round(age)}
+        else:
+            stale.append(ticker)
+
+    if stale:
+        pool = ThreadPoolExecutor(max_workers=min(workers, len(stale)))
+        futures = {pool.submit(fetch_stock_data, ticker): ticker for ticker in stale}
+        done, _ = wait(futures, timeout=max(0.0, budget * SYNC_FETCH_SHARE - (time.monotonic() - started)))
+        # Do not wait for stragglers (their results are dropped); queued fetches never start
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        rows = []
+        for future, ticker in futures.items():
+            if future not in done:
+                results[ticker] = {"status": STATUS_TIMEOUT}
+            elif future.exception() is not None:
+                results[ticker] = {"status": STATUS_ERROR, "message": str(future.exception())}
+            elif future.result() is None:
+                results[ticker] = {"status": STATUS_NO_DATA}
+            else:
+                rows.append(cache_row(ticker, future.result()))
+
+        # Budget checked before every upsert batch: rows that no longer fit are reported as timeouts
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[i:i + UPSERT_BATCH_SIZE]
+            if time.monotonic() - started >= budget:
+                status = {"status": STATUS_TIMEOUT}
+            elif upsert_cache_rows(batch) == len(batch):
+                status = None
+            else:
+                status = {"status": STATUS_ERROR, "message": "analysis_cache upsert failed"}
+            for row in batch:
+                results[row["ticker"]] = status or {"status": STATUS_SYNCED, "date": row["data"]["date"]}
+
+    return {ticker: results[ticker] for ticker in tickers}
+
+
 # Vercel Serverless Function Handler
 # NOTE: Vercel now uses api/sync.py as the entry point, which imports sync_ticker from here.
 # The legacy handler function has been removed to avoid confusion.
@@ -157,6 +411,12 @@ def sync_ticker(ticker):
 
 
 if __name__ == "__main__":
+    try:
+        get_supabase()
+    except RuntimeError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
     if len(sys.argv) > 1:
         arg = sys.argv[1]
         
@@ -166,23 +426,31 @@ if __name__ == "__main__":
             try:
                 with open(json_path, 'r', encoding='utf-8') as f:
                     stocks_list = json.load(f)
-                
-                print(f"Found {len(stocks_list)} stocks. Starting full sync...")
-                
-                for idx, stock_item in enumerate(stocks_list):
-                    ticker = stock_item['ticker']
-                    # Optional: Progress logging
-                    if idx % 10 == 0:
-                        print(f"[{idx}/{len(stocks_list)}] Processing {stock_item['name']} ({ticker})...")
-                    
-                    sync_ticker(ticker)
-                    
             except FileNotFoundError:
                 logger.error(f"Stocks file not found at {json_path}. Run generate_stock_list.py first.")
-        
+                sys.exit(1)
+
+            if '--per-ticker' not in sys.argv:
+                print(f"Found {len(stocks_list)} stocks. Starting snapshot sync...")
+                sync_all_snapshot([item['ticker'] for item in stocks_list])
+                sys.exit(0)
+
+            print(f"Found {len(stocks_list)} stocks. Starting full sync...")
+
+            for idx, stock_item in enumerate(stocks_list):
+                ticker = stock_item['ticker']
+                # Optional: Progress logging
+                if idx % 10 == 0:
+                    print(f"[{idx}/{len(stocks_list)}] Processing {stock_item['name']} ({ticker})...")
+
+                sync_ticker(ticker)
+
+            if hasattr(get_stock(), "stats"):
+                logger.info(f"Local DB read-through: {get_stock().stats()}")
+
         else:
             # CLI usage: python main.py 005930.KS
             ticker_arg = sys.argv[1]
             sync_ticker(ticker_arg)
     else:
-        print("Usage: python main.py <ticker> | --sync-all")
+        print("Usage: python main.py <ticker> | --sync-all [--per-ticker]")
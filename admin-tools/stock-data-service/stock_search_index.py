@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import base64
+import random
+import statistics
+
+# Compact search index for src/data/stocks.json.
+# StockSearch.tsx matches a query as a substring of the name (as typed), the ticker
+# (lowercased query) or the chosung (lowercased query) and shows the first hits in
+# list order (sorted by name). This index answers the same question without a scan:
+#   - docs: [code, name, market key] in stocks.json order; ticker == code, asset_type
+#     and chosung are derived (get_choseong), so they are not stored
+#   - grams: every character of name / lowercased code / chosung -> posting list of
+#     doc ids, packed as base64 of either delta varints or a bitmap (whichever is smaller)
+# A query intersects the postings of its characters (as typed and lowercased), then
+# verifies candidates in doc order and stops at the limit, so results equal the
+# linear scan exactly. 2-gram postings would cut candidates further but double the
+# gzipped asset, which is what the index is meant to shrink.
+#
+#   python stock_search_index.py                 # build from stocks.json + benchmark
+#   python stock_search_index.py 삼성 ㅅㅅ 0059   # query the built index
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, '..', '..', 'src', 'data')
+STOCKS_PATH = os.path.join(DATA_DIR, 'stocks.json')
+INDEX_PATH = os.path.join(DATA_DIR, 'stocks.index.json')
+
+INDEX_VERSION = 1
+MARKETS = {"P": "KOSPI", "Q": "KOSDAQ", "E": "ETF"}
+PACK_VARINT = 0
+PACK_BITMAP = 1
+
+# Hangul Choseong (Initials) List (same as generate_stock_list.py)
+CHOSEONG_LIST = [
+    'ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ',
+    'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ'
+]
+
+
+def get_choseong(text):
+    """삼성전자 -> ㅅㅅㅈㅈ (non-Hangul characters kept as-is)"""
+    return "".join(CHOSEONG_LIST[(ord(c) - 0xAC00) // 588] if '가' <= c <= '힣' else c for c in text)
+
+
+# === Posting list packing ===
+
+def pack_postings(ids, n_docs):
+    """Sorted doc ids -> base64 string (tag byte + delta varints or bitmap)."""
+    varint = bytearray([PACK_VARINT])
+    previous = -1
+    for doc_id in ids:
+        delta = doc_id - previous - 1
+        previous = doc_id
+        while delta >= 0x80:
+            varint.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        varint.append(delta)
+    if len(varint) > (n_docs + 7) // 8 + 1:
+        bitmap = bytearray(1 + (n_docs + 7) // 8)
+        bitmap[0] = PACK_BITMAP
+        for doc_id in ids:
+            bitmap[1 + doc_id // 8] |= 1 << (doc_id % 8)
+        packed = bitmap
+    else:
+        packed = varint
+    return base64.b64encode(bytes(packed)).decode('ascii')
+
+
+def unpack_postings(text):
+    data = base64.b64decode(text)
+    ids = []
+    if data[0] == PACK_BITMAP:
+        for byte_index, byte in enumerate(data[1:]):
+            while byte:
+                low = byte & -byte
+                ids.append(byte_index * 8 + low.bit_length() - 1)
+                byte ^= low
+        return ids
+    previous, delta, shift = -1, 0, 0
+    for byte in data[1:]:
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += delta + 1
+        ids.append(previous)
+        delta, shift = 0, 0
+    return ids
+
+
+# === Build ===
+
+def build_index(stocks):
+    """stocks.json entries (in display order) -> index dict (json.dumps with separators=(',', ':'))."""
+    market_keys = {v: k for k, v in MARKETS.items()}
+    postings = {}
+    docs = []
+    for doc_id, item in enumerate(stocks):
+        docs.append([item['code'], item['name'], market_keys[item['market']]])
+        for gram in set(item['name']) | set(item['ticker'].lower()) | set(item.get('chosung') or get_choseong(item['name'])):
+            postings.setdefault(gram, []).append(doc_id)
+    return {
+        "v": INDEX_VERSION,
+        "markets": MARKETS,
+        "docs": docs,
+        "grams": {gram: pack_postings(ids, len(docs)) for gram, ids in sorted(postings.items())},
+    }
+
+
+def write_index(stocks, path=INDEX_PATH):
+    index = build_index(stocks)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    return index
+
+
+# === Query (reference implementation for the client) ===
+
+class StockSearchIndex:
+    def __init__(self, index):
+        if index.get("v") != INDEX_VERSION:
+            raise ValueError(f"Unsupported search index version: {index.get('v')}")
+        self.markets = index["markets"]
+        self.docs = index["docs"]
+        self._packed = index["grams"]
+        self._postings = {}  # decoded on first use
+        self._match_text = [(name, code.lower(), get_choseong(name)) for code, name, _ in self.docs]
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _posting(self, gram):
+        ids = self._postings.get(gram)
+        if ids is None:
+            packed = self._packed.get(gram)
+            ids = self._postings[gram] = unpack_postings(packed) if packed else []
+        return ids
+
+    def _candidates(self, query):
+        lists = sorted((self._posting(c) for c in set(query)), key=len)
+        if not lists[0]:
+            return set()
+        result = set(lists[0])
+        for ids in lists[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return result
+
+    def entry(self, doc_id):
+        code, name, market = self.docs[doc_id]
+        market = self.markets[market]
+        return {"ticker": code, "code": code, "name": name, "market": market,
+                "asset_type": "ETF" if market == "ETF" else "STOCK", "chosung": get_choseong(name)}
+
+    def search(self, query, limit=5):
+        """Same hits, in the same order, as the StockSearch.tsx filter over stocks.json."""
+        if not query:
+            return []
+        lower = query.lower()
+        candidates = self._candidates(query)
+        if lower != query:
+            candidates |= self._candidates(lower)
+        hits = []
+        for doc_id in sorted(candidates):
+            name, code, chosung = self._match_text[doc_id]
+            if query in name or lower in code or lower in chosung:
+                hits.append(self.entry(doc_id))
+                if len(hits) == limit:
+                    break
+        return hits
+
+
+def linear_search(stocks, query, limit=5):
+    """The current client-side scan (StockSearch.tsx), for equivalence checks and the benchmark."""
+    if not query:
+        return []
+    lower = query.lower()
+    return [s for s in stocks
+            if query in s['name'] or lower in s['ticker'].lower() or lower in s['chosung']][:limit]
+
+
+# === Benchmark ===
+
+def benchmark_queries(stocks, n=300, seed=7):
+    """Name / chosung / code prefixes and infixes typed by users (1-4 characters)."""
+    rng = random.Random(seed)
+    queries = []
+    for item in rng.sample(stocks, min(n, len(stocks))):
+        for text in (item['name'], item['chosung'], item['code']):
+            length = rng.randint(1, min(4, len(text)))
+            start = rng.randint(0, len(text) - length) if rng.random() < 0.3 else 0
+            queries.append(text[start:start + length])
+    return queries
+
+
+def _timed(fn, queries, repeat):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(query)
+        samples.append((time.perf_counter() - start) / repeat * 1e6)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def benchmark(stocks_path=STOCKS_PATH, index_path=INDEX_PATH, repeat=3):
+    import gzip
+    with open(stocks_path, 'r', encoding='utf-8') as f:
+        stocks = json.load(f)
+    index = write_index(stocks, index_path)
+    searcher = StockSearchIndex(index)
+    queries = benchmark_queries(stocks)
+
+    mismatches = [q for q in queries if searcher.search(q) != linear_search(stocks, q)]
+    scan_mean, scan_p99 = _timed(lambda q: linear_search(stocks, q), queries, repeat)
+    index_mean, index_p99 = _timed(searcher.search, queries, repeat)
+
+    def sizes(path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        return len(raw), len(gzip.compress(raw, 9))
+
+    json_raw, json_gz = sizes(stocks_path)
+    index_raw, index_gz = sizes(index_path)
+    print(f"🔎 {len(queries)} queries over {len(stocks)} stocks")
+    print(f"   linear scan : mean {scan_mean:8.1f} µs, p99 {scan_p99:8.1f} µs")
+    print(f"   index       : mean {index_mean:8.1f} µs, p99 {index_p99:8.1f} µs ({scan_mean / index_mean:.0f}x)")
+    print(f"   stocks.json       : {json_raw / 1024:7.1f} KB ({json_gz / 1024:.1f} KB gzip)")
+    print(f"   stocks.index.json : {index_raw / 1024:7.1f} KB ({index_gz / 1024:.1f} KB gzip)")
+    if mismatches:
+        print(f"   ❌ {len(mismatches)} queries differ from the linear scan (e.g. {mismatches[:3]})")
+    else:
+        print("   ✅ identical results to the linear scan")
+    return not mismatches
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        searcher = StockSearchIndex.load()
+        for q in sys.argv[1:]:
+            print(q, [f"{hit['name']} ({hit['code']})" for hit in searcher.search(q)])
+    else:
+        sys.exit(0 if benchmark() else 1)
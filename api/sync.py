@@ -9,51 +9,76 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.append(os.path.join(project_root, 'admin-tools', 'stock-data-service'))
 
-try:
-    from main import handler as main_handler
-except ImportError:
-    # Fallback for debugging path issues
-    main_handler = None
-
-from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import json
-import logging
 
+# main imports only stdlib + dotenv at module level; pandas / pykrx / supabase load
+# on the first request that needs them and stay loaded in the warm container.
 try:
-    from main import sync_ticker
+    from main import sync_tickers, OK_STATUSES, SYNC_MAX_AGE_SECONDS
 except ImportError:
-    sync_ticker = None
+    # Fallback for debugging path issues
+    sync_tickers = None
+
+# One invocation syncs at most this many tickers (the rest would not fit the time budget)
+MAX_TICKERS = 50
+
+
+def parse_tickers(params):
+    """?tickers=005930,000660 and/or repeated ?ticker=... (order kept, duplicates dropped)"""
+    values = params.get('tickers', []) + params.get('ticker', [])
+    tickers = [t.strip() for value in values for t in value.split(',') if t.strip()]
+    return list(dict.fromkeys(tickers))
+
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         self.handle_request()
 
+    def send_json(self, code, response):
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(response).encode('utf-8'))
+
     def handle_request(self):
         # 1. Parse Query Parameters
         parsed_url = urlparse(self.path)
         params = parse_qs(parsed_url.query)
-        ticker = params.get('ticker', [None])[0]
+        tickers = parse_tickers(params)
 
-        # 2. Set Headers
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
+        if not sync_tickers:
+            self.send_json(500, {"status": "error", "message": "Import Logic Failed"})
+            return
+        if not tickers:
+            self.send_json(400, {"status": "error", "message": "Missing 'ticker' or 'tickers' parameter"})
+            return
+        if len(tickers) > MAX_TICKERS:
+            self.send_json(400, {"status": "error", "message": f"At most {MAX_TICKERS} tickers per request"})
+            return
+        try:
+            max_age = int(params.get('max_age', [SYNC_MAX_AGE_SECONDS])[0])
+        except ValueError:
+            self.send_json(400, {"status": "error", "message": "'max_age' must be an integer (seconds)"})
+            return
 
-        # 3. Process Request
-        if not sync_ticker:
-             response = {"status": "error", "message": "Import Logic Failed"}
-             self.wfile.write(json.dumps(response).encode('utf-8'))
-             return
-
-        if ticker:
-            try:
-                # Call the logic directly
-                sync_ticker(ticker)
-                response = {"status": "success", "message": f"Synced {ticker}"}
-            except Exception as e:
-                response = {"status": "error", "message": str(e)}
-        else:
-             response = {"status": "error", "message": "Missing 'ticker' parameter"}
+        # 2. Process Request (concurrent, within the time budget; fresh cache rows are skipped)
+        try:
+            results = sync_tickers(tickers, max_age=max_age)
+        except Exception as e:
+            self.send_json(500, {"status": "error", "message": str(e)})
+            return
 
-        self.wfile.write(json.dumps(response).encode('utf-8'))
+        # 3. 200 = every ticker fresh or synced, 207 = some failed, 502 = none succeeded
+        ok = sum(1 for r in results.values() if r["status"] in OK_STATUSES)
+        if ok == len(results):
+            code, status = 200, "success"
+        elif ok:
+            code, status = 207, "partial"
+        else:
+            code, status = 502, "error"
+        self.send_json(code, {
+            "status": status,
+            "message": f"{ok}/{len(results)} tickers up to date",
+            "results": results,
+        })
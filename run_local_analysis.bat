@@ -6,25 +6,9 @@ echo ==========================================
 echo   DailyPort Local Data Engine ^& Analysis
 echo ==========================================
 
-echo.
-echo [1/3] Initializing SQLite Database Master...
-python admin-tools/python/db_init.py
-
-echo.
-echo [2/4] Running Full Market Sync (SQLite)...
-python admin-tools/python/batch_daily.py
-
-echo.
-echo [2.5/4] Syncing Price Data to Supabase...
-python admin-tools/python/sync_to_supabase_price.py
-
-echo.
-echo [3/4] Updating Financials (ROE/Operating Margin)...
-python admin-tools/python/batch_financial_quarterly.py
-
-echo.
-echo [4/4] Analyzing and Uploading to Supabase...
-python admin-tools/python/analyzer_daily.py
+:: Stages, dependencies and skip rules live in admin-tools/python/run_pipeline.py
+:: Extra arguments are passed through, e.g. --force or --only sync_prices
+python admin-tools/python/run_pipeline.py %*
 
 echo.
 echo ==========================================
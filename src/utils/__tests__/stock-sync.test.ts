@@ -0,0 +1,34 @@
+import { describe, it, expect, vi } from 'vitest';
+import { buildSyncUrls, syncStocks, MAX_TICKERS_PER_REQUEST } from '../stock-sync';
+
+const tickers = Array.from({ length: 120 }, (_, i) => String(i).padStart(6, '0'));
+
+describe('Stock sync client', () => {
+    it('batches tickers into ?tickers= requests of at most 50', () => {
+        const urls = buildSyncUrls([...tickers, '000001', ' '], { baseUrl: 'https://app', maxAge: 0 });
+        expect(urls).toHaveLength(3);
+        const batches = urls.map((url) => new URL(url).searchParams.get('tickers')!.split(','));
+        expect(batches.map((b) => b.length)).toEqual([MAX_TICKERS_PER_REQUEST, MAX_TICKERS_PER_REQUEST, 20]);
+        expect(batches.flat()).toEqual(tickers);
+        expect(new URL(urls[0]).pathname).toBe('/api/stock-sync');
+        expect(new URL(urls[0]).searchParams.get('max_age')).toBe('0');
+    });
+
+    it('merges per-ticker results and marks failed requests as errors', async () => {
+        const fetchImpl = vi.fn(async (url: string) => {
+            const batch = new URL(url).searchParams.get('tickers')!.split(',');
+            if (batch.includes('000000')) throw new Error('network down');
+            return {
+                status: 207,
+                json: async () => ({ results: Object.fromEntries(batch.map((t) => [t, { status: 'synced' }])) }),
+            } as unknown as Response;
+        });
+
+        const results = await syncStocks(tickers, { baseUrl: 'https://app', fetchImpl: fetchImpl as unknown as typeof fetch });
+        expect(fetchImpl).toHaveBeenCalledTimes(3);
+        expect(results['000000']).toEqual({ status: 'error', message: 'network down' });
+        expect(results['000049'].status).toBe('error');
+        expect(results['000050'].status).toBe('synced');
+        expect(Object.keys(results)).toHaveLength(120);
+    });
+});
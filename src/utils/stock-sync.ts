@@ -0,0 +1,65 @@
+// Client for the PyKRX sync function (api/sync.py, routed as /api/stock-sync).
+// Tickers go out as one batched `?tickers=` request per MAX_TICKERS_PER_REQUEST
+// instead of one invocation per ticker; the function skips tickers whose
+// analysis_cache row is younger than maxAge seconds.
+
+// Same limit as MAX_TICKERS in api/sync.py
+export const MAX_TICKERS_PER_REQUEST = 50
+
+export type StockSyncStatus = 'fresh' | 'synced' | 'no_data' | 'error' | 'timeout'
+
+export interface StockSyncResult {
+    status: StockSyncStatus
+    age?: number
+    date?: string
+    message?: string
+}
+
+export interface StockSyncOptions {
+    maxAge?: number // seconds; 0 forces a fetch
+    baseUrl?: string
+    fetchImpl?: typeof fetch
+}
+
+function defaultBaseUrl(): string {
+    if (process.env.NEXT_PUBLIC_SITE_URL) return process.env.NEXT_PUBLIC_SITE_URL
+    if (process.env.VERCEL_URL) return `https://${process.env.VERCEL_URL}`
+    return 'http://localhost:3000'
+}
+
+export function buildSyncUrls(tickers: string[], options: StockSyncOptions = {}): string[] {
+    const unique = Array.from(new Set(tickers.map((t) => t.trim()).filter(Boolean)))
+    const baseUrl = options.baseUrl ?? defaultBaseUrl()
+    const urls: string[] = []
+    for (let i = 0; i < unique.length; i += MAX_TICKERS_PER_REQUEST) {
+        const params = new URLSearchParams({ tickers: unique.slice(i, i + MAX_TICKERS_PER_REQUEST).join(',') })
+        if (options.maxAge !== undefined) params.set('max_age', String(options.maxAge))
+        urls.push(`${baseUrl}/api/stock-sync?${params.toString()}`)
+    }
+    return urls
+}
+
+/**
+ * Syncs the tickers in batched requests (run concurrently).
+ * Returns per-ticker results; tickers of a request that failed as a whole get status 'error'.
+ */
+export async function syncStocks(tickers: string[], options: StockSyncOptions = {}): Promise<Record<string, StockSyncResult>> {
+    const fetchImpl = options.fetchImpl ?? fetch
+    const urls = buildSyncUrls(tickers, options)
+
+    const responses = await Promise.all(urls.map(async (url) => {
+        const batch = (new URL(url).searchParams.get('tickers') || '').split(',')
+        try {
+            const response = await fetchImpl(url)
+            // 200 / 207 / 502 all carry per-ticker results; 400 / 500 only a message
+            const body = await response.json()
+            if (body?.results) return body.results as Record<string, StockSyncResult>
+            const message = body?.message || `HTTP ${response.status}`
+            return Object.fromEntries(batch.map((t) => [t, { status: 'error', message } as StockSyncResult]))
+        } catch (error: unknown) {
+            const message = error instanceof Error ? error.message : 'Stock sync request failed'
+            return Object.fromEntries(batch.map((t) => [t, { status: 'error', message } as StockSyncResult]))
+        }
+    }))
+    return Object.assign({}, ...responses)
+}